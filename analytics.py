@@ -0,0 +1,162 @@
+"""소비 분석 함수 모음 (Streamlit과 무관하게 사용할 수 있음).
+
+주차는 ISO 주 기준 정수 키 year * 100 + week(예: 2025년 47주차 → 202547)로
+나타냅니다. 날짜가 없거나 잘못된 기록(NaT)은 0입니다. 정수 키는 정렬 순서가
+시간 순서와 같고, 튜플과 달리 벡터 연산으로 비교/그룹화할 수 있습니다.
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from timing import timed
+
+
+def week_key(dt):
+    """주차 키(year * 100 + week)를 반환합니다. NaT나 잘못된 값은 0으로 처리합니다."""
+    if isinstance(dt, str):
+        dt = pd.to_datetime(dt, errors='coerce')
+    # 🚨 수정 3: NaT 값 체크 및 처리
+    if pd.isnull(dt) or not isinstance(dt, (datetime, pd.Timestamp)):
+        return 0
+
+    iso = dt.isocalendar()
+    return iso.year * 100 + iso.week
+
+
+@timed
+def week_keys(dt_series):
+    """datetime Series 전체의 주차 키를 벡터 연산으로 계산합니다. NaT는 0입니다."""
+    dts = pd.to_datetime(dt_series, errors='coerce', format="ISO8601")
+    if len(dts) == 0:
+        return pd.Series([], index=dts.index, dtype="int64")
+    iso = dts.dt.isocalendar()
+    keys = iso["year"].astype("Int64") * 100 + iso["week"].astype("Int64")
+    return keys.fillna(0).astype("int64")
+
+
+def format_week(yw):
+    """주차 키를 "2025년 47주차" 형식으로 표시합니다."""
+    yw = int(yw)
+    return f"{yw // 100}년 {yw % 100}주차"
+
+
+def week_start(yw):
+    """주차 키에 해당하는 주의 월요일 0시를 반환합니다."""
+    yw = int(yw)
+    return datetime.fromisocalendar(yw // 100, yw % 100, 1)
+
+
+# ---------- 주간 통계 ----------
+EMOTIONS = ["좋음", "보통", "나쁨"]
+# 감정 최빈값이 같을 때 Series.mode()와 같은 순서(문자열 정렬 순)로 고르기 위한 컬럼 순서
+_EMOTION_ORDER = sorted(EMOTIONS)
+COUNT_METRICS = ["충동 구매 횟수", "과시 소비 횟수", "모방 소비 횟수"]
+
+
+# 기록 한 건이 각 지표에 더하는 값. 주간 통계와 일별 롤업(rollup.py)이 함께 사용
+METRIC_COLUMNS = ["금액", "건수"] + COUNT_METRICS + _EMOTION_ORDER
+
+
+@timed
+def record_indicators(df):
+    """기록마다 지표 값(금액, 건수, 충동/과시/모방 여부, 감정별 여부)을 숫자 컬럼으로 만듭니다.
+
+    날짜가 없는 기록(주차 키 0)은 제외합니다. year_week, 날짜(0시 기준), 대분류 컬럼을 함께 둡니다.
+    """
+    valid = df[df["year_week"] != 0]
+    ind = pd.DataFrame({
+        "year_week": valid["year_week"].astype("int64"),
+        "날짜": pd.to_datetime(valid["datetime_iso"]).dt.normalize(),
+        "대분류": valid["대분류"],
+        "금액": valid["금액"].fillna(0),
+        "건수": 1,
+        "충동 구매 횟수": (valid["계획됨"] == "아니오").astype("int64"),
+        "과시 소비 횟수": (valid["과시소비"] == "예").astype("int64"),
+        "모방 소비 횟수": (valid["모방소비"] == "예").astype("int64"),
+    })
+    for emo in _EMOTION_ORDER:
+        ind[emo] = (valid["감정"] == emo).astype("int64")
+    return ind
+
+
+def record_indicator(rec):
+    """기록 한 건(dict)의 지표 값을 METRIC_COLUMNS 순서의 리스트로 반환합니다."""
+    amount = rec.get("금액")
+    return [
+        0 if amount is None or pd.isnull(amount) else float(amount),
+        1,
+        int(rec.get("계획됨") == "아니오"),
+        int(rec.get("과시소비") == "예"),
+        int(rec.get("모방소비") == "예"),
+    ] + [int(rec.get("감정") == emo) for emo in _EMOTION_ORDER]
+
+
+@timed
+def summarize_weeks(indicators):
+    """지표 표(기록별 또는 롤업 행)를 주차별로 합쳐 주간 통계 표를 만듭니다."""
+    table = indicators.groupby("year_week")[METRIC_COLUMNS].sum()
+    table = table.drop(columns=["건수"]).rename(columns={"금액": "총 지출"})
+    table["총 지출"] = table["총 지출"].astype("int64")
+    emo_counts = table[_EMOTION_ORDER]
+    if table.empty:
+        table["가장 많은 소비 감정"] = pd.Series(dtype=object)
+    else:
+        table["가장 많은 소비 감정"] = emo_counts.idxmax(axis=1).where(emo_counts.sum(axis=1) > 0, "기록 부족")
+    return table
+
+
+def weekly_stats_table(df):
+    """모든 주차의 주간 지표를 한 번의 groupby로 계산합니다.
+
+    index는 주차 키, 컬럼은 총 지출, 충동/과시/모방 소비 횟수, 감정별 횟수,
+    가장 많은 소비 감정입니다. 기록이 없는 주차는 포함되지 않습니다.
+    """
+    return summarize_weeks(record_indicators(df))
+
+
+@timed
+def week_stats(table, yw, budget):
+    """weekly_stats_table 결과에서 한 주의 통계를 꺼냅니다."""
+    if yw in table.index:
+        row = table.loc[yw]
+        total_amount = int(row["총 지출"])
+        counts = {name: int(row[name]) for name in COUNT_METRICS}
+        emo_mode = row["가장 많은 소비 감정"]
+    else:
+        total_amount = 0
+        counts = {name: 0 for name in COUNT_METRICS}
+        emo_mode = "기록 부족"
+
+    # 예산이 0보다 커야 초과 여부를 판단
+    budget_status = "🚨 초과" if total_amount > budget and budget > 0 else "✅ 적정"
+
+    return {
+        "총 지출": total_amount,
+        "예산 초과 여부": budget_status,
+        **counts,
+        "가장 많은 소비 감정": emo_mode,
+    }
+
+
+def recent_weeks(end_yw, n_weeks):
+    """end_yw를 마지막으로 하는 연속된 n_weeks개 주차 키를 오래된 순으로 반환합니다."""
+    end = week_start(end_yw)
+    return [week_key(end - timedelta(weeks=i)) for i in range(n_weeks - 1, -1, -1)]
+
+
+def weekly_trend(table, end_yw, n_weeks):
+    """최근 n_weeks 주의 지표 표를 반환합니다. 기록이 없는 주는 0으로 채웁니다."""
+    weeks = recent_weeks(end_yw, n_weeks)
+    numeric = table.drop(columns=["가장 많은 소비 감정"])
+    return numeric.reindex(weeks, fill_value=0)
+
+
+def window_deltas(table, end_yw, n_weeks):
+    """최근 n_weeks 주 합계와 그 이전 n_weeks 주 합계의 차이를 지표별로 반환합니다.
+
+    {지표: (최근 합계, 이전 대비 증감)} 형태입니다.
+    """
+    both = weekly_trend(table, end_yw, n_weeks * 2)
+    previous, current = both.iloc[:n_weeks].sum(), both.iloc[n_weeks:].sum()
+    metrics = ["총 지출"] + COUNT_METRICS
+    return {name: (int(current[name]), int(current[name] - previous[name])) for name in metrics}
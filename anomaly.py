@@ -0,0 +1,215 @@
+"""대분류별 평소 소비 통계와 이상 지출 감지.
+
+"오늘 지출이 주간 예산의 30%를 넘으면 과소비" 같은 고정 규칙은 사람마다, 대분류마다
+다른 평소 씀씀이를 보지 못합니다. 여기서는 사용자의 대분류별 통계를 기록이 들어올
+때마다 O(1)로 갱신하고, 새 기록을 저장하기 직전에 그 통계와 비교해 평소와 다른
+지출을 알려 줍니다.
+
+- 건별 금액: log(1 + 금액)의 평균/분산 (Welford). 금액은 로그 정규 분포에 가까워
+  큰 지출 몇 건에 기준이 끌려가지 않도록 로그 값으로 봅니다.
+- 하루 합계: 그 대분류에 지출한 날의 합계에 대한 지수 가중 평균/분산 (EWMA). 마지막
+  날(진행 중인 날)의 합계는 따로 두었다가 다음 날 기록이 들어올 때 반영합니다.
+- 충동 시간대: 계획하지 않은(계획됨 "아니오") 지출의 시각(시)별 건수. 데모 데이터의
+  밤 11시 반 간식처럼 같은 시간대에 되풀이되는 충동 소비를 찾습니다.
+
+전체 기록에서 새로 만들 때(build)는 groupby / ewm 벡터 연산으로 한 번에 계산하며,
+기록을 시간 순으로 하나씩 apply_insert한 결과와 같습니다.
+
+상태: {"categories": {대분류: {"n": 건수, "mean": 로그 금액 평균, "m2": 편차 제곱합,
+                              "day": 진행 중인 날 "YYYY-MM-DD", "day_total": 그날 합계,
+                              "days": 반영된 날 수, "ewma": 하루 합계 평균, "ewvar": 분산,
+                              "impulse_hours": [0시~23시 충동 지출 건수]}}}
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+STATE_NAME = "spend_stats"
+
+MIN_HISTORY = 8 # 대분류 기록이 이보다 적으면 건별 금액을 판단하지 않음
+AMOUNT_Z = 2.5 # 건별 금액: 로그 금액의 z-점수가 이보다 크면 이상 지출
+DAILY_ALPHA = 0.2 # 하루 합계 EWMA 가중치 (최근 약 10일에 무게)
+MIN_DAYS = 5 # 반영된 날이 이보다 적으면 하루 합계를 판단하지 않음
+DAILY_Z = 2.5 # 하루 합계: 평균 + DAILY_Z × 표준편차를 넘으면 급증
+DAILY_MIN_RATIO = 2.0 # 하루 합계: 평소의 이 배수도 넘어야 급증 (분산이 작은 대분류에서 잦은 알림 방지)
+IMPULSE_MIN_COUNT = 3 # 같은 시간대의 충동 지출이 이 건수(이번 기록 포함) 이상이면 반복 패턴
+IMPULSE_SHARE = 0.2 # 그 시간대가 대분류 충동 지출에서 차지하는 비율의 하한
+
+
+def _empty():
+    return {"n": 0, "mean": 0.0, "m2": 0.0, "day": None, "day_total": 0.0,
+            "days": 0, "ewma": 0.0, "ewvar": 0.0, "impulse_hours": [0] * 24}
+
+def _amount(rec):
+    amount = rec.get("금액")
+    return 0.0 if amount is None or pd.isnull(amount) else float(amount)
+
+def _impulsive(rec):
+    return rec.get("계획됨") == "아니오"
+
+
+def build(df):
+    """전체 기록에서 대분류별 통계를 벡터 연산으로 계산합니다."""
+    state = {"categories": {}}
+    df = df[df["대분류"].notna()]
+    if df.empty:
+        return state
+    categories = df["대분류"].astype(str)
+    amounts = df["금액"].fillna(0).astype("float64")
+    dts = pd.to_datetime(df["datetime_iso"], errors='coerce', format="ISO8601")
+
+    logs = np.log1p(amounts.clip(lower=0)).groupby(categories).agg(["count", "mean", "var"])
+    impulsive = (df["계획됨"] == "아니오").to_numpy() & dts.notna().to_numpy()
+    hours = pd.crosstab(categories[impulsive], dts[impulsive].dt.hour).reindex(columns=range(24), fill_value=0)
+
+    # 대분류별 하루 합계 (날짜 순). 마지막 날은 진행 중인 날로 두고 그 전 날들만 EWMA에 반영
+    daily = amounts.groupby([categories, dts.dt.normalize()]).sum() # 날짜가 없는 기록은 제외됨
+    last = (daily.groupby(level=0).cumcount(ascending=False) == 0).to_numpy()
+    open_days = {category: (day, total) for (category, day), total in daily[last].items()}
+    closed = daily[~last]
+    ewm = closed.groupby(level=0).ewm(alpha=DAILY_ALPHA, adjust=False)
+    ewma = ewm.mean().groupby(level=0).last()
+    ewvar = ewm.var(bias=True).groupby(level=0).last()
+    days = closed.groupby(level=0).size()
+
+    for category, row in logs.iterrows():
+        stats = _empty()
+        n = int(row["count"])
+        stats.update(n=n, mean=float(row["mean"]), m2=float(row["var"]) * (n - 1) if n > 1 else 0.0)
+        if category in hours.index:
+            stats["impulse_hours"] = [int(v) for v in hours.loc[category]]
+        if category in open_days:
+            day, total = open_days[category]
+            stats.update(day=day.strftime("%Y-%m-%d"), day_total=float(total))
+        if category in days.index:
+            stats.update(days=int(days[category]), ewma=float(ewma[category]), ewvar=float(ewvar[category]))
+        state["categories"][category] = stats
+    return state
+
+
+# ---------- 한 건씩 갱신 ----------
+def _fold_day(stats):
+    """진행 중인 날의 합계를 하루 합계 EWMA에 반영합니다."""
+    x = stats["day_total"]
+    if stats["days"] == 0:
+        stats["ewma"], stats["ewvar"] = x, 0.0
+    else:
+        diff = x - stats["ewma"]
+        step = DAILY_ALPHA * diff
+        stats["ewma"] += step
+        stats["ewvar"] = (1 - DAILY_ALPHA) * (stats["ewvar"] + diff * step)
+    stats["days"] += 1
+
+def _add(state, rec, sign):
+    category = rec.get("대분류")
+    if category is None or pd.isnull(category):
+        return
+    stats = state.setdefault("categories", {}).setdefault(str(category), _empty())
+    amount = _amount(rec)
+
+    # 건별 금액 (Welford; 빼기는 더하기의 역연산)
+    x = math.log1p(max(amount, 0.0))
+    if sign > 0:
+        stats["n"] += 1
+        diff = x - stats["mean"]
+        stats["mean"] += diff / stats["n"]
+        stats["m2"] += diff * (x - stats["mean"])
+    elif stats["n"] <= 1:
+        stats.update(n=0, mean=0.0, m2=0.0)
+    else:
+        old_mean = stats["mean"]
+        stats["n"] -= 1
+        stats["mean"] = (old_mean * (stats["n"] + 1) - x) / stats["n"]
+        stats["m2"] = max(0.0, stats["m2"] - (x - stats["mean"]) * (x - old_mean))
+
+    dt = pd.to_datetime(rec.get("datetime_iso"), errors='coerce')
+    if pd.isnull(dt):
+        return
+    if _impulsive(rec):
+        stats["impulse_hours"][dt.hour] = max(0, stats["impulse_hours"][dt.hour] + sign)
+
+    # 하루 합계: 새 날의 기록이면 진행 중인 날을 반영하고 넘어감. 지난 날의 기록은 반영하지 않음
+    day = dt.strftime("%Y-%m-%d")
+    if sign > 0 and (stats["day"] is None or day > stats["day"]):
+        if stats["day"] is not None:
+            _fold_day(stats)
+        stats["day"], stats["day_total"] = day, 0.0
+    if day == stats["day"]:
+        stats["day_total"] += sign * amount
+
+
+def apply_insert(state, rec):
+    """기록 한 건이 추가될 때 그 대분류의 통계를 갱신합니다."""
+    _add(state, rec, 1)
+    return state
+
+def apply_update(state, before, after):
+    """기록 한 건이 수정될 때 이전 값을 빼고 새 값을 더합니다. (감정만 바뀌면 그대로)
+
+    지난 날의 하루 합계는 EWMA에 이미 섞여 있어 되돌릴 수 없으므로, 진행 중인 날의
+    기록만 하루 합계에 반영됩니다. 정확한 값은 build로 다시 만들면 됩니다.
+    """
+    fields = ("대분류", "금액", "datetime_iso", "계획됨")
+    if all(before.get(f) == after.get(f) for f in fields):
+        return state
+    _add(state, before, -1)
+    _add(state, after, 1)
+    return state
+
+
+# ---------- 판단 ----------
+def evaluate(state, rec):
+    """저장하기 전의 기록 rec을 지금까지의 통계와 비교해 이상 지출 목록을 반환합니다.
+
+    각 항목은 {"name": 종류, "category": 대분류, "message": 안내 문장} dict입니다.
+    """
+    category = rec.get("대분류")
+    stats = state.get("categories", {}).get(str(category))
+    if stats is None:
+        return []
+    amount = _amount(rec)
+    flags = []
+
+    if stats["n"] >= MIN_HISTORY and amount > 0:
+        std = math.sqrt(stats["m2"] / (stats["n"] - 1))
+        if std > 0 and (math.log1p(amount) - stats["mean"]) / std > AMOUNT_Z:
+            typical = math.expm1(stats["mean"])
+            flags.append({"name": "평소보다 큰 지출", "category": category,
+                          "message": f"{category} 한 건에 보통 {typical:,.0f}원 정도 쓰는데 이번에는 {amount:,.0f}원이에요."})
+
+    dt = pd.to_datetime(rec.get("datetime_iso"), errors='coerce')
+    if pd.isnull(dt):
+        return flags
+    day = dt.strftime("%Y-%m-%d")
+    if stats["day"] is None or day >= stats["day"]:
+        baseline = dict(stats)
+        if stats["day"] is not None and day > stats["day"]:
+            _fold_day(baseline) # 진행 중이던 날은 이제 지난 날
+        total = amount + (stats["day_total"] if day == stats["day"] else 0.0)
+        if baseline["days"] >= MIN_DAYS and baseline["ewma"] > 0:
+            limit = max(baseline["ewma"] + DAILY_Z * math.sqrt(baseline["ewvar"]), baseline["ewma"] * DAILY_MIN_RATIO)
+            if total > limit:
+                flags.append({"name": "하루 지출 급증", "category": category,
+                              "message": f"오늘 {category} 지출이 {total:,.0f}원으로 평소 하루"
+                                         f"({baseline['ewma']:,.0f}원)의 {total / baseline['ewma']:.1f}배예요."})
+
+    if _impulsive(rec):
+        hours = stats["impulse_hours"]
+        count = hours[dt.hour] + 1
+        if count >= IMPULSE_MIN_COUNT and count / (sum(hours) + 1) >= IMPULSE_SHARE:
+            flags.append({"name": "반복되는 충동 시간대", "category": category,
+                          "message": f"{dt.hour}시대에 계획 없이 쓴 {category} 지출이 벌써 {count}번째예요."})
+    return flags
+
+
+def impulse_patterns(state, min_count=IMPULSE_MIN_COUNT):
+    """되풀이되는 충동 소비 시간대 [(대분류, 시, 건수), ...]를 건수가 많은 순서로 반환합니다."""
+    patterns = []
+    for category, stats in state.get("categories", {}).items():
+        hours = stats["impulse_hours"]
+        total = sum(hours)
+        for hour, count in enumerate(hours):
+            if count >= min_count and count / total >= IMPULSE_SHARE:
+                patterns.append((category, hour, count))
+    return sorted(patterns, key=lambda p: p[2], reverse=True)
@@ -1,23 +1,21 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
-import uuid
-import os
-import bcrypt
-import random
-import numpy as np # 🚨 수정 1: NaT 체크를 위해 numpy 임포트
+
+# 로그인 화면은 가벼운 모듈만으로 그림. pandas, 저장소, 분석 모듈은 engine 함수가
+# 처음 필요할 때 불러오고, 로그인 후 본문에서 쓰는 모듈은 로그인 확인 아래에서 불러옴
+import engine
+import timing
+from auth import issue_session_token, verify_session_token
 
 # ---------- 설정 ----------
 st.set_page_config(page_title="머니모니", layout="wide")
 st.title("머니모니 - 청소년 소비 습관 관리 앱")
 
-USERS_FILE = "users.csv"
-DEFAULT_MONTHLY_BUDGET = 200000 # 기본 예산 설정
-PLAN_FILE_PREFIX = "_plan.txt" # 소비 계획 저장 파일 접미사
-BUDGET_FILE_SUFFIX = "_budget.txt" # 월 예산 저장 파일 접미사
-
-# 고정된 시작 날짜 (2025년 11월 17일 월요일)
-START_DATE = datetime(2025, 11, 17)
+EMOTION_PAGE_SIZE = 5 # 감정 기록 대기 항목을 한 화면에 보여 줄 개수
+RECENT_ROWS = 10 # 최근 기록 표에 보여 줄 개수
+TIMING_HISTORY = 10 # 성능 측정 패널에서 고를 수 있는 최근 재실행 수
+LONG_RANGE_MONTHS = [3, 6, 12, 0] # 장기 소비 차트 기간(개월), 0은 전체
+LOGIN_POLL_SECONDS = 0.25 # 비밀번호 확인(bcrypt)이 끝났는지 보는 간격
 
 # 카테고리 옵션
 CATEGORY_OPTIONS = [
@@ -26,277 +24,16 @@ CATEGORY_OPTIONS = [
     "기부"
 ]
 
-# 카테고리 매핑 (사용자 입력 단순화 반영)
-CATEGORY_MAP = {
-    "식비": "식비(간식/외식 포함)",
-    "교통": "교통",
-    "기타": "기타",
-    "의류": "의류/패션/잡화",
-    "학습 자료": "학습 자료",
-    "문화 생활": "문화 생활(친구모임/영화 등)",
-    "미용": "미용(화장품 등)",
-    "의류/패션/잡화": "의류/패션/잡화"
-} 
-
-# ---------- 유틸 함수 ----------
-def load_users():
-    """사용자 정보(ID, 해시 비밀번호)를 로드합니다."""
-    if os.path.exists(USERS_FILE):
-        return pd.read_csv(USERS_FILE, dtype=str)
-    else:
-        return pd.DataFrame(columns=["username", "password_hash"])
-
-def save_users(df):
-    """사용자 정보를 저장합니다."""
-    df.to_csv(USERS_FILE, index=False)
-
-def hash_password(password):
-    """비밀번호를 해시합니다."""
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-
-def check_password(password, hashed):
-    """비밀번호와 해시값을 비교하여 일치하는지 확인합니다."""
-    try:
-        return bcrypt.checkpw(password.encode(), hashed.encode())
-    except Exception:
-        return False
-
-def load_data(username):
-    """특정 사용자의 지출 기록을 로드합니다."""
-    file = f"{username}_records.csv"
-    
-    if not os.path.exists(file):
-        cols = ["id","날짜","시간","datetime_iso","대분류","세부항목","금액","계획됨","과시소비", "모방소비", "감정", "감정 이유"]
-        return pd.DataFrame(columns=cols)
-
-    df = pd.read_csv(file, dtype={"id": str})
-    
-    # 데이터 타입 및 호환성 처리
-    if "datetime_iso" in df.columns:
-        # 🚨 수정 2: errors='coerce'를 사용하여 잘못된 값은 NaT로 변환
-        df["datetime_iso"] = pd.to_datetime(df["datetime_iso"], errors='coerce')
-    
-    if '모방소비' not in df.columns: df['모방소비'] = '아니오'
-    if '감정 이유' not in df.columns: df['감정 이유'] = ''
-        
-    return df
-
-def save_data(df, username):
-    """특정 사용자의 지출 기록을 저장합니다."""
-    df2 = df.copy()
-    if "datetime_iso" in df2.columns:
-        df2["datetime_iso"] = df2["datetime_iso"].astype(str)
-    df2.to_csv(f"{username}_records.csv", index=False)
-    
-def load_plan(username):
-    """특정 사용자의 소비 계획을 로드합니다. (이번 주 성찰, 다음 주 계획)"""
-    file = f"{username}{PLAN_FILE_PREFIX}"
-    if os.path.exists(file):
-        with open(file, 'r', encoding='utf-8') as f:
-            lines = f.read().splitlines()
-            reflection = lines[0].strip() if len(lines) > 0 else ""
-            plan = lines[1].strip() if len(lines) > 1 else ""
-            return reflection, plan
-    return "", ""
-
-def save_plan(username, reflection, plan):
-    """특정 사용자의 소비 계획을 저장합니다."""
-    file = f"{username}{PLAN_FILE_PREFIX}"
-    with open(file, 'w', encoding='utf-8') as f:
-        f.write(f"{reflection}\n{plan}")
-
-def load_user_budget(username):
-    """특정 사용자의 월 예산을 로드합니다. 파일이 없으면 기본값을 반환합니다."""
-    file = f"{username}{BUDGET_FILE_SUFFIX}"
-    if os.path.exists(file):
-        try:
-            with open(file, 'r', encoding='utf-8') as f:
-                return int(f.read().strip())
-        except ValueError:
-            return DEFAULT_MONTHLY_BUDGET
-    return DEFAULT_MONTHLY_BUDGET
-
-def save_user_budget(username, budget):
-    """특정 사용자의 월 예산을 저장합니다."""
-    file = f"{username}{BUDGET_FILE_SUFFIX}"
-    with open(file, 'w', encoding='utf-8') as f:
-        f.write(str(int(budget)))
-
-def delete_user_files(username):
-    """특정 사용자의 모든 관련 데이터 파일을 삭제합니다."""
-    record_file = f"{username}_records.csv"
-    plan_file = f"{username}{PLAN_FILE_PREFIX}"
-    budget_file = f"{username}{BUDGET_FILE_SUFFIX}"
-    
-    if os.path.exists(record_file):
-        os.remove(record_file)
-    if os.path.exists(plan_file):
-        os.remove(plan_file)
-    if os.path.exists(budget_file):
-        os.remove(budget_file)
-
-def week_key(dt):
-    """주차를 (년, 주) 튜플로 반환합니다. NaT는 (0, 0)으로 처리합니다."""
-    # 🚨 수정 3: NaT 값 체크 및 처리
-    if pd.isnull(dt) or not isinstance(dt, (datetime, pd.Timestamp)):
-        return (0, 0)
-        
-    iso = dt.isocalendar()
-    return (iso.year, iso.week)
-
-# ---------- 요청받은 특정 데이터 생성 함수 (중복 완전 방지 버전) ----------
-
-def create_specific_data(username):
-    """요청받은 사용자별 특정 데이터를 생성하여 저장합니다."""
-
-    # 날짜 계산: START_DATE 기준 (2025년 11월 17일 월요일)
-    def get_datetime(day_offset, time_str):
-        date_obj = START_DATE + timedelta(days=day_offset)
-        hour, minute, second = map(int, time_str.split(':')) if ':' in time_str else (map(int, time_str.split(':') + ['00']))
-        return date_obj.replace(hour=hour, minute=minute, second=second)
-
-    # ... (기존 data_map 정의는 동일하게 유지) ...
-    data_map = {
-        "kim": [
-            (0, '18:40:00', 3500, '식비', '음료수', False, '아니오', '아니오', '좋음', '맛있어서'),
-            (0, '19:00:00', 1350, '교통', '버스비', True, '아니오', '아니오', '보통', ''),
-            (1, '23:35:00', 900, '식비', '아이스크림', False, '아니오', '예', '', ''),
-            (1, '19:30:00', 1350, '교통', '버스비', True, '아니오', '예', '', ''),
-            (2, '18:28:00', 2500, '식비', '음료수', False, '아니오', '아니오', '좋음', '결명자차기 맛있었다!!'),
-            (2, '21:50:00', 4150, '교통', '택시비', False, '아니오', '아니오', '나쁨', '안 나가도 될 돈 나감'),
-            (3, '19:35:00', 3000, '기타', '교회 준비물', True, '아니오', '아니오', '', ''),
-            (3, '21:00:00', 2000, '기타', '노트', False, '아니오', '아니오', '보통', ''),
-            (3, '21:01:00', 5900, '의류/패션/잡화', '장갑', False, '아니오', '아니오', '좋음', '장갑 귀여움'),
-            (4, '17:37:00', 6000, '학습 자료', '학술제 논문', True, '아니오', '예', '나쁨', '너무 오래됨'),
-            (4, '19:43:00', 1800, '기타', '볼펜', False, '예', '아니오', '보통', ''),
-            (5, '09:40:00', 4700, '교통', '택시비', False, '아니오', '예', '', ''),
-            (5, '13:03:00', 15000, '의류/패션/잡화', '선크림', False, '아니오', '아니오', '', ''),
-            (5, '15:40:00', 1350, '교통', '버스비', True, '아니오', '아니오', '보통', ''),
-            (6, '07:40:00', 4700, '교통', '택시비', True, '아니오', '아니오', '', ''),
-            (6, '12:31:00', 1500, '식비', '삼김', False, '아니오', '예', '', ''),
-            (6, '17:32:00', 3500, '식비', '음료수', True, '아니오', '예', '보통', ''),
-        ],
-
-        "oh": [
-            (0, '21:40:00', 2300, '식비', '아이스크림', False, '아니오', '예', '나쁨', '추워짐'),
-            (0, '23:40:00', 36000, '학습 자료', '인강 정기결제', True, '아니오', '아니오', '나쁨', '취소 깜빡'),
-            (1, '23:35:00', 1500, '식비', '카페 디저트', False, '아니오', '예', '좋음', '맛있음'),
-            (1, '21:30:00', 6500, '교통', '택시비', True, '아니오', '아니오', '보통', ''),
-            (2, '18:28:00', 900, '식비', '멘토스', False, '아니오', '아니오', '나쁨', '개노맛'),
-            (2, '18:35:00', 4500, '식비', '카페 음료', True, '아니오', '아니오', '나쁨', '배부른데 먹음'),
-            (3, '21:35:00', 4500, '교통', '택시비', True, '아니오', '아니오', '보통', ''),
-            (3, '23:00:00', 12400, '식비', '아이스크림', False, '예', '아니오', '좋음', '쟁여둠'),
-            (4, '17:37:00', 6000, '학습 자료', '학술제 논문', True, '아니오', '예', '나쁨', ''),
-            (4, '19:20:00', 4400, '기타', '애플 클라우드', True, '예', '예', '나쁨', ''),
-            (5, '13:20:00', 10000, '식비', '에너지음료', False, '아니오', '예', '좋음', '배송 기다림'),
-            (5, '13:20:00', 24400, '의류/패션/잡화', '수딩젤', False, '아니오', '예', '좋음', ''),
-            (5, '18:00:00', 1500, '식비', '토스트', False, '아니오', '아니오', '나쁨', '잘못 고름'),
-            (6, '15:31:00', 1500, '식비', '젤리', False, '아니오', '예', '나쁨', ''),
-            (6, '17:32:00', 3700, '식비', '음료수', True, '아니오', '예', '보통', ''),
-        ],
-
-        "choi": [
-            (0, '08:42:00', 4000, '교통', '택시비', True, '아니오', '아니오', '보통', ''),
-            (0, '11:46:00', 57700, '기타', '병원', True, '아니오', '아니오', '나쁨', '몸 관리 부족'),
-            (0, '11:49:00', 4600, '기타', '병원', True, '아니오', '아니오', '나쁨', ''),
-            (1, '23:05:00', 1000, '문화 생활', '웹툰', False, '아니오', '아니오', '나쁨', ''),
-            (1, '23:35:00', 2000, '식비', '편의점', False, '아니오', '아니오', '좋음', ''),
-            (2, '18:28:00', 12500, '식비', '배달', False, '아니오', '예', '보통', ''),
-            (2, '19:32:00', 2700, '의류/패션/잡화', '올리브영', False, '예', '예', '좋음', ''),
-            (3, '17:00:00', 3000, '식비', '편의점', False, '아니오', '아니오', '좋음', ''),
-            (3, '17:42:00', 6700, '식비', '카페', False, '아니오', '예', '보통', ''),
-            (4, '08:04:00', 3750, '식비', '마트', False, '아니오', '아니오', '나쁨', ''),
-            (4, '23:35:00', 2000, '식비', '편의점', False, '아니오', '아니오', '좋음', ''),
-            (5, '11:02:00', 1100, '기타', '애플 클라우드', True, '아니오', '아니오', '나쁨', ''),
-            (5, '19:03:00', 3000, '문화 생활', '노래방', False, '아니오', '아니오', '좋음', ''),
-            (6, '14:37:00', 3600, '식비', '카페', False, '예', '예', '좋음', ''),
-            (6, '14:53:00', 2500, '식비', '마트', False, '아니오', '아니오', '보통', ''),
-        ]
-    }
-    
-    # 기존 기록 불러오기
-    df_existing = load_data(username)
-
-    # 기존 기록의 중복 기준 키셋 생성
-    existing_dup_keys = set()
-    if not df_existing.empty and "datetime_iso" in df_existing.columns:
-        # datetime_iso를 문자열로 변환하여 중복 키를 생성하고 set에 저장
-        # NaT가 아닌 유효한 값만 처리
-        df_valid_dt = df_existing[pd.notna(df_existing['datetime_iso'])]
-        existing_dup_keys = set(
-            df_valid_dt.apply(
-                lambda row: f"{row['datetime_iso'].strftime('%Y-%m-%d')}|{row['datetime_iso'].strftime('%H:%M:%S')}|{int(row['금액'])}|{row['세부항목']}",
-                axis=1
-            )
-        )
-
-    new_records = []
-
-    # 새로운 기록 생성 및 중복 검사
-    for (day_offset, time_str, amount, base_category, detail,
-          is_planned, flashy, imitation, emotion, reason) in data_map.get(username, []):
-
-        dt_iso = get_datetime(day_offset, time_str)
-        # 새로운 기록의 중복 키 생성
-        dup_key = f"{dt_iso.strftime('%Y-%m-%d')}|{dt_iso.strftime('%H:%M:%S')}|{int(amount)}|{detail}"
-
-        # 🚨 중복 체크: 기존 키셋에 새로운 키가 없는 경우에만 추가
-        if dup_key not in existing_dup_keys:
-            new_records.append({
-                "id": str(uuid.uuid4()),
-                "날짜": dt_iso.strftime("%Y-%m-%d"),
-                "시간": dt_iso.strftime("%H:%M:%S"),
-                "datetime_iso": dt_iso,
-                "대분류": CATEGORY_MAP.get(base_category, base_category),
-                "세부항목": detail,
-                "금액": float(amount),
-                "계획됨": "예" if is_planned else "아니오",
-                "과시소비": flashy,
-                "모방소비": imitation,
-                "감정": emotion,
-                "감정 이유": reason,
-            })
-            existing_dup_keys.add(dup_key) # 즉시 키셋에 추가하여 이번 실행 중에도 중복 방지
-
-    if new_records:
-        df_new = pd.DataFrame(new_records)
-        df_final = pd.concat([df_existing.drop(columns=["dup_key"], errors='ignore'), df_new], ignore_index=True)
-        df_final.sort_values(by="datetime_iso", inplace=True)
-        save_data(df_final, username)
-
-    return len(new_records)
-
-
 # ---------- 데모 유저 생성 ----------
 def initialize_demo_users_and_data():
-    """요청받은 사용자별 특정 데이터를 생성하여 저장합니다."""
-    users_to_create = ["kim", "oh", "choi"]
-    password = "test1234"
-    hashed_pass = hash_password(password)
-
+    """kim, oh, choi 계정을 다시 만들고 데모 기록과 예산을 저장합니다."""
     # 데모 데이터를 다시 생성하려면 이 플래그를 제거해야 합니다.
     if "demo_data_initialized" in st.session_state:
         del st.session_state["demo_data_initialized"]
 
-    demo_budgets = {"kim": 70000, "oh": 100000, "choi": 120000}
-
-    users_df = load_users()
-
-    for user in users_to_create:
-        # 🚨 기존 파일 삭제로 완전 초기화
-        delete_user_files(user)
-        
-        if user not in users_df["username"].values:
-            new_row = pd.DataFrame([{"username": user, "password_hash": hashed_pass}])
-            users_df = pd.concat([users_df, new_row], ignore_index=True)
+    for user, registered, count in engine.seed_demo_users():
+        if registered:
             st.toast(f"사용자 '{user}' 등록 완료.")
-
-    save_users(users_df)
-
-    # 이 시점에서 create_specific_data는 파일에 기록합니다.
-    for user in users_to_create:
-        count = create_specific_data(user)
-        save_user_budget(user, demo_budgets[user])
         st.toast(f"'{user}'의 데이터 {count}건 저장 완료")
 
     st.session_state["demo_data_initialized"] = True # 🚨 플래그 설정
@@ -304,7 +41,27 @@ def initialize_demo_users_and_data():
 
 
 # ---------- 로그인 / 회원가입 / 데모 설정 (사이드바) ----------
-users_df = load_users()
+@st.fragment(run_every=LOGIN_POLL_SECONDS)
+def login_progress():
+    """비밀번호 확인이 끝날 때까지 확인 중 표시만 다시 그리고, 끝나면 결과를 반영해 앱 전체를 다시 실행합니다."""
+    checking = st.session_state.get("login_check")
+    if checking is None:
+        return
+    if not checking["future"].done():
+        st.info("비밀번호 확인 중…")
+        return
+    del st.session_state["login_check"]
+    user = checking["user"]
+    if engine.finish_login(user, checking["ip"], checking["future"]):
+        st.session_state["user"] = user
+        st.session_state["auth_token"] = issue_session_token(user)
+        st.session_state["login_flash"] = [("success", f"{user}님 환영합니다!")]
+    elif not checking["known"]:
+        st.session_state["login_flash"] = [("error", "존재하지 않는 아이디입니다.")]
+    else:
+        st.session_state["login_flash"] = [("error", "비밀번호가 틀렸습니다.")]
+    st.rerun()
+
 st.sidebar.header("로그인 / 회원가입")
 
 if st.sidebar.button("🚨 데모 데이터 생성", help="kim, oh, choi 계정을 비밀번호 'test1234'로 생성하고 요청된 데이터와 예산을 주입합니다."):
@@ -317,38 +74,54 @@ if auth_mode == "회원가입":
     new_user = st.sidebar.text_input("사용자 아이디", key="signup_user")
     new_pass = st.sidebar.text_input("비밀번호", type="password", key="signup_pass")
     if st.sidebar.button("회원가입", key="signup_btn"):
-        if new_user in users_df["username"].values:
-            st.sidebar.error("이미 존재하는 아이디입니다.")
-        elif not new_user or not new_pass:
+        if not new_user or not new_pass:
             st.sidebar.error("아이디와 비밀번호를 입력해주세요.")
-        else:
-            users_df = pd.concat([users_df, pd.DataFrame([{"username": new_user, "password_hash": hash_password(new_pass)}])], ignore_index=True)
-            save_users(users_df)
+        elif engine.user_exists(new_user):
+            st.sidebar.error("이미 존재하는 아이디입니다.")
+        elif engine.register_user(new_user, new_pass):
             st.sidebar.success("회원가입 완료! 로그인 해주세요.")
+        else:
+            # 확인 직후 다른 세션이 같은 아이디로 먼저 가입한 경우
+            st.sidebar.error("이미 존재하는 아이디입니다.")
 elif auth_mode == "로그인":
     st.sidebar.subheader("로그인")
     login_user = st.sidebar.text_input("아이디", key="login_user")
     login_pass = st.sidebar.text_input("비밀번호", type="password", key="login_pass")
-    login_btn = st.sidebar.button("로그인", key="login_btn")
+    login_btn = st.sidebar.button("로그인", key="login_btn", disabled="login_check" in st.session_state)
     if login_btn:
-        if login_user in users_df["username"].values:
-            hashed = users_df.loc[users_df["username"] == login_user, "password_hash"].values[0]
-            if check_password(login_pass, hashed):
-                st.sidebar.success(f"{login_user}님 환영합니다!")
-                st.session_state["user"] = login_user
-                st.rerun()
-            else:
-                st.sidebar.error("비밀번호가 틀렸습니다.")
+        client_ip = st.context.ip_address or "unknown"
+        # bcrypt 검증은 작업자 풀에 넣고 기다리지 않음. 끝나면 login_progress가 결과를 반영함.
+        # 실패가 쌓이면 잠시 차단됨
+        future, retry_after, known_user = engine.start_login(login_user, login_pass, client_ip)
+        if future is None:
+            st.sidebar.error(f"로그인 시도가 너무 많습니다. {int(retry_after) + 1}초 후 다시 시도해주세요.")
         else:
-            st.sidebar.error("존재하지 않는 아이디입니다.")
+            st.session_state["login_check"] = {"user": login_user, "ip": client_ip, "future": future, "known": known_user}
+    for kind, text in st.session_state.pop("login_flash", []):
+        getattr(st.sidebar, kind)(text)
+    if "login_check" in st.session_state:
+        with st.sidebar:
+            login_progress()
+
+# 재실행마다 비밀번호를 다시 검증하지 않고 세션 토큰(HMAC)만 확인. 유효하면 다시 발급해 만료 시각을 늦춤
+if "user" in st.session_state:
+    if verify_session_token(st.session_state.get("auth_token")) != st.session_state["user"]:
+        del st.session_state["user"]
+        st.sidebar.warning("로그인이 만료되었습니다. 다시 로그인해주세요.")
+    else:
+        st.session_state["auth_token"] = issue_session_token(st.session_state["user"])
 
 if "user" in st.session_state:
     if st.sidebar.button("로그아웃"):
         del st.session_state["user"]
+        if "auth_token" in st.session_state:
+            del st.session_state["auth_token"]
         if "monthly_budget" in st.session_state:
             del st.session_state["monthly_budget"]
         if "weekly_budget" in st.session_state:
             del st.session_state["weekly_budget"]
+        if "workspace" in st.session_state:
+            del st.session_state["workspace"]
         st.rerun()
 
 # ---------- 로그인 확인 및 앱 본문 시작 ----------
@@ -357,8 +130,76 @@ if "user" not in st.session_state:
     st.markdown("---")
     st.stop()
 
+import functools
+
+import pandas as pd
+import spending
+from analytics import week_key, week_start, format_week, weekly_trend, window_deltas, COUNT_METRICS
+
 username = st.session_state["user"]
-df = load_data(username)
+
+# ---------- 성능 측정 (디버그) ----------
+def record_timing(run):
+    """끝난 재실행 측정을 패널 목록에 넣고, 켜 두었으면 추적 파일에도 저장합니다."""
+    history = st.session_state.setdefault("timing_history", [])
+    history.append(run)
+    del history[:-TIMING_HISTORY]
+    if st.session_state.get("timing_trace"):
+        timing.append_trace(run)
+
+# 켜 두면 이번 재실행의 함수/구역별 시간을 모아 사이드바 아래 패널에 보여 줌
+timing_on = st.sidebar.checkbox("⏱️ 성능 측정 (디버그)", value=timing.TIMING_DEFAULT, key="timing_on")
+unfinished_run = st.session_state.pop("timing_run", None)
+if unfinished_run is not None: # 저장 후 st.rerun으로 끝까지 실행되지 않은 직전 재실행
+    record_timing(timing.finish_run(unfinished_run, interrupted=True))
+if timing_on:
+    st.session_state["timing_run"] = timing.start_run(username)
+
+# 이 세션이 화면에 쓰는 파생 상태 사본. 저장하면 사본도 제자리에서 고치므로 다시 읽지 않음
+ws = st.session_state.get("workspace")
+if ws is None or ws.username != username:
+    ws = st.session_state["workspace"] = engine.Workspace(username)
+
+
+# ---------- 부분 재실행 구역 ----------
+# 각 구역은 st.fragment라서 구역 안의 위젯은 그 구역만 다시 그림. 저장 버튼은 콜백에서
+# 저장한 뒤 바뀐 값을 보여 주는 구역만 key로 골라 다시 그림 (전체 스크립트를 다시 실행하지 않음)
+def section(key, label):
+    """부분 재실행 구역(key)을 만드는 데코레이터. 그리기 전에 다른 세션/기기의 변경을 확인합니다."""
+    def decorate(fn):
+        @st.fragment(key=key)
+        @functools.wraps(fn)
+        def run_section():
+            # 구역만 다시 그릴 때는 전체 재실행 측정이 없으므로 이 구역만 따로 기록
+            run = timing.start_run(f"{username} · {label}") if timing_on and timing.current_run() is None else None
+            try:
+                with timing.span(f"구역: {label}"):
+                    ws.sync()
+                    fn()
+            finally:
+                if run is not None:
+                    record_timing(timing.finish_run(run))
+        return run_section
+    return decorate
+
+def on_save(label, save):
+    """저장 버튼 콜백을 만듭니다. save()가 구역 key 목록을 반환하면 그 구역만 다시 그립니다."""
+    def callback():
+        run = timing.start_run(f"{username} · {label}") if timing_on else None
+        try:
+            keys = save()
+        finally:
+            if run is not None:
+                record_timing(timing.finish_run(run))
+        if keys:
+            st.rerun(keys)
+    return callback
+
+def show_flash(name):
+    """콜백에서 남긴 알림을 한 번 보여 줍니다. (콜백 안에서 그린 요소는 구역 밖에 그려지므로)"""
+    for kind, text in st.session_state.pop(name, []):
+        getattr(st, kind)(text)
+
 
 # 💰 글로벌: 월 예산 설정
 st.subheader("💰 나의 예산 설정")
@@ -366,35 +207,41 @@ st.subheader("💰 나의 예산 설정")
 # --- BUDGET LOADING LOGIC ---
 if "monthly_budget" not in st.session_state:
     # 1. Load from file (if exists), otherwise use default
-    initial_budget = load_user_budget(username)
+    initial_budget = engine.load_budget(username)
     # 2. Store in session state
     st.session_state["monthly_budget"] = initial_budget
     st.session_state["weekly_budget"] = initial_budget / 4
 # ----------------------------
 
+def save_budget():
+    month_budget_input = st.session_state["month_budget_input"]
+    if month_budget_input <= 0:
+        st.session_state["budget_flash"] = [("error", "예산은 0원보다 커야 합니다.")]
+        return None
+    # 3. Save to file AND session state on form submission
+    st.session_state["monthly_budget"] = month_budget_input
+    st.session_state["weekly_budget"] = month_budget_input / 4
+    engine.save_budget(username, month_budget_input) # 예산 저장
+    st.session_state["budget_flash"] = [(
+        "success", f"월 예산 저장 완료! 주간 예산은 **{int(st.session_state['weekly_budget']):,}원** 입니다."
+    )]
+    return ["budget", "dashboard"] # 주간 예산을 쓰는 대시보드만 함께 다시 그림
+
+@section("budget", "예산 설정")
+def budget_section():
+    with st.form("budget_form", clear_on_submit=False):
+        st.number_input(
+            "한 달 예산을 입력하세요 (원)",
+            min_value=0,
+            step=10000,
+            value=st.session_state["monthly_budget"],
+            key="month_budget_input"
+        )
 
-with st.form("budget_form", clear_on_submit=False):
-    month_budget_input = st.number_input(
-        "한 달 예산을 입력하세요 (원)",
-        min_value=0,
-        step=10000,
-        value=st.session_state["monthly_budget"],
-        key="month_budget_input"
-    )
-
-    budget_submitted = st.form_submit_button("월 예산 저장 및 주간 예산 계산")
-    
-    if budget_submitted:
-        if month_budget_input <= 0:
-            st.error("예산은 0원보다 커야 합니다.")
-        else:
-            # 3. Save to file AND session state on form submission
-            st.session_state["monthly_budget"] = month_budget_input
-            st.session_state["weekly_budget"] = month_budget_input / 4
-            save_user_budget(username, month_budget_input) # 예산 저장
-            st.success(
-                f"월 예산 저장 완료! 주간 예산은 **{int(st.session_state['weekly_budget']):,}원** 입니다."
-            )
+        st.form_submit_button("월 예산 저장 및 주간 예산 계산", on_click=on_save("예산 저장", save_budget))
+        show_flash("budget_flash")
+
+budget_section()
 st.markdown("---")
 st.header(f"안녕하세요, {username}님의 머니모니입니다.")
 
@@ -408,332 +255,399 @@ tab1, tab2, tab3 = st.tabs(["💸 지출 & 감정 기록", "📊 대시보드 &
 # ----------------------
 # 1️⃣ 지출 & 감정 기록 탭 (tab1)
 # ----------------------
-with tab1:
+def save_spending():
+    amount = st.session_state["spend_amount"]
+    if amount <= 0:
+        return None
+    had_records = engine.has_records(username, workspace=ws)
+    category = st.session_state["spend_category"]
+    # 세부 항목이 없으면 대분류로 대체
+    rec = engine.new_record(category, st.session_state["spend_detail"], amount, st.session_state["spend_planned"],
+                            st.session_state["spend_flashy"], st.session_state["spend_imitation"])
+
+    # 로그에 한 건만 추가 (전체 파일을 다시 쓰지 않음)
+    # 🔥 주간 예산 기반 과소비 체크: 오늘/이번 주 지출 누계(방금 저장한 기록 포함)를 한도 규칙과 비교
+    # 평소와 다른 지출(큰 금액, 하루 지출 급증, 반복되는 충동 시간대)은 대분류별 소비 통계와 비교
+    alerts, flags = engine.add_record(username, rec, st.session_state.get("weekly_budget", 0), workspace=ws)
+
+    flash = [("success", f"기록 저장 완료: {category} / {rec['세부항목']} / {int(amount):,}원")]
+    for alert in alerts:
+        target = alert["category"] or "전체"
+        period = spending.PERIOD_LABELS[alert["period"]]
+        flash.append(("error", f"⚠️ **{alert['name']}!** {period} {target} 지출이 **{int(alert['spent']):,}원**이에요."))
+        flash.append(("warning", f"허용 금액은 **{int(alert['limit']):,}원** 입니다. ({alert['desc']})"))
+    for flag in flags:
+        flash.append(("warning", f"🔎 **{flag['name']}** {flag['message']}"))
+    st.session_state["spend_flash"] = flash
+
+    # 새 기록은 30분 뒤에 감정 대기열에 나타나므로 감정 구역은 그대로 둠. 첫 기록이면 계획/장기 차트 구역도 보여 줌
+    # 몇 달치를 그리는 장기 차트는 저장할 때마다 다시 그리지 않고 다음 전체 재실행이나 기간 변경 때 갱신
+    return ["records", "dashboard", "badges"] + ([] if had_records else ["plan", "trends"])
+
+@section("records", "지출 기록")
+def records_section():
     st.subheader("1. 나의 지출 기록하기")
-    
+
     # 지출 기록 폼
     with st.form("spend_form", clear_on_submit=True):
         col1, col2 = st.columns([2,1])
         with col1:
-            category = st.selectbox("지출 대분류", CATEGORY_OPTIONS)
-            detail = st.text_input("세부 항목 (예: 버블티, 영화 티켓, 운동화 등)")
-            amount = st.number_input("지출 금액 (원)", min_value=0, value=0)
+            st.selectbox("지출 대분류", CATEGORY_OPTIONS, key="spend_category")
+            st.text_input("세부 항목 (예: 버블티, 영화 티켓, 운동화 등)", key="spend_detail")
+            st.number_input("지출 금액 (원)", min_value=0, value=0, key="spend_amount")
         with col2:
-            planned = st.radio("계획된 소비인가요?", ("예", "아니오"), horizontal=True)
-            flashy = st.radio("과시소비 여부", ("아니오", "예"), horizontal=True)
-            imitation = st.radio("모방 소비 여부", ("아니오", "예"), horizontal=True)
-        
-        submitted = st.form_submit_button("기록 저장")
-        
-        # 폼 제출 시 데이터 저장 및 과소비 체크
-        if submitted and amount > 0:
-            now = datetime.now()
-            rec = {
-                "id": str(uuid.uuid4()),
-                "날짜": now.strftime("%Y-%m-%d"),
-                "시간": now.strftime("%H:%M:%S"),
-                "datetime_iso": now,
-                "대분류": category,
-                "세부항목": detail if detail else category, # 세부 항목이 없으면 대분류로 대체
-                "금액": float(amount),
-                "계획됨": planned,
-                "과시소비": flashy,
-                "모방소비": imitation,
-                "감정": "",
-                "감정 이유": "" # 새로 추가된 필드는 초기값 비워둠
-            }
-            
-            # DataFrame 업데이트 및 저장
-            df_updated = pd.concat([df, pd.DataFrame([rec])], ignore_index=True)
-            save_data(df_updated, username)
-            
-            st.success(f"기록 저장 완료: {category} / {rec['세부항목']} / {int(amount):,}원")
-            
-            # 🔥 주간 예산 기반 과소비 체크
-            weekly_budget = st.session_state.get("weekly_budget", 0)
-            
-            if weekly_budget > 0:
-                # 당일 지출 합계 계산 (저장된 df_updated 사용)
-                today_date_str = now.strftime("%Y-%m-%d")
-                df_updated["datetime_iso"] = pd.to_datetime(df_updated["datetime_iso"]) # 비교를 위해 타입 변환
-                day_total = df_updated[df_updated["날짜"] == today_date_str]["금액"].sum()
-                
-                # 하루 허용 금액을 주간 예산의 30%로 설정 (임시 기준)
-                daily_overspend_limit = weekly_budget * 0.3 
-                
-                if day_total > daily_overspend_limit:
-                    st.error(f"⚠️ **과소비 발생!** 오늘 **{int(day_total):,}원**을 사용했어요.")
-                    st.warning(f"하루 허용 금액은 **{int(daily_overspend_limit):,}원** 입니다. (주간 예산의 30%)")
-
-            st.rerun() # 변경된 데이터로 화면 새로고침
+            st.radio("계획된 소비인가요?", ("예", "아니오"), horizontal=True, key="spend_planned")
+            st.radio("과시소비 여부", ("아니오", "예"), horizontal=True, key="spend_flashy")
+            st.radio("모방 소비 여부", ("아니오", "예"), horizontal=True, key="spend_imitation")
+
+        # 폼 제출 시 데이터 저장 및 과소비 체크 (콜백에서 처리)
+        st.form_submit_button("기록 저장", on_click=on_save("기록 저장", save_spending))
+    show_flash("spend_flash")
 
     st.markdown("---")
     st.subheader("최근 기록")
-    df = load_data(username) # 저장 후 데이터 다시 로드
-    if not df.empty:
+    # 전체 기록을 정렬하지 않고 따로 보관 중인 최근 기록 목록에서 꺼냄
+    df_recent = engine.recent_records(username, RECENT_ROWS, workspace=ws)
+    if not df_recent.empty:
         # '감정 이유' 컬럼을 추가하여 표시
-        display_cols = ['날짜', '시간', '대분류', '세부항목', '금액', '계획됨', '과시소비', '모방소비', '감정', '감정 이유'] 
+        display_cols = ['날짜', '시간', '대분류', '세부항목', '금액', '계획됨', '과시소비', '모방소비', '감정', '감정 이유']
         # 최신 기록 10건만 표시
-        st.dataframe(df.sort_values("datetime_iso", ascending=False)[display_cols].head(10)) 
+        st.dataframe(df_recent[display_cols])
     else:
         st.write("기록이 없습니다.")
-    
-    st.markdown("---")
 
+def save_emotions():
+    choices = st.session_state.get("emotion_page_rows", {})
+    updates = [
+        (record_id, {"감정": st.session_state[f"emo_radio_{record_id}"], "감정 이유": st.session_state[f"reason_input_{record_id}"]}, before)
+        for record_id, before in choices.items()
+        if st.session_state.get(f"emo_radio_{record_id}", "나중에") != "나중에"
+    ]
+    if not updates:
+        st.session_state["emotion_flash"] = [("info", "감정을 선택한 항목이 없습니다.")]
+        return None
+    # 감정 및 감정 이유 모두 저장 (수정 내용만 로그에 한 번에 추가)
+    engine.rate_emotions(username, updates, workspace=ws)
+    st.session_state["emotion_flash"] = [("toast", f"✅ 감정 기록 {len(updates)}건이 저장되었습니다.")]
+    return ["records", "emotions", "dashboard", "badges"] # 최근 기록의 감정 칸, 감정 통계, 감정 뱃지
+
+@section("emotions", "감정 기록")
+def emotions_section():
     # 2️⃣ 소비 감정 기록 (30분 대기 시간)
     st.subheader("2. 소비 후 감정 기록")
     st.caption("소비 후 30분 뒤부터 해당 지출에 대한 감정을 기록할 수 있어요.")
-    
-    now = datetime.now()
-    # 지출 후 30분 이상 경과했고 감정 기록이 없는 항목만 필터링
-    # NaT 값은 비교가 불가능하므로 제외 (pd.notna로 유효한 값만 포함)
-    df_pending = df[pd.notna(df["datetime_iso"]) & 
-                    (df["감정"].isnull() | (df["감정"] == "")) & 
-                    (df["datetime_iso"] <= now - timedelta(minutes=30))]
-    
-    if df_pending.empty:
+    show_flash("emotion_flash")
+
+    # 감정이 비어 있는 기록의 대기열에서 30분이 지난 항목만 꺼냄 (전체 기록을 필터링하지 않음)
+    pending_entries = engine.pending_entries(username, workspace=ws)
+
+    if not pending_entries:
         st.info("감정 입력 가능한 항목이 없습니다.")
-    else:
-        st.warning(f"총 {len(df_pending)}건의 감정 기록이 필요합니다. 마음을 들여다봐요!")
-        for idx, row in df_pending.iterrows():
-            with st.expander(f"💰 {row['날짜']} {row['시간']} | {row['대분류']} / {row['세부항목']} • {int(row['금액']):,}원"):
+        return
+    st.warning(f"총 {len(pending_entries)}건의 감정 기록이 필요합니다. 마음을 들여다봐요!")
+    hidden = engine.hidden_pending_count(username, workspace=ws)
+    if hidden:
+        st.caption(f"이보다 오래된 기록 {hidden:,}건도 감정을 기다리고 있어요. 목록의 감정을 남기면 이어서 나타나요.")
+
+    # 한 번에 EMOTION_PAGE_SIZE건씩만 그림
+    page_count = (len(pending_entries) - 1) // EMOTION_PAGE_SIZE + 1
+    page = 1
+    if page_count > 1:
+        page = st.number_input(f"페이지 (총 {page_count}쪽)", min_value=1, max_value=page_count, value=1, key="emotion_page")
+    page_entries = pending_entries[(page - 1) * EMOTION_PAGE_SIZE : page * EMOTION_PAGE_SIZE]
+    # 대기열이 시각 순이므로 id 순서 그대로. 항목의 시각으로 그 달의 기록만 읽음
+    df_page = engine.get_records(username, [record_id for _, record_id in page_entries],
+                                 times=[at for at, _ in page_entries])
+
+    # 이 페이지의 감정을 한 번에 입력하고 한 번의 쓰기로 저장
+    with st.form("emotion_bulk_form", clear_on_submit=True):
+        choices = {}
+        with timing.span("감정 입력 위젯"):
+            for _, row in df_page.iterrows():
+                st.markdown(f"**💰 {row['날짜']} {row['시간']} | {row['대분류']} / {row['세부항목']} • {int(row['금액']):,}원**")
                 # 감정 선택
-                emo_choice = st.radio(f"이 소비에 대한 당신의 감정은? (ID {row['id'][:4]}...)", 
-                                     ("좋음", "보통", "나쁨"), 
-                                     key=f"emo_radio_{row['id']}")
-                
+                st.radio(f"이 소비에 대한 당신의 감정은? (ID {row['id'][:4]}...)",
+                         ("나중에", "좋음", "보통", "나쁨"),
+                         horizontal=True,
+                         key=f"emo_radio_{row['id']}")
+
                 # 감정 이유 입력 필드 추가
-                reason_input = st.text_area(
+                st.text_input(
                     "왜 이러한 감정이 들었는지 자세히 적어보세요.",
-                    value=row.get('감정 이유', ''), # 기존 값이 있으면 불러오기
+                    value="" if pd.isnull(row.get('감정 이유')) else row.get('감정 이유'), # 기존 값이 있으면 불러오기
                     key=f"reason_input_{row['id']}",
-                    height=50
                 )
-                
-                if st.button("감정 저장 및 반영", key=f"saveemo_btn_{row['id']}"):
-                    # 감정 및 감정 이유 모두 저장
-                    df.loc[df["id"] == row["id"], "감정"] = emo_choice
-                    df.loc[df["id"] == row["id"], "감정 이유"] = reason_input
-                    save_data(df, username)
-                    st.toast("✅ 감정 기록이 저장되었습니다. 화면을 새로고침합니다.")
-                    st.rerun()
+                choices[row["id"]] = row.to_dict() # 수정 전 기록 (파생 상태 갱신용)
+        st.session_state["emotion_page_rows"] = choices # 저장 콜백이 읽음
+
+        st.form_submit_button("감정 저장 및 반영", on_click=on_save("감정 저장", save_emotions))
+
+with tab1, timing.span("탭1: 지출 & 감정 기록"):
+    records_section()
+    st.markdown("---")
+    emotions_section()
 
 
 # ----------------------
 # 2️⃣ 대시보드 & 진단 탭 (tab2)
 # ----------------------
-with tab2:
+@section("dashboard", "대시보드")
+def dashboard_section():
     st.header("📊 나의 소비 분석 대시보드")
-    
-    if df.empty:
+
+    if not engine.has_records(username, workspace=ws):
         st.info("먼저 '지출 & 감정 기록' 탭에서 지출 기록을 시작해주세요.")
-    else:
-        # 3️⃣ 개인 대시보드
-        st.subheader("3. 주간 소비 현황")
-        
-        # 주차 계산을 위한 기본 변수 설정
-        df["year_week"] = df["datetime_iso"].apply(lambda x: week_key(x))
-        
-        # 🚨 수정 4-1: NaT로 인해 (0, 0)으로 설정된 행을 분석에서 제외
-        df_cleaned = df[df["year_week"] != (0, 0)].copy() 
-        
-        if df_cleaned.empty:
-            st.info("유효한 날짜가 포함된 기록이 없어 주간 분석을 할 수 없습니다.")
-        else:
-            # pandas Timestamp 대신 datetime.now() 사용
-            today = datetime.now() 
-            cur_week = week_key(today)
-            weekly_budget = st.session_state["weekly_budget"]
-            
-            # 🚨 수정 4-2: weeks 리스트도 df_cleaned를 기반으로 생성
-            weeks = sorted(df_cleaned["year_week"].unique(), reverse=True)
-            
-            if weeks:
-                sel = st.selectbox("분석 주차 선택", options=weeks, format_func=lambda x: f"{x[0]}년 {x[1]}주차", key="dashboard_week_select")
-                df_week = df_cleaned[df_cleaned["year_week"]==sel] # df_cleaned 사용
-                
-                # 주간 총 지출
-                total_spent_week = df_week['금액'].sum()
-                
-                st.metric("설정된 주간 예산", f"{int(weekly_budget):,}원")
-                # 예산 대비 사용률 계산 시 weekly_budget이 0이 아닌지 확인
-                usage_percent = (total_spent_week / weekly_budget * 100) if weekly_budget > 0 else 0
-                st.metric("선택 주차 총 지출", f"{int(total_spent_week):,}원", 
-                          delta_color="inverse", 
-                          delta=f"예산 대비 {usage_percent:.1f}% 사용")
-                
-                # 주간 카테고리별 지출
-                category_spending = df_week.groupby('대분류')['금액'].sum().sort_values(ascending=False)
-                st.write("---")
-                st.markdown("##### 카테고리별 지출 분포")
-                st.bar_chart(category_spending)
-                st.dataframe(category_spending.to_frame(name="금액"))
-
-                # 🚨 개선된 기능: 일별 지출 추이 (Line Chart)
-                st.markdown("---")
-                st.markdown("##### 📈 일별 지출 추이")
-                
-                # 날짜별 지출 합계 계산
-                daily_spending = df_week.groupby('날짜')['금액'].sum().reset_index()
-                daily_spending.rename(columns={'금액': '일별 총 지출'}, inplace=True)
-                
-                # 날짜를 인덱스로 설정하여 Streamlit 차트가 인식하도록 준비
-                daily_spending['날짜'] = pd.to_datetime(daily_spending['날짜'])
-                daily_spending.set_index('날짜', inplace=True)
-                
-                st.line_chart(daily_spending)
-                st.dataframe(daily_spending)
-
-            st.markdown("---")
-            
-            # 🚨 NEW FEATURE: 가장 큰 소비 카테고리 경고
-            df_current_week_warning = df_cleaned[df_cleaned["year_week"] == cur_week] # df_cleaned 사용
-            
-            if not df_current_week_warning.empty:
-                # 카테고리별 지출 합계 계산
-                category_sums = df_current_week_warning.groupby('대분류')['금액'].sum()
-                
-                if not category_sums.empty:
-                    highest_category = category_sums.idxmax()
-                    
-                    # 경고 메시지 출력
-                    st.error(
-                        f"🚨 **주간 소비 경고!** 현재까지 **{highest_category}**에 가장 많은 소비를 하고 있어요!! 자제하세요!!"
-                    )
-
-            # 4️⃣ 나의 소비 돌아보기 (주간 진단)
-            st.subheader("4. 나의 주간 소비 진단")
-            
-            prev_week_dt = today - timedelta(days=7) # 지난 주 날짜 계산
-            prev_week = week_key(prev_week_dt)
-
-            def week_stats(df_all, yw, budget):
-                """주간 통계를 계산합니다."""
-                # df_all은 이미 year_week 컬럼으로 필터링 가능하도록 준비됨
-                dfw = df_all[df_all["year_week"]==yw].copy()
-                
-                total_amount = dfw["금액"].sum() if not dfw.empty else 0
-                
-                # 예산이 0보다 커야 초과 여부를 판단
-                budget_status = "🚨 초과" if total_amount > budget and budget > 0 else "✅ 적정" 
-                
-                impulse_count = dfw[dfw["계획됨"]=="아니오"].shape[0] if not dfw.empty else 0
-                flashy_count = dfw[dfw["과시소비"]=="예"].shape[0] if not dfw.empty else 0
-                imitation_count = dfw[dfw["모방소비"]=="예"].shape[0] if not dfw.empty else 0
-                
-                emo_mode = None
-                if not dfw.empty:
-                    # 감정 기록이 있는 데이터만 필터링
-                    df_emotion = dfw[dfw["감정"].isin(["좋음", "보통", "나쁨"])]
-                    if not df_emotion.empty:
-                        mode_series = df_emotion["감정"].mode()
-                        if not mode_series.empty:
-                            emo_mode = mode_series.iloc[0]
-
-                return {
-                    "총 지출": int(total_amount),
-                    "예산 초과 여부": budget_status,
-                    "충동 구매 횟수": impulse_count,
-                    "과시 소비 횟수": flashy_count,
-                    "모방 소비 횟수": imitation_count, 
-                    "가장 많은 소비 감정": emo_mode if emo_mode else "기록 부족"
-                }
-
-            # 🚨 수정 4-3: week_stats 호출 시 df_cleaned를 인자로 전달
-            cur_stats = week_stats(df_cleaned, cur_week, weekly_budget)
-            prev_stats = week_stats(df_cleaned, prev_week, weekly_budget)
-
-            st.markdown(f"##### ✨ 이번 주 ({cur_week[0]}년 {cur_week[1]}주차) 진단 결과")
-            col_c1, col_c2, col_c3, col_c4 = st.columns(4)
-            
-            # 델타 계산 및 표시
-            delta_impulse = cur_stats['충동 구매 횟수'] - prev_stats['충동 구매 횟수']
-            delta_flashy = cur_stats['과시 소비 횟수'] - prev_stats['과시 소비 횟수']
-            delta_imitation = cur_stats['모방 소비 횟수'] - prev_stats['모방 소비 횟수']
-
-            col_c1.metric("총 지출", f"{cur_stats['총 지출']:,}원", delta=f"{cur_stats['예산 초과 여부']}")
-            col_c2.metric("충동 구매", f"{cur_stats['충동 구매 횟수']}건", delta=f"{delta_impulse}건 (지난 주 대비)", delta_color="inverse")
-            col_c3.metric("과시 소비", f"{cur_stats['과시 소비 횟수']}건", delta=f"{delta_flashy}건 (지난 주 대비)", delta_color="inverse")
-            col_c4.metric("모방 소비", f"{cur_stats['모방 소비 횟수']}건", delta=f"{delta_imitation}건 (지난 주 대비)", delta_color="inverse")
-
-            st.info(f"이번 주 소비 시 가장 자주 느낀 감정은 **{cur_stats['가장 많은 소비 감정']}** 이에요. 감정 기록과 지출 내역을 비교해보세요!")
-            
-            # 5️⃣ 소비 계획 세우기
-            st.markdown("---")
-            st.subheader("5. 📅 소비 계획 및 성찰")
-
-            # 기존 계획 로드
-            current_reflection, current_plan = load_plan(username)
-
-            with st.form("spending_plan_form", clear_on_submit=False):
-                st.markdown("##### 이번 주 소비 성찰 (반성/만족)")
-                reflection_input = st.text_area(
-                    "이번주의 소비는... (직접 입력)",
-                    value=current_reflection,
-                    height=100,
-                    key="reflection_input"
-                )
+        return
+    # 3️⃣ 개인 대시보드
+    st.subheader("3. 주간 소비 현황")
+
+    # 원본 기록 대신 일 × 카테고리 롤업을 사용 (기록 추가/수정 시 세션 사본이 함께 갱신됨)
+    # 🚨 수정 4-1: 날짜가 없는(NaT) 기록은 롤업에 포함되지 않음
+    df_rollup = engine.rollup_frame(username, workspace=ws)
+
+    if df_rollup.empty:
+        st.info("유효한 날짜가 포함된 기록이 없어 주간 분석을 할 수 없습니다.")
+        return
+    # pandas Timestamp 대신 datetime.now() 사용
+    today = datetime.now()
+    cur_week = week_key(today)
+    weekly_budget = st.session_state["weekly_budget"]
+
+    # 🚨 수정 4-2: 주차 목록은 기록을 훑지 않고 파티션 정보에서 가져옴 (최신 주가 먼저)
+    weeks = engine.record_weeks(username)[::-1]
+
+    if weeks:
+        sel = st.selectbox("분석 주차 선택", options=weeks, format_func=format_week, key="dashboard_week_select")
+        # 캐시된 일 × 대분류 표에서 선택한 주의 7일만 잘라 씀 (주차를 바꿔도 다시 집계하지 않음)
+        week_from = week_start(sel)
+        df_week = engine.spending_pivot(username, workspace=ws).loc[week_from : week_from + timedelta(days=6)]
+
+        # 주간 총 지출
+        total_spent_week = df_week.to_numpy().sum()
+
+        st.metric("설정된 주간 예산", f"{int(weekly_budget):,}원")
+        # 예산 대비 사용률 계산 시 weekly_budget이 0이 아닌지 확인
+        usage_percent = (total_spent_week / weekly_budget * 100) if weekly_budget > 0 else 0
+        st.metric("선택 주차 총 지출", f"{int(total_spent_week):,}원",
+                  delta_color="inverse",
+                  delta=f"예산 대비 {usage_percent:.1f}% 사용")
+
+        # 주간 카테고리별 지출
+        category_spending = df_week.sum().loc[lambda totals: totals > 0].sort_values(ascending=False)
+        st.write("---")
+        st.markdown("##### 카테고리별 지출 분포")
+        with timing.span("차트: 카테고리별 지출"):
+            st.bar_chart(category_spending)
+            st.dataframe(category_spending.to_frame(name="금액"))
+
+        # 🚨 개선된 기능: 일별 지출 추이 (Line Chart)
+        st.markdown("---")
+        st.markdown("##### 📈 일별 지출 추이")
+
+        # 날짜별 지출 합계 계산 (지출이 없는 날도 0으로 포함)
+        daily_spending = df_week.sum(axis=1).to_frame(name='일별 총 지출')
+
+        with timing.span("차트: 일별 지출"):
+            st.line_chart(daily_spending)
+            st.dataframe(daily_spending)
+
+        with st.expander("선택 주차의 지출 내역"):
+            # 선택한 주와 겹치는 달의 기록만 읽고, 기록이 바뀔 때까지 캐시된 것을 씀
+            df_week_records = engine.week_records(username, sel)
+            st.dataframe(df_week_records[['날짜', '시간', '대분류', '세부항목', '금액', '계획됨', '과시소비', '모방소비', '감정', '감정 이유']])
 
-                st.markdown("##### 다음 주 소비 계획 (목표/실천 항목)")
-                plan_input = st.text_area(
-                    "다음주의 소비는... (직접 입력)",
-                    value=current_plan,
-                    height=100,
-                    key="plan_input"
-                )
-                
-                plan_submitted = st.form_submit_button("성찰 및 계획 저장")
+    st.markdown("---")
+
+    # 🚨 NEW FEATURE: 가장 큰 소비 카테고리 경고
+    df_current_week_warning = df_rollup[df_rollup["year_week"] == cur_week]
+
+    if not df_current_week_warning.empty:
+        # 카테고리별 지출 합계 계산
+        category_sums = df_current_week_warning.groupby('대분류')['금액'].sum()
+
+        if not category_sums.empty:
+            highest_category = category_sums.idxmax()
+
+            # 경고 메시지 출력
+            st.error(
+                f"🚨 **주간 소비 경고!** 현재까지 **{highest_category}**에 가장 많은 소비를 하고 있어요!! 자제하세요!!"
+            )
 
-                if plan_submitted:
-                    save_plan(username, reflection_input, plan_input)
-                    st.success("소비 성찰 및 다음 주 계획이 저장되었습니다.")
-                    st.rerun()
+    # 🚨 되풀이되는 충동 소비 시간대 경고 (대분류별 소비 통계에서 바로 꺼냄, 기록을 다시 집계하지 않음)
+    patterns = engine.impulse_patterns(username, workspace=ws)
+    if patterns:
+        habits = ", ".join(f"**{hour}시대 {category}** ({count}번)" for category, hour, count in patterns[:3])
+        st.error(f"🚨 **충동 소비 습관 경고!** 계획 없이 같은 시간대에 반복해서 쓰고 있어요: {habits}")
+
+    # 4️⃣ 나의 소비 돌아보기 (주간 진단)
+    st.subheader("4. 나의 주간 소비 진단")
+
+    # 모든 주차의 지표를 한 번에 계산하고 이번 주/지난 주 값을 꺼냄 (주차별로 다시 필터링하지 않음)
+    report = engine.weekly_report(username, weekly_budget, now=today, df_rollup=df_rollup)
+    stats_table = report["stats_table"]
+    cur_stats, prev_stats = report["current"], report["previous"]
+
+    st.markdown(f"##### ✨ 이번 주 ({format_week(cur_week)}) 진단 결과")
+    col_c1, col_c2, col_c3, col_c4 = st.columns(4)
+
+    # 델타 계산 및 표시
+    delta_impulse = cur_stats['충동 구매 횟수'] - prev_stats['충동 구매 횟수']
+    delta_flashy = cur_stats['과시 소비 횟수'] - prev_stats['과시 소비 횟수']
+    delta_imitation = cur_stats['모방 소비 횟수'] - prev_stats['모방 소비 횟수']
+
+    col_c1.metric("총 지출", f"{cur_stats['총 지출']:,}원", delta=f"{cur_stats['예산 초과 여부']}")
+    col_c2.metric("충동 구매", f"{cur_stats['충동 구매 횟수']}건", delta=f"{delta_impulse}건 (지난 주 대비)", delta_color="inverse")
+    col_c3.metric("과시 소비", f"{cur_stats['과시 소비 횟수']}건", delta=f"{delta_flashy}건 (지난 주 대비)", delta_color="inverse")
+    col_c4.metric("모방 소비", f"{cur_stats['모방 소비 횟수']}건", delta=f"{delta_imitation}건 (지난 주 대비)", delta_color="inverse")
+
+    st.info(f"이번 주 소비 시 가장 자주 느낀 감정은 **{cur_stats['가장 많은 소비 감정']}** 이에요. 감정 기록과 지출 내역을 비교해보세요!")
+
+    # 📉 여러 주 추세 (최근 N주 vs 그 이전 N주)
+    st.markdown("##### 📉 주간 소비 추세")
+    trend_weeks = st.selectbox("기간", [4, 12, 52], format_func=lambda n: f"최근 {n}주", key="trend_window_select")
+    trend = weekly_trend(stats_table, cur_week, trend_weeks)
+    trend.index = [format_week(w) for w in trend.index]
+    with timing.span("차트: 주간 추세"):
+        st.line_chart(trend["총 지출"])
+        st.line_chart(trend[COUNT_METRICS])
+
+    window = window_deltas(stats_table, cur_week, trend_weeks)
+    trend_cols = st.columns(len(window))
+    for col, (name, (value, delta)) in zip(trend_cols, window.items()):
+        unit = "원" if name == "총 지출" else "건"
+        col.metric(f"최근 {trend_weeks}주 {name}", f"{value:,}{unit}",
+                   delta=f"{delta:,}{unit} (이전 {trend_weeks}주 대비)", delta_color="inverse")
+
+def save_plan():
+    # 이번 주 주차 키로 저장하므로 지난 주차의 성찰/계획은 그대로 남음
+    engine.save_plan(username, st.session_state["reflection_input"], st.session_state["plan_input"])
+    st.session_state["plan_flash"] = [("success", "소비 성찰 및 다음 주 계획이 저장되었습니다.")]
+    return ["plan"] # 다른 구역은 계획을 쓰지 않음
+
+@section("plan", "소비 계획")
+def plan_section():
+    if not engine.has_records(username, workspace=ws):
+        return
+    # 5️⃣ 소비 계획 세우기
+    st.markdown("---")
+    st.subheader("5. 📅 소비 계획 및 성찰")
+
+    # 이번 주 성찰/계획과 지난주에 세운 계획 로드 (프로필 한 번 읽기, 주차 키로 바로 찾음)
+    this_week = week_key(datetime.now())
+    current_reflection, current_plan = engine.load_plan(username, this_week)
+    last_plan = engine.load_plan(username, week_key(datetime.now() - timedelta(days=7)))[1]
+    if last_plan:
+        st.info(f"**지난주에 세운 이번 주 계획**\n\n{last_plan}")
+
+    with st.form("spending_plan_form", clear_on_submit=False):
+        st.markdown("##### 이번 주 소비 성찰 (반성/만족)")
+        st.text_area(
+            "이번주의 소비는... (직접 입력)",
+            value=current_reflection,
+            height=100,
+            key="reflection_input"
+        )
+
+        st.markdown("##### 다음 주 소비 계획 (목표/실천 항목)")
+        st.text_area(
+            "다음주의 소비는... (직접 입력)",
+            value=current_plan,
+            height=100,
+            key="plan_input"
+        )
+
+        st.form_submit_button("성찰 및 계획 저장", on_click=on_save("계획 저장", save_plan))
+        show_flash("plan_flash")
+
+    past_weeks = [w for w in engine.plan_weeks(username) if w != this_week]
+    if past_weeks:
+        with st.expander("📚 지난 성찰 및 계획 보기"):
+            week = st.selectbox("주차", past_weeks, format_func=format_week, key="past_plan_week")
+            reflection, plan = engine.load_plan(username, week)
+            st.markdown(f"**성찰**\n\n{reflection or '(없음)'}")
+            st.markdown(f"**계획**\n\n{plan or '(없음)'}")
+
+@section("trends", "장기 소비 차트")
+def trends_section():
+    if not engine.has_records(username, workspace=ws):
+        return
+    st.markdown("---")
+    st.subheader("📅 장기 소비 현황")
+    months = st.radio("기간", LONG_RANGE_MONTHS, horizontal=True, key="long_range_months",
+                      format_func=lambda n: "전체" if n == 0 else f"최근 {n}개월")
+    # 그림은 (사용자, 기록 버전, 기간)별로 캐시되므로 기간을 다시 고르면 바로 보여 줌
+    charts = engine.long_range_charts(username, months, workspace=ws)
+    if charts is None:
+        st.info("유효한 날짜가 포함된 기록이 없어 장기 차트를 그릴 수 없습니다.")
+        return
+    heatmap, trend, unit = charts
+    st.markdown("##### 🗓️ 날짜별 지출 달력")
+    st.image(heatmap, width="stretch")
+    st.markdown(f"##### 📊 대분류별 지출 추이 ({unit} 단위)")
+    st.image(trend, width="stretch")
+
+with tab2, timing.span("탭2: 대시보드 & 진단"):
+    dashboard_section()
+    trends_section()
+    plan_section()
 
 
 # ----------------------
 # 3️⃣ 미션 & 보상 탭 (tab3)
 # ----------------------
-with tab3:
+@section("badges", "미션 & 보상")
+def badges_section():
     st.header("🎁 미션 & 보상")
     st.markdown("건전한 소비 습관을 위한 미션을 달성하고 뱃지를 모아봐요!")
 
-    if df.empty:
+    if not engine.has_records(username, workspace=ws):
         st.info("지출 기록을 시작하면 뱃지 현황을 확인할 수 있어요.")
-    else:
-        # 뱃지 조건 리스트
-        badge_list = [
-            {"name": "첫 기록", "condition": lambda df: len(df) >= 1, "target": 1, "desc": "첫 지출 기록 달성"},
-            {"name": "꾸준한 기록", "condition": lambda df: len(df) >= 7, "target": 7, "desc": "7건 이상 기록 달성"},
-            {"name": "감정 성찰왕", "condition": lambda df: df["감정"].isin(["좋음", "보통", "나쁨"]).sum() >= 10, "target": 10, "desc": "10건 이상의 감정 기록 완료"},
-            {"name": "계획 부자", "condition": lambda df: df[df["계획됨"] == "예"].shape[0] >= 15, "target": 15, "desc": "계획된 소비 15건 달성"},
-            {"name": "절약 영웅", "condition": lambda df: df[(df["계획됨"] == "예") & (df["과시소비"] == "아니오")].shape[0] >= 20, "target": 20, "desc": "합리적 소비 20건 달성"}
-        ]
-        
-        st.markdown("##### 🏆 나의 뱃지 현황")
-        cols = st.columns(len(badge_list))
-        
-        for i, badge in enumerate(badge_list):
-            current_count = 0
-            
-            # 조건에 따른 현재 카운트 계산
-            if badge['name'] == "첫 기록" or badge['name'] == "꾸준한 기록":
-                current_count = len(df)
-            elif badge['name'] == "감정 성찰왕":
-                # 감정 필드에서 유효한 값의 개수를 정확히 세도록 수정
-                current_count = df[df["감정"].isin(["좋음", "보통", "나쁨"])].shape[0]
-            elif badge['name'] == "계획 부자":
-                current_count = df[df["계획됨"] == "예"].shape[0]
-            elif badge['name'] == "절약 영웅":
-                current_count = df[(df["계획됨"] == "예") & (df["과시소비"] == "아니오")].shape[0]
-            
-            earned = current_count >= badge['target']
-            
-            status_text = "✅ 획득 완료" if earned else f"❌ 미획득 ({current_count}/{badge['target']}회)"
-            status_color = "green" if earned else "red"
-
-            badge_icon = "✨" if earned else "🔒" 
-            
-            with cols[i]:
-                st.markdown(f"**{badge_icon} {badge['name']}**", unsafe_allow_html=True)
-                st.caption(f"_{badge['desc']}_")
-                st.markdown(f"**<span style='color:{status_color}; font-weight:bold;'>{status_text}</span>**", unsafe_allow_html=True)
+        return
+    # 뱃지/미션 진행 카운터는 기록 추가/감정 저장 때마다 갱신되어 저장되어 있음
+    badge_list, mission_list = engine.badge_report(username, workspace=ws)
+
+    st.markdown("##### 🏆 나의 뱃지 현황")
+    cols = st.columns(len(badge_list))
+
+    for i, badge in enumerate(badge_list):
+        current_count = badge['progress']
+        earned = badge['earned']
+
+        status_text = "✅ 획득 완료" if earned else f"❌ 미획득 ({current_count}/{badge['target']}회)"
+        status_color = "green" if earned else "red"
+
+        badge_icon = "✨" if earned else "🔒"
+
+        with cols[i]:
+            st.markdown(f"**{badge_icon} {badge['name']}**", unsafe_allow_html=True)
+            st.caption(f"_{badge['desc']}_")
+            st.markdown(f"**<span style='color:{status_color}; font-weight:bold;'>{status_text}</span>**", unsafe_allow_html=True)
+
+    # 기간 미션 (예: 7일 동안 과시소비 0건)
+    st.markdown("##### ⏱️ 기간 미션")
+    for mission in mission_list:
+        unit = "일" if mission['type'] == "streak" else "건"
+        icon = "✨" if mission['earned'] else "⏳"
+        st.markdown(f"**{icon} {mission['name']}** — _{mission['desc']}_")
+        st.progress(min(mission['progress'] / mission['goal'], 1.0),
+                    text=f"{mission['progress']}/{mission['goal']}{unit}")
+
+with tab3, timing.span("탭3: 미션 & 보상"):
+    badges_section()
+
+
+# ----------------------
+# ⏱️ 성능 측정 패널 (사이드바)
+# ----------------------
+if timing_on:
+    record_timing(timing.finish_run(st.session_state.pop("timing_run")))
+    with st.sidebar.expander("⏱️ 재실행별 구간 시간", expanded=True):
+        runs = st.session_state["timing_history"][::-1] # 최근 재실행이 먼저
+        run = st.selectbox(
+            "재실행", runs, key="timing_run_select",
+            format_func=lambda r: f"{r.started:%H:%M:%S} · {r.wall_ms:,.0f} ms" + (" (저장 후 중단)" if r.interrupted else ""),
+        )
+        st.caption("구역 시간에는 그 안에서 부른 함수 시간이 포함됩니다. 로그인 화면은 측정하지 않습니다.")
+        st.dataframe(pd.DataFrame(timing.summarize(run)), hide_index=True)
+        st.checkbox(f"추적 파일에 저장 ({timing.TRACE_FILE})", key="timing_trace",
+                    help="재실행마다 구간 목록을 JSON 한 줄로 덧붙입니다. `python timing.py`로 요약할 수 있어요.")
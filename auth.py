@@ -0,0 +1,209 @@
+"""비밀번호 해시/검증, 로그인 시도 제한, 세션 토큰.
+
+bcrypt 연산은 크기가 정해진 작업자 풀에서 실행합니다. bcrypt는 계산 중 GIL을
+놓기 때문에 여러 세션의 로그인이 몰려도 코어 수만큼 병렬로 처리되고,
+동시에 도는 bcrypt 작업 수가 풀 크기로 제한되어 서버 전체가 멈추지 않습니다.
+앱의 로그인은 start_login으로 검증을 풀에 넣고 Future를 세션에 보관한 채 바로
+돌아가며, 검증이 끝나면 finish_login으로 결과를 시도 제한에 반영합니다. 결과를
+기다리는 hash_password/check_password/verify_login은 CLI와 벤치마크용입니다.
+
+한 번 로그인에 성공하면 HMAC 서명 세션 토큰을 발급하므로, 이후 재실행에서는
+bcrypt를 다시 돌리지 않고 토큰만 확인합니다. 토큰은 SESSION_TOKEN_TTL_SECONDS(기본 30분)
+뒤에 만료되며, 앱은 재실행마다 토큰을 다시 발급하므로 쓰는 동안에는 만료 시각이 뒤로 밀립니다.
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import bcrypt
+
+# ---------- 설정 ----------
+BCRYPT_ROUNDS = int(os.environ.get("MONEYMONI_BCRYPT_ROUNDS", "12")) # bcrypt 비용(cost) 값
+AUTH_WORKERS = int(os.environ.get("MONEYMONI_AUTH_WORKERS", str(os.cpu_count() or 2))) # bcrypt 작업자 수
+AUTH_TIMEOUT_SECONDS = 30 # 풀이 밀려 있을 때 기다리는 최대 시간
+
+MAX_ATTEMPTS_PER_USER = 5 # 아이디별 허용 실패 횟수 (ATTEMPT_WINDOW_SECONDS 동안)
+MAX_ATTEMPTS_PER_IP = 50 # IP별 허용 실패 횟수 (학교에서는 여러 학생이 같은 IP를 씀)
+ATTEMPT_WINDOW_SECONDS = 5 * 60
+LIMITER_SWEEP_KEYS = 1024 # 실패 기록이 있는 키가 이만큼 쌓이면 기간이 지난 키를 한 번에 지움
+
+# 세션 토큰 유효 시간. 토큰은 되돌릴 수 없으므로 짧게 두고, 쓰는 동안은 재실행마다 다시 발급해 늘림
+SESSION_TOKEN_TTL_SECONDS = int(os.environ.get("MONEYMONI_SESSION_MINUTES", "30")) * 60
+# 여러 프로세스가 같은 토큰을 인정해야 하면 MONEYMONI_SECRET을 지정
+_SECRET = os.environ.get("MONEYMONI_SECRET", "").encode() or secrets.token_bytes(32)
+
+_pool = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="bcrypt")
+
+def set_workers(workers):
+    """bcrypt 작업자 풀 크기를 바꿉니다. (벤치마크, 배치 작업용)"""
+    global _pool
+    old, _pool = _pool, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    old.shutdown(wait=True)
+
+
+# ---------- 해시 / 검증 ----------
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+def _check(password, hashed):
+    try:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+    except Exception:
+        return False
+
+def hash_password_async(password, rounds=None):
+    """작업자 풀에 해시 작업을 넣고 Future를 반환합니다."""
+    return _pool.submit(_hash, password, rounds or BCRYPT_ROUNDS)
+
+def check_password_async(password, hashed):
+    """작업자 풀에 검증 작업을 넣고 Future를 반환합니다."""
+    return _pool.submit(_check, password, hashed)
+
+def hash_password(password, rounds=None):
+    """비밀번호를 해시합니다. (결과를 기다림)"""
+    return hash_password_async(password, rounds).result(timeout=AUTH_TIMEOUT_SECONDS)
+
+def check_password(password, hashed):
+    """비밀번호와 해시값을 비교하여 일치하는지 확인합니다. (결과를 기다림, CLI와 벤치마크용)"""
+    return check_password_async(password, hashed).result(timeout=AUTH_TIMEOUT_SECONDS)
+
+
+# ---------- 로그인 시도 제한 ----------
+class AttemptLimiter:
+    """키(아이디, IP)별로 최근 window_seconds 동안의 실패 횟수를 제한합니다.
+
+    없는 아이디로 계속 시도해도 메모리가 늘지 않도록, 키 수가 sweep_keys(이후에는 정리
+    뒤 남은 키 수의 두 배)를 넘거나 마지막 정리 뒤 window_seconds가 지나면 실패 기록이
+    모두 기간이 지난 키를 한 번에 지웁니다. 정리 비용은 시도 한 번당 상수 시간입니다.
+    """
+
+    def __init__(self, max_attempts, window_seconds=ATTEMPT_WINDOW_SECONDS, sweep_keys=LIMITER_SWEEP_KEYS):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.sweep_keys = sweep_keys
+        self._next_sweep = sweep_keys
+        self._last_sweep = None
+        self._failures = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def _prune(self, key, now):
+        failures = self._failures[key]
+        while failures and failures[0] <= now - self.window_seconds:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+        return failures
+
+    def _sweep(self, now):
+        if self._last_sweep is None:
+            self._last_sweep = now
+        if len(self._failures) <= self._next_sweep and now < self._last_sweep + self.window_seconds:
+            return
+        expired = [key for key, failures in self._failures.items()
+                   if not failures or failures[-1] <= now - self.window_seconds]
+        for key in expired:
+            del self._failures[key]
+        self._next_sweep = max(self.sweep_keys, 2 * len(self._failures))
+        self._last_sweep = now
+
+    def retry_after(self, key, now=None):
+        """차단 중이면 다시 시도할 수 있을 때까지 남은 초, 아니면 0을 반환합니다."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._sweep(now)
+            failures = self._prune(key, now)
+            if len(failures) < self.max_attempts:
+                return 0
+            return failures[0] + self.window_seconds - now
+
+    def record_failure(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._failures[key].append(now)
+            self._sweep(now)
+
+    def __len__(self):
+        """실패 기록을 들고 있는 키 수."""
+        with self._lock:
+            return len(self._failures)
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+user_limiter = AttemptLimiter(MAX_ATTEMPTS_PER_USER)
+ip_limiter = AttemptLimiter(MAX_ATTEMPTS_PER_IP)
+
+def login_retry_after(username, ip):
+    """아이디 또는 IP가 차단 중이면 남은 초를 반환합니다."""
+    return max(user_limiter.retry_after(username), ip_limiter.retry_after(ip))
+
+def start_login(username, password, hashed, ip):
+    """시도 제한을 확인하고 비밀번호 검증을 작업자 풀에 넣습니다. 검증을 기다리지 않습니다.
+
+    (검증 Future, 차단 시 남은 초) 튜플을 반환합니다. 차단 중이면 bcrypt를 돌리지 않고
+    Future는 None입니다. hashed가 None(없는 아이디)이면 바로 실패하는 Future를 반환합니다.
+    """
+    wait = login_retry_after(username, ip)
+    if wait > 0:
+        return None, wait
+    if hashed is None:
+        future = Future()
+        future.set_result(False)
+        return future, 0
+    return check_password_async(password, hashed), 0
+
+def finish_login(username, ip, future):
+    """끝난 검증 Future의 결과를 시도 제한에 반영하고 성공 여부를 반환합니다.
+
+    없는 아이디도 실패로 기록해 아이디 추측을 막습니다.
+    """
+    ok = bool(future.result())
+    if ok:
+        user_limiter.reset(username)
+    else:
+        user_limiter.record_failure(username)
+        ip_limiter.record_failure(ip)
+    return ok
+
+def verify_login(username, password, hashed, ip):
+    """start_login과 finish_login을 차례로 부르고 검증이 끝날 때까지 기다립니다. (CLI와 벤치마크용)
+
+    (성공 여부, 차단 시 남은 초) 튜플을 반환합니다.
+    """
+    future, wait = start_login(username, password, hashed, ip)
+    if future is None:
+        return False, wait
+    future.result(timeout=AUTH_TIMEOUT_SECONDS)
+    return finish_login(username, ip, future), 0
+
+
+# ---------- 세션 토큰 ----------
+def _sign(payload):
+    return hmac.new(_SECRET, payload.encode(), hashlib.sha256).hexdigest()
+
+def issue_session_token(username, ttl=SESSION_TOKEN_TTL_SECONDS):
+    """로그인 성공 후 세션에 보관할 토큰을 발급합니다."""
+    payload = f"{username}|{int(time.time()) + ttl}"
+    return f"{payload}|{_sign(payload)}"
+
+def verify_session_token(token):
+    """토큰이 유효하면 사용자 이름을, 아니면 None을 반환합니다. (bcrypt 없이 HMAC만 확인)"""
+    if not token:
+        return None
+    try:
+        username, expires, signature = token.rsplit("|", 2)
+        expires_at = int(expires)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, _sign(f"{username}|{expires}")):
+        return None
+    if expires_at < time.time():
+        return None
+    return username
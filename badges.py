@@ -0,0 +1,167 @@
+"""뱃지 / 미션 엔진.
+
+뱃지와 미션은 아래 BADGES, MISSIONS에 선언적으로 정의합니다. 각 규칙은
+COUNTERS의 카운터 이름을 가리키고, 카운터는 "필드: 허용 값 목록" 조건의
+AND로 정의합니다. 같은 정의로 전체 기록은 벡터 연산 한 번에(build), 새 기록은
+한 건씩(apply_insert / apply_update) 계산하므로 두 경로의 결과가 같습니다.
+
+미션 종류
+- "count":  전체 기간의 카운터가 target 이상 (뱃지)
+- "streak": 카운터에 해당하는 기록 없이 days일 연속 (예: 7일 동안 과시소비 0건)
+- "window": 최근 days일 동안 카운터가 target 이상 (예: 일주일 동안 감정 기록 5건)
+
+상태는 JSON으로 저장할 수 있는 dict로 storage가 기록 추가/수정 때마다 갱신합니다.
+    {"counters": {...}, "first_seen": ISO 문자열, "last_hit": {카운터: ISO 문자열},
+     "daily": {카운터: {"YYYY-MM-DD": 건수}}}
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from analytics import EMOTIONS
+
+STATE_NAME = "badges"
+
+# 카운터 이름 -> {필드: 허용 값 목록} (모든 조건을 만족하는 기록 수)
+COUNTERS = {
+    "records": {},
+    "emotions": {"감정": EMOTIONS},
+    "planned": {"계획됨": ["예"]},
+    "rational": {"계획됨": ["예"], "과시소비": ["아니오"]},
+    "flashy": {"과시소비": ["예"]},
+    "impulse": {"계획됨": ["아니오"]},
+}
+
+BADGES = [
+    {"name": "첫 기록", "type": "count", "counter": "records", "target": 1, "desc": "첫 지출 기록 달성"},
+    {"name": "꾸준한 기록", "type": "count", "counter": "records", "target": 7, "desc": "7건 이상 기록 달성"},
+    {"name": "감정 성찰왕", "type": "count", "counter": "emotions", "target": 10, "desc": "10건 이상의 감정 기록 완료"},
+    {"name": "계획 부자", "type": "count", "counter": "planned", "target": 15, "desc": "계획된 소비 15건 달성"},
+    {"name": "절약 영웅", "type": "count", "counter": "rational", "target": 20, "desc": "합리적 소비 20건 달성"},
+]
+
+MISSIONS = [
+    {"name": "과시소비 없는 일주일", "type": "streak", "counter": "flashy", "days": 7, "desc": "7일 동안 과시소비 0건"},
+    {"name": "충동구매 멈춤 3일", "type": "streak", "counter": "impulse", "days": 3, "desc": "3일 동안 계획 없는 소비 0건"},
+    {"name": "감정 일기 일주일", "type": "window", "counter": "emotions", "days": 7, "target": 5, "desc": "최근 7일 동안 감정 기록 5건"},
+]
+
+# 일별 건수를 보관할 카운터와 보관 기간 (window 미션에 필요한 만큼만)
+_WINDOW_COUNTERS = sorted({m["counter"] for m in MISSIONS if m["type"] == "window"})
+_WINDOW_KEEP_DAYS = max([m["days"] for m in MISSIONS if m["type"] == "window"], default=0)
+_STREAK_COUNTERS = sorted({m["counter"] for m in MISSIONS if m["type"] == "streak"})
+
+
+def _mask(df, conditions):
+    mask = pd.Series(True, index=df.index)
+    for field, values in conditions.items():
+        mask &= df[field].isin(values)
+    return mask
+
+def _matches(rec, conditions):
+    return all(rec.get(field) in values for field, values in conditions.items())
+
+def _timestamp(rec):
+    dt = pd.to_datetime(rec.get("datetime_iso"), errors='coerce')
+    return None if pd.isnull(dt) else dt
+
+def _empty_state():
+    return {"counters": {name: 0 for name in COUNTERS}, "first_seen": None,
+            "last_hit": {}, "daily": {name: {} for name in _WINDOW_COUNTERS}}
+
+
+def build(df):
+    """전체 기록에서 모든 카운터를 계산합니다. (카운터마다 마스크 하나, 기록 스캔 한 번)"""
+    state = _empty_state()
+    if df.empty:
+        return state
+    dts = pd.to_datetime(df["datetime_iso"], errors='coerce')
+    if dts.notna().any():
+        state["first_seen"] = dts.min().isoformat(sep=" ")
+    cutoff = pd.Timestamp(datetime.now() - timedelta(days=_WINDOW_KEEP_DAYS)).normalize()
+
+    for name, conditions in COUNTERS.items():
+        mask = _mask(df, conditions)
+        state["counters"][name] = int(mask.sum())
+        hits = dts[mask]
+        if name in _STREAK_COUNTERS and hits.notna().any():
+            state["last_hit"][name] = hits.max().isoformat(sep=" ")
+        if name in _WINDOW_COUNTERS:
+            recent = hits[hits >= cutoff]
+            daily = recent.dt.strftime("%Y-%m-%d").value_counts()
+            state["daily"][name] = {day: int(n) for day, n in daily.items()}
+    return state
+
+
+def _prune_daily(state, now):
+    cutoff = (now - timedelta(days=_WINDOW_KEEP_DAYS)).strftime("%Y-%m-%d")
+    for name, days in state.setdefault("daily", {}).items():
+        state["daily"][name] = {day: n for day, n in days.items() if day >= cutoff}
+
+
+def _add(state, rec, sign):
+    dt = _timestamp(rec)
+    for name, conditions in COUNTERS.items():
+        if not _matches(rec, conditions):
+            continue
+        state["counters"][name] = state["counters"].get(name, 0) + sign
+        if dt is None:
+            continue
+        if sign > 0 and name in _STREAK_COUNTERS:
+            last = state["last_hit"].get(name)
+            if last is None or dt > pd.Timestamp(last):
+                state["last_hit"][name] = dt.isoformat(sep=" ")
+        if name in _WINDOW_COUNTERS:
+            day = dt.strftime("%Y-%m-%d")
+            days = state["daily"].setdefault(name, {})
+            days[day] = days.get(day, 0) + sign
+            if days[day] <= 0:
+                del days[day]
+
+
+def apply_insert(state, rec):
+    """기록 한 건이 추가될 때 카운터를 올립니다."""
+    dt = _timestamp(rec)
+    if dt is not None and (state.get("first_seen") is None or dt < pd.Timestamp(state["first_seen"])):
+        state["first_seen"] = dt.isoformat(sep=" ")
+    _add(state, rec, 1)
+    _prune_daily(state, datetime.now())
+    return state
+
+
+def apply_update(state, before, after):
+    """기록 한 건이 수정될 때(예: 감정 입력) 이전 값을 빼고 새 값을 더합니다.
+
+    streak 미션의 마지막 해당 시각은 늘어날 수만 있습니다. (수정으로 조건에서
+    빠진 기록의 이전 시각을 찾으려면 전체 기록이 필요하므로 보수적으로 유지)
+    """
+    _add(state, before, -1)
+    _add(state, after, 1)
+    _prune_daily(state, datetime.now())
+    return state
+
+
+def evaluate(state, rules, now=None):
+    """규칙 목록을 상태에 대해 평가합니다. 전체 기록을 다시 보지 않습니다.
+
+    각 규칙에 progress(현재 값), goal(목표 값), earned(달성 여부)를 더한 dict 목록을 반환합니다.
+    """
+    now = now or datetime.now()
+    results = []
+    for rule in rules:
+        counter = rule["counter"]
+        if rule["type"] == "count":
+            progress, goal = state["counters"].get(counter, 0), rule["target"]
+        elif rule["type"] == "streak":
+            # 마지막으로 해당 기록이 있었던 때(없으면 첫 기록)부터 지난 날 수
+            since = state.get("last_hit", {}).get(counter) or state.get("first_seen")
+            days = (now - pd.Timestamp(since).to_pydatetime()).days if since else 0
+            progress, goal = max(0, min(days, rule["days"])), rule["days"]
+        elif rule["type"] == "window":
+            cutoff = (now - timedelta(days=rule["days"])).strftime("%Y-%m-%d")
+            daily = state.get("daily", {}).get(counter, {})
+            progress, goal = sum(n for day, n in daily.items() if day > cutoff), rule["target"]
+        else:
+            raise ValueError(f"알 수 없는 미션 종류입니다: {rule['type']}")
+        results.append({**rule, "progress": progress, "goal": goal, "earned": progress >= goal})
+    return results
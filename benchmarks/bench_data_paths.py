@@ -0,0 +1,141 @@
+"""데이터 경로 벤치마크 모음 (Streamlit 없이 실행).
+
+synthetic.py로 만든 기록으로 자주 쓰이는 경로의 시간을 크기별로 재고, 결과를
+JSON 파일로 저장합니다. 이전 결과 파일을 --compare로 주면 경로별로 몇 배
+빨라지거나 느려졌는지 함께 출력합니다.
+
+    python benchmarks/bench_data_paths.py --sizes 1000 10000 100000 --out bench.json
+    python benchmarks/bench_data_paths.py --compare bench.json --out bench_new.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import analytics
+import anomaly
+import badges
+import engine
+import pending
+import rollup
+import storage
+from synthetic import generate_records
+
+USERNAME = "bench"
+
+
+def _time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+
+def _cases(df):
+    """(이름, 준비 함수, 측정 함수) 목록. 준비 함수는 측정 전에 매번 호출됩니다."""
+    records = iter(generate_records(1000, seed=99).to_dict("records"))
+    sample_ids = iter(df["id"].sample(frac=1.0, random_state=0).tolist())
+    table = analytics.weekly_stats_table(df)
+    last_week = int(table.index.max())
+    week_from = analytics.week_start(last_week)
+    state = badges.build(df)
+    stats = anomaly.build(df)
+    probe = df.iloc[-1].to_dict()
+
+    def new_record():
+        return {**next(records), "id": f"new-{time.perf_counter_ns()}"}
+
+    return [
+        ("load_data (캐시 없음)", lambda: storage._cache.invalidate(), lambda: storage.load_data(USERNAME)),
+        ("load_data (캐시)", lambda: storage.load_data(USERNAME), lambda: storage.load_data(USERNAME)),
+        ("load_data (한 주)", lambda: storage._cache.invalidate(),
+         lambda: storage.load_data(USERNAME, week_from, week_from + timedelta(days=7))),
+        ("load_weeks", lambda: storage._cache.invalidate(), lambda: storage.load_weeks(USERNAME)),
+        ("save_data", None, lambda: storage.save_data(df, USERNAME)),
+        ("append_record", None, lambda: storage.append_record(USERNAME, new_record())),
+        ("update_record (감정)", None,
+         lambda: storage.update_record(USERNAME, next(sample_ids), {"감정": "좋음", "감정 이유": "벤치마크"})),
+        ("week_keys", None, lambda: analytics.week_keys(df["datetime_iso"])),
+        ("weekly_stats_table", None, lambda: analytics.weekly_stats_table(df)),
+        ("week_stats", None, lambda: analytics.week_stats(table, last_week, 50000)),
+        ("weekly_trend (52주)", None, lambda: analytics.window_deltas(table, last_week, 52)),
+        ("rollup.build", None, lambda: rollup.build(df)),
+        ("rollup → 주간 통계", None,
+         lambda: analytics.summarize_weeks(engine.rollup_frame(USERNAME))),
+        ("badges.build", None, lambda: badges.build(df)),
+        ("badges.evaluate", None, lambda: badges.evaluate(state, badges.BADGES + badges.MISSIONS)),
+        ("pending.build", None, lambda: pending.build(df)),
+        ("anomaly.build", None, lambda: anomaly.build(df)),
+        ("anomaly.evaluate", None, lambda: anomaly.evaluate(stats, probe)),
+    ]
+
+
+def run(sizes, backends, repeat, seed):
+    results = []
+    for backend_name in backends:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                storage.set_backend(storage.CsvBackend(tmp) if backend_name == "csv"
+                                    else storage.SqliteBackend(os.path.join(tmp, "bench.db")))
+                storage.save_data(generate_records(size, seed=seed), USERNAME)
+                df = storage.load_data(USERNAME) # 앱과 같은 형태(주차 키 포함)의 기록
+                for name, setup, fn in _cases(df):
+                    times = []
+                    for _ in range(repeat):
+                        if setup is not None:
+                            setup()
+                        times += _time(fn, 1)
+                    row = {"backend": backend_name, "size": size, "name": name,
+                           "median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3)}
+                    results.append(row)
+                    print(f"{backend_name:<7} {size:>9,} {name:<24} {row['median_ms']:>10.2f} ms")
+    return results
+
+
+def compare(results, baseline_file):
+    with open(baseline_file, encoding="utf-8") as f:
+        baseline = {(r["backend"], r["size"], r["name"]): r for r in json.load(f)["results"]}
+    print(f"\n{baseline_file} 대비 (중앙값, 1보다 크면 빨라짐)")
+    for row in results:
+        old = baseline.get((row["backend"], row["size"], row["name"]))
+        if old and row["median_ms"] > 0:
+            print(f"{row['backend']:<7} {row['size']:>9,} {row['name']:<24} "
+                  f"{old['median_ms']:>10.2f} → {row['median_ms']:>10.2f} ms  ×{old['median_ms'] / row['median_ms']:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="기록 수")
+    parser.add_argument("--backends", nargs="+", choices=["csv", "sqlite"], default=["csv", "sqlite"])
+    parser.add_argument("--repeat", type=int, default=5, help="경로별 반복 횟수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json", help="결과 JSON 파일")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.backends, args.repeat, args.seed)
+    meta = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "pandas": pd.__version__, "platform": platform.platform(),
+        "cpu_count": os.cpu_count(), "seed": args.seed, "repeat": args.repeat,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"\n결과를 {args.out}에 저장했습니다.")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""기록 DataFrame 타입별 메모리 / groupby 속도 비교.
+
+synthetic.py로 만든 긴 기록을 이전 형식(문자열 대분류/감정/예·아니오, 실수 금액)과
+storage가 읽을 때 쓰는 형식(category, 두 값 category 플래그, 정수 금액)으로 각각
+만들어 메모리 사용량과 자주 쓰는 집계 시간을 비교합니다.
+
+    python benchmarks/bench_dtypes.py --records 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import rollup
+import storage
+from synthetic import generate_records
+
+
+def _legacy(df):
+    """이전 load_data가 돌려주던 형식: 문자열 컬럼, 실수 금액, 비어 있는 감정은 NaN."""
+    df = df.copy()
+    df["금액"] = df["금액"].astype(float)
+    df["감정"] = df["감정"].where(df["감정"] != "")
+    df["year_week"] = analytics.week_keys(df["datetime_iso"])
+    return df
+
+
+def _cases():
+    return [
+        ("대분류별 합계", lambda df: df.groupby("대분류", observed=True)["금액"].sum()),
+        ("주차 × 대분류 합계", lambda df: df.groupby(["year_week", "대분류"], observed=True)["금액"].sum()),
+        ("감정별 건수", lambda df: df.groupby("감정", observed=True).size()),
+        ("과시소비 건수", lambda df: (df["과시소비"] == "예").sum()),
+        ("주간 통계 표", analytics.weekly_stats_table),
+        ("rollup.build", rollup.build),
+    ]
+
+
+def _median_ms(fn, df, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(df)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    before = _legacy(generate_records(args.records, seed=args.seed, days=3 * 365))
+    after = storage._normalize_records(before.copy())
+
+    print(f"기록 {args.records:,}건")
+    print(f"{'컬럼':<14} {'이전 MB':>10} {'현재 MB':>10}  현재 타입")
+    mem_before, mem_after = before.memory_usage(deep=True), after.memory_usage(deep=True)
+    for col in after.columns:
+        if mem_before[col] != mem_after[col]:
+            print(f"{col:<14} {mem_before[col] / 2**20:>10.1f} {mem_after[col] / 2**20:>10.1f}  {after[col].dtype}")
+    print(f"{'전체':<14} {mem_before.sum() / 2**20:>10.1f} {mem_after.sum() / 2**20:>10.1f}  "
+          f"(×{mem_before.sum() / mem_after.sum():.1f} 절약)")
+
+    print(f"\n{'집계':<18} {'이전 ms':>10} {'현재 ms':>10}")
+    for name, fn in _cases():
+        old, new = _median_ms(fn, before, args.repeat), _median_ms(fn, after, args.repeat)
+        print(f"{name:<18} {old:>10.1f} {new:>10.1f}  ×{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""기록 추가 시간이 기록 수와 무관한지 확인하는 벤치마크.
+
+기록을 추가할 때마다 모든 파생 상태(storage.DERIVED_STATES)를 읽고 다시 저장하므로,
+상태 하나라도 전체 기록에 비례해 커지면 기록이 많은 사용자일수록 저장이 느려집니다.
+같은 기간(1년)에 기록 수만 다른 사용자를 만들고, 최근 날짜의 기록을 한 건씩 추가하는
+시간(중앙값)을 크기별로 재서 가장 작은 크기 대비 --max-ratio배를 넘지 않는지 확인합니다.
+크기별 파생 상태의 JSON 크기도 함께 출력합니다.
+
+    python benchmarks/bench_insert_scaling.py --sizes 1000 100000 --inserts 200
+
+어느 저장소에서든 비율을 넘으면 종료 코드 1을 반환합니다.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from synthetic import generate_records
+
+USERNAME = "bench"
+MAX_RATIO = 2.0 # 가장 작은 크기 대비 기록 추가 시간(중앙값) 비율의 상한
+
+
+def measure(backend_name, size, inserts, seed):
+    """size건이 있는 사용자에게 기록을 inserts건 추가하며 (시간 목록 ms, 상태별 JSON 바이트)를 반환합니다."""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.set_backend(storage.CsvBackend(tmp) if backend_name == "csv"
+                            else storage.SqliteBackend(os.path.join(tmp, "bench.db")))
+        storage.save_data(generate_records(size, seed=seed, start="2024-01-01", days=365), USERNAME)
+        # 앱에서처럼 가장 최근 날짜 부근의 기록을 추가 (지난 달 기록을 고치는 일은 드뭄)
+        new = generate_records(inserts, seed=seed + 1, start="2024-12-25", days=6).to_dict("records")
+        times = []
+        for i, rec in enumerate(new):
+            rec["id"] = f"new-{i}"
+            t0 = time.perf_counter()
+            storage.append_record(USERNAME, rec)
+            times.append((time.perf_counter() - t0) * 1000)
+        sizes = {name: len(json.dumps(storage.load_derived(USERNAME, name), ensure_ascii=False, default=str))
+                 for name in storage.DERIVED_STATES}
+    return times, sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000], help="기록 수")
+    parser.add_argument("--backends", nargs="+", choices=["csv", "sqlite"], default=["csv", "sqlite"])
+    parser.add_argument("--inserts", type=int, default=200, help="크기별로 추가할 기록 수")
+    parser.add_argument("--max-ratio", type=float, default=MAX_RATIO)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for backend_name in args.backends:
+        baseline = None
+        for size in sorted(args.sizes):
+            times, sizes = measure(backend_name, size, args.inserts, args.seed)
+            median = statistics.median(times)
+            baseline = baseline or median
+            ratio = median / baseline
+            ok = ratio <= args.max_ratio
+            failed |= not ok
+            print(f"{backend_name:<7} {size:>9,}건  추가 중앙값 {median:7.2f} ms  평균 {statistics.mean(times):7.2f} ms  "
+                  f"최대 {max(times):8.1f} ms  ×{ratio:.2f} {'' if ok else '✗'}")
+            print("        상태 크기: " + ", ".join(f"{name} {n / 1024:.1f}KB" for name, n in sizes.items()))
+    print(f"기록 추가 시간이 기록 수와 무관함 (×{args.max_ratio:g} 이내)" if not failed
+          else f"기록 추가 시간이 기록 수에 따라 늘어남 (×{args.max_ratio:g} 초과)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""동시 로그인 처리량 벤치마크.
+
+N개의 세션(스레드)이 동시에 로그인하는 상황을 흉내 내어 auth 모듈의 bcrypt
+작업자 풀 크기별 처리량(logins/s)과 지연 시간(p50/p95)을 측정합니다.
+비교 기준으로 풀 없이 각 세션 스레드에서 bcrypt를 직접 돌리는 경우도 측정합니다.
+먼저 없는 아이디 여러 개로 실패한 시도가 기간이 지난 뒤 시도 제한기에 남지 않는지 확인합니다.
+
+    python benchmarks/bench_login.py --logins 64 --rounds 10 --workers 1 2 4 8
+
+각 풀 크기의 처리량은 풀 없는 기준 대비 배수로도 보여 주고, 마지막에 처리량이 가장 높은
+풀 크기를 알려 줍니다. 기본값(CPU당 작업자 1개, auth.AUTH_WORKERS)이 맞는지는 코어가 여러
+개인 서버에서 재어야 하므로, 가장 큰 풀이 CPU 수보다 크면 다중 코어 확장을 보여 주지
+못한다고 경고합니다.
+
+측정 기록 (--logins 32 --rounds 10):
+    CPU 1개   기준 11.0 logins/s (p50 2849 ms, p95 2895 ms)
+              풀 1개 11.1 (p50 1485, p95 2700)  풀 2개 11.1 (1521, 2696)
+              풀 4개 11.0 (1638, 2882)          풀 8개 10.5 (2014, 3046)
+              한 코어에서는 처리량이 같고, 풀이 작을수록 먼저 온 로그인이 먼저 끝나 p50이 줄어듦
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+
+import auth
+
+
+def _run_sessions(n, login):
+    """n개의 스레드가 동시에 login()을 호출하고 (총 시간, 지연 시간 목록)을 반환합니다."""
+    latencies = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(n + 1)
+
+    def session():
+        start_gate.wait()
+        t0 = time.perf_counter()
+        assert login()
+        with lock:
+            latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=session) for _ in range(n)]
+    for t in threads:
+        t.start()
+    start_gate.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, latencies
+
+
+def _check_limiter_memory(usernames=10_000):
+    """서로 다른 아이디 usernames개의 실패가 기간이 지난 뒤 메모리에 남지 않는지 확인합니다."""
+    limiter = auth.AttemptLimiter(auth.MAX_ATTEMPTS_PER_USER)
+    for i in range(usernames):
+        limiter.record_failure(f"guess{i}", now=float(i) / usernames)
+    during = len(limiter)
+    limiter.retry_after("guess0", now=limiter.window_seconds + 1.0)
+    after = len(limiter)
+    print(f"시도 제한기: 없는 아이디 {usernames:,}개 실패 → 기간 안 {during:,}개, 기간 뒤 {after:,}개 보관")
+    return [] if after == 0 else [f"기간이 지난 실패 기록 {after:,}개가 남아 있음"]
+
+
+def _report(label, elapsed, latencies, baseline=None):
+    """한 줄 결과를 출력하고 처리량(logins/s)을 반환합니다. baseline을 주면 그 대비 배수도 출력합니다."""
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    throughput = len(latencies) / elapsed
+    ratio = f"   ×{throughput / baseline:.2f}" if baseline else ""
+    print(f"{label:<24} {throughput:8.1f} logins/s   "
+          f"p50 {statistics.median(latencies) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms{ratio}")
+    return throughput
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32, help="동시 로그인 수")
+    parser.add_argument("--rounds", type=int, default=auth.BCRYPT_ROUNDS, help="bcrypt 비용 값")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 2])
+    args = parser.parse_args(argv)
+
+    problems = _check_limiter_memory()
+    for problem in problems:
+        print("  ✗", problem)
+
+    password = "test1234"
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=args.rounds)).decode()
+    print(f"CPU {os.cpu_count()}개, 동시 로그인 {args.logins}건, bcrypt rounds {args.rounds}")
+
+    elapsed, latencies = _run_sessions(
+        args.logins, lambda: bcrypt.checkpw(password.encode(), hashed.encode()))
+    baseline = _report("세션 스레드 직접 실행", elapsed, latencies)
+
+    results = {}
+    for workers in args.workers:
+        auth.set_workers(workers)
+        elapsed, latencies = _run_sessions(args.logins, lambda: auth.check_password(password, hashed))
+        results[workers] = _report(f"작업자 풀 {workers}개", elapsed, latencies, baseline)
+    best = max(results, key=results.get)
+    print(f"처리량이 가장 높은 풀: {best}개 (기준 대비 ×{results[best] / baseline:.2f}), "
+          f"기본값 AUTH_WORKERS={auth.AUTH_WORKERS}")
+    if max(args.workers) > (os.cpu_count() or 1):
+        print(f"  ! CPU가 {os.cpu_count()}개뿐이라 {os.cpu_count()}개보다 큰 풀의 다중 코어 확장은 이 결과로 알 수 없음")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
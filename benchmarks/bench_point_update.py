@@ -0,0 +1,99 @@
+"""기록 한 건의 감정 수정 벤치마크.
+
+기록 수(1천 / 10만 / 100만 건)별로 감정 한 건을 고치는 데 걸리는 시간을 잽니다.
+- 전체 다시 쓰기: 예전 방식. id로 전체를 두 번 스캔해 고치고 CSV 전체를 다시 씀
+- CSV 수정 로그: storage.update_record (id 인덱스로 찾고 바뀐 칸만 로그에 추가)
+- SQLite: storage.update_record (기본 키로 한 행만 UPDATE)
+
+    python benchmarks/bench_point_update.py --sizes 1000 100000 1000000 --edits 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import storage
+
+USERNAME = "bench"
+
+
+def _make_records(n, seed=0):
+    rng = np.random.default_rng(seed)
+    dts = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 600 * 86400, n)), unit="s")
+    return pd.DataFrame({
+        "id": [str(uuid.uuid4()) for _ in range(n)],
+        "날짜": dts.strftime("%Y-%m-%d"),
+        "시간": dts.strftime("%H:%M"),
+        "대분류": rng.choice(["식비", "교통", "쇼핑", "여가"], n),
+        "세부항목": "벤치마크",
+        "금액": rng.integers(1, 500, n) * 100,
+        # 최근 50건만 감정 입력 대기 (오래된 기록은 이미 감정이 입력된 상태)
+        "감정": np.where(np.arange(n) < n - 50, rng.choice(["좋음", "보통", "나쁨"], n), None),
+        "계획됨": rng.choice(["예", "아니오"], n),
+        "과시소비": rng.choice(["예", "아니오"], n),
+        "모방소비": rng.choice(["예", "아니오"], n),
+        "감정 이유": None,
+        "datetime_iso": dts.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+
+def _time_edits(ids, edit):
+    latencies = []
+    for i, record_id in enumerate(ids):
+        t0 = time.perf_counter()
+        edit(record_id, {"감정": "좋음", "감정 이유": f"수정 {i}"})
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def _report(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"  {label:<16} p50 {statistics.median(latencies) * 1000:9.2f} ms   p95 {p95 * 1000:9.2f} ms")
+
+
+def _full_rewrite(record_id, fields):
+    df = storage.load_data(USERNAME)
+    for col, value in fields.items():
+        df[col] = df[col].astype(object)
+        df.loc[df["id"] == record_id, col] = value
+    storage.save_data(df, USERNAME)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000], help="기록 수")
+    parser.add_argument("--edits", type=int, default=20, help="크기별 수정 횟수")
+    parser.add_argument("--skip-rewrite", action="store_true", help="전체 다시 쓰기 측정 생략 (100만 건에서 느림)")
+    args = parser.parse_args(argv)
+
+    for n in args.sizes:
+        print(f"기록 {n:,}건, 수정 {args.edits}회")
+        df = _make_records(n)
+        ids = list(df["id"].sample(min(args.edits, n), random_state=1))
+        with tempfile.TemporaryDirectory() as tmp:
+            runs = [("csv", storage.CsvBackend(tmp), storage.update_record),
+                    ("sqlite", storage.SqliteBackend(os.path.join(tmp, "bench.db")), storage.update_record)]
+            if not args.skip_rewrite:
+                runs.insert(0, ("전체 다시 쓰기", storage.CsvBackend(os.path.join(tmp, "rewrite")), _full_rewrite))
+            for label, backend, edit in runs:
+                os.makedirs(getattr(backend, "base_dir", tmp), exist_ok=True)
+                storage.set_backend(backend)
+                storage.save_data(df, USERNAME)
+                storage.load_data(USERNAME) # 캐시를 채운 상태에서 측정 (앱에서 화면을 그린 뒤 수정하는 상황)
+                if edit is storage.update_record:
+                    _report(label, _time_edits(ids, lambda i, f: edit(USERNAME, i, f)))
+                else:
+                    _report(label, _time_edits(ids, edit))
+
+
+if __name__ == "__main__":
+    main()
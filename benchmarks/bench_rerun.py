@@ -0,0 +1,134 @@
+"""저장 후 화면 갱신 시간 벤치마크 (AppTest).
+
+synthetic.py로 만든 기록 N건을 가진 사용자로 로그인한 뒤 기록 저장, 감정 저장,
+예산 저장, 계획 저장 버튼을 누르고 화면이 다시 그려질 때까지(버튼 처리와 그 뒤의
+재실행/부분 재실행이 모두 끝날 때까지)의 시간을 잽니다. 버튼을 누르지 않은 전체
+재실행 시간도 함께 잽니다. 측정은 새 프로세스에서 하므로 --baseline으로 이전 커밋의
+앱을 같은 데이터로 재어 비교할 수 있습니다.
+
+    python benchmarks/bench_rerun.py --records 20000 --repeat 5
+    python benchmarks/bench_rerun.py --baseline HEAD~1 --backend sqlite
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERNAME = "bench"
+PASSWORD = "bench1234"
+
+# 새 프로세스에서 실행할 측정 코드: argv = 앱 폴더, 기록 수, 반복 횟수, seed
+_PROBE = """
+import json, os, sys, time
+from datetime import datetime, timedelta
+root, n, repeat, seed = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+sys.path[:0] = [root, os.path.join(root, "benchmarks")]
+import engine, storage
+from synthetic import generate_records
+from streamlit.testing.v1 import AppTest
+
+engine.register_user("%(user)s", "%(password)s")
+start = (datetime.now() - timedelta(days=365)).strftime("%%Y-%%m-%%d")
+storage.save_data(generate_records(n, seed=seed, start=start, days=365), "%(user)s")
+engine.save_budget("%(user)s", 300000)
+
+at = AppTest.from_file(os.path.join(root, "app.py"), default_timeout=300).run()
+at.sidebar.text_input(key="login_user").input("%(user)s")
+at.sidebar.text_input(key="login_pass").input("%(password)s")
+at.sidebar.button(key="login_btn").click().run()
+while "user" not in at.session_state: # 비밀번호 확인(bcrypt)이 끝날 때까지 (AppTest는 run_every 구역을 돌리지 않음)
+    assert not at.exception and "login_check" in at.session_state, at.exception
+    time.sleep(0.05)
+    at.run()
+assert not at.exception, at.exception
+
+def button(label):
+    return next(b for b in at.button if b.label == label)
+
+def spend(i):
+    next(w for w in at.number_input if w.label.startswith("지출 금액")).set_value(1000 + i)
+    button("기록 저장").click()
+
+def emotion(i):
+    radio = next(r for r in at.radio if r.key and r.key.startswith("emo_radio_"))
+    radio.set_value("좋음")
+    button("감정 저장 및 반영").click()
+
+def budget(i):
+    at.number_input(key="month_budget_input").set_value(300000 + 10000 * (i + 1))
+    button("월 예산 저장 및 주간 예산 계산").click()
+
+def plan(i):
+    at.text_area(key="reflection_input").input(f"성찰 {i}")
+    button("성찰 및 계획 저장").click()
+
+results = {}
+for name, act in [("전체 재실행", None), ("기록 저장", spend), ("감정 저장", emotion),
+                  ("예산 저장", budget), ("계획 저장", plan)]:
+    times = []
+    for i in range(repeat + 1): # 첫 번째는 준비(캐시 채우기)로 보고 버림
+        if act is not None:
+            act(i)
+        t0 = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - t0) * 1000)
+        assert not at.exception, at.exception
+        at.run() # 부분 재실행 뒤의 결과에는 다시 그린 구역만 있으므로 다음 동작 전에 전체를 다시 그림
+    results[name] = times[1:]
+print(json.dumps(results, ensure_ascii=False))
+""" % {"user": USERNAME, "password": PASSWORD}
+
+
+def measure(root, records, repeat, seed, backend):
+    """root 폴더의 app.py를 새 프로세스에서 재어 {동작: [ms, ...]}를 반환합니다."""
+    env = {**os.environ, "MONEYMONI_STORAGE": backend, "MONEYMONI_BCRYPT_ROUNDS": "4"}
+    with tempfile.TemporaryDirectory() as work: # 빈 데이터 폴더에서 실행
+        out = subprocess.run([sys.executable, "-c", _PROBE, root, str(records), str(repeat), str(seed)],
+                             cwd=work, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr[-2000:])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _export(ref, target):
+    """git 커밋 ref의 파일을 target 폴더에 풉니다."""
+    archive = os.path.join(target, "src.tar")
+    subprocess.run(["git", "archive", "--format=tar", "-o", archive, ref], cwd=ROOT, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(target, filter="data")
+    os.remove(archive)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--baseline", help="비교할 git 커밋 (예: HEAD~1)")
+    args = parser.parse_args(argv)
+
+    runs = [("현재", ROOT)]
+    with tempfile.TemporaryDirectory() as old_root:
+        if args.baseline:
+            _export(args.baseline, old_root)
+            runs.insert(0, (args.baseline, old_root))
+        results = {label: measure(root, args.records, args.repeat, args.seed, args.backend) for label, root in runs}
+
+    print(f"{args.backend}, 기록 {args.records:,}건, 중앙값 ms (반복 {args.repeat}번)")
+    print(f"{'동작':<12}" + "".join(f"{label:>14}" for label, _ in runs))
+    for name in results["현재"]:
+        medians = [statistics.median(results[label][name]) for label, _ in runs]
+        line = f"{name:<12}" + "".join(f"{ms:>14.1f}" for ms in medians)
+        if len(medians) == 2 and medians[1] > 0:
+            line += f"  ×{medians[0] / medians[1]:.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
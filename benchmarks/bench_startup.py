@@ -0,0 +1,69 @@
+"""로그인 화면 시작 시간 벤치마크.
+
+새 프로세스(캐시된 모듈 없음)에서 app.py를 처음 실행해 로그인 화면이 그려질
+때까지의 시간을 재고 목표(--target-ms)와 비교합니다. streamlit 자체를 불러오는
+시간은 따로 표시하며 목표에는 넣지 않습니다. 로그인 화면에서 pandas, storage가
+불러와졌는지도 함께 확인합니다. (엔진은 로그인 후에 처음 불러와야 함)
+
+    python benchmarks/bench_startup.py --runs 5 --target-ms 300
+
+목표를 넘거나 로그인 화면에서 무거운 모듈이 불러와지면 종료 코드 1을 반환합니다.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGIN_PAGE_TARGET_MS = 300 # 로그인 화면 첫 실행 목표 (streamlit import 제외)
+HEAVY_MODULES = ["pandas", "numpy", "storage", "analytics"] # 로그인 화면에서 불러오면 안 되는 모듈
+
+# 새 프로세스에서 실행할 측정 코드: streamlit import 시간, 첫 실행 시간, 불러온 무거운 모듈
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+t2 = time.perf_counter()
+assert not at.exception, at.exception
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_run_ms": (t2 - t1) * 1000,
+                  "loaded": [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+
+def measure(runs):
+    """새 프로세스에서 runs번 측정한 결과 목록을 반환합니다."""
+    results = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as work: # 빈 데이터 폴더에서 실행
+            out = subprocess.run([sys.executable, "-c", _PROBE, os.path.join(ROOT, "app.py"), *HEAVY_MODULES],
+                                 cwd=work, capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=LOGIN_PAGE_TARGET_MS, help="첫 실행 목표 시간")
+    args = parser.parse_args(argv)
+
+    results = measure(args.runs)
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    first_run_ms = statistics.median(r["first_run_ms"] for r in results)
+    loaded = sorted({m for r in results for m in r["loaded"]})
+    print(f"streamlit import   {import_ms:8.1f} ms (중앙값, 목표에서 제외)")
+    print(f"로그인 화면 첫 실행 {first_run_ms:8.1f} ms (중앙값, 목표 {args.target_ms:.0f} ms)")
+    print(f"로그인 화면에서 불러온 무거운 모듈: {', '.join(loaded) or '없음'}")
+
+    ok = first_run_ms <= args.target_ms and not loaded
+    print("목표 달성" if ok else "목표 미달")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
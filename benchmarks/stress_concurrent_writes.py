@@ -0,0 +1,174 @@
+"""동시 쓰기 스트레스 테스트.
+
+여러 프로세스(각각 여러 스레드 = 세션)가 동시에
+- 같은 사용자(공유 계정)와 자기 사용자에게 지출 기록을 추가하고
+- 추가한 기록의 감정을 수정하고
+- 같은 아이디로 동시에 회원가입을 시도한 뒤
+잃어버린 쓰기가 없는지 확인합니다.
+
+- 모든 기록이 정확히 한 번씩 남아 있는가
+- 모든 감정 수정이 반영되었는가
+- 파생 상태(롤업, 뱃지, 대기열 등)가 전체 기록에서 새로 만든 값과 같은가
+- 같은 아이디가 한 번만 가입되었는가
+- 한 사용자에게 동시에 들어온 기록 추가가 그룹 커밋으로 묶였는가 (flush 횟수 < 추가 요청 수)
+
+    python benchmarks/stress_concurrent_writes.py --backend csv --procs 4 --threads 4 --records 50
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SHARED_USER = "class"
+SIGNUP_NAMES = [f"student{i}" for i in range(10)]
+
+
+def _make_backend(storage, kind, path):
+    return storage.CsvBackend(path) if kind == "csv" else storage.SqliteBackend(os.path.join(path, "stress.db"))
+
+
+def _record(i):
+    dt = datetime(2025, 11, 17, 12) + timedelta(minutes=i)
+    return {
+        "id": str(uuid.uuid4()), "날짜": dt.strftime("%Y-%m-%d"), "시간": dt.strftime("%H:%M:%S"),
+        "datetime_iso": dt, "대분류": "식비(간식/외식 포함)", "세부항목": "급식 후 간식", "금액": 1000.0 + i,
+        "계획됨": "아니오", "과시소비": "아니오", "모방소비": "아니오", "감정": "", "감정 이유": "",
+    }
+
+
+def _worker(kind, path, proc_no, threads, records, start_event, results):
+    import storage
+    from user_directory import get_user_directory
+    storage.set_backend(_make_backend(storage, kind, path))
+    start_event.wait()
+
+    written, lock = [], threading.Lock()
+
+    def session(thread_no):
+        own_user = f"p{proc_no}t{thread_no}"
+        for i in range(records):
+            for username in (SHARED_USER, own_user):
+                rec = _record(i)
+                storage.append_record(username, rec)
+                if i % 2 == 0: # 절반은 감정까지 입력
+                    storage.update_record(username, rec["id"], {"감정": "좋음", "감정 이유": own_user}, before=rec)
+                with lock:
+                    written.append((username, rec["id"], i % 2 == 0))
+        for name in SIGNUP_NAMES: # 모든 세션이 같은 아이디로 가입 시도
+            get_user_directory().register(name, f"hash-{own_user}")
+
+    t0 = time.perf_counter()
+    workers = [threading.Thread(target=session, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    results.put((time.perf_counter() - t0, written, storage._append_writer.batches, storage._append_writer.items))
+
+
+def _check(kind, path, written):
+    import storage
+    storage.set_backend(_make_backend(storage, kind, path))
+    problems = []
+
+    for username in sorted({u for u, _, _ in written}):
+        expected = {rid: rated for u, rid, rated in written if u == username}
+        df = storage.load_data(username)
+        if len(df) != len(expected) or set(df["id"]) != set(expected):
+            problems.append(f"{username}: 기록 {len(expected)}건 중 {len(df)}건 ({len(set(expected) - set(df['id']))}건 누락)")
+        rated = set(df.loc[df["감정"] == "좋음", "id"])
+        missing = {rid for rid, r in expected.items() if r} - rated
+        if missing:
+            problems.append(f"{username}: 감정 수정 {len(missing)}건 누락")
+        for name, module in storage.DERIVED_STATES.items():
+            if name in ("badges", "recent", "spend_totals"):
+                continue # 현재 시각에 따라 달라지는 값이 있어 비교에서 제외
+            if storage.load_derived(username, name) != module.build(df):
+                problems.append(f"{username}: 파생 상태 {name}가 전체 기록과 다름")
+
+    users = storage.get_backend().load_users()
+    duplicated = users["username"][users["username"].duplicated()].unique().tolist()
+    if duplicated:
+        problems.append(f"중복 가입: {duplicated}")
+    if not set(SIGNUP_NAMES) <= set(users["username"]):
+        problems.append("가입 누락")
+    return problems
+
+
+def _check_same_user_group_commit(kind, path, threads, records):
+    """한 프로세스의 여러 세션이 같은 사용자에게 동시에 추가할 때 요청들이 한 번의 flush로 묶이는지 확인합니다."""
+    import storage
+    storage.set_backend(_make_backend(storage, kind, path))
+    writer = storage._append_writer
+    batches, items = writer.batches, writer.items
+    barrier = threading.Barrier(threads)
+
+    def session():
+        barrier.wait()
+        for i in range(records):
+            storage.append_record("groupcommit", _record(i))
+
+    workers = [threading.Thread(target=session) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    batches, items = writer.batches - batches, writer.items - items
+    print(f"  같은 사용자 동시 추가: 요청 {items}건 → {batches}번 flush")
+    if items != threads * records:
+        return [f"같은 사용자 동시 추가: 요청 {threads * records}건 중 {items}건만 처리됨"]
+    if threads > 1 and batches >= items:
+        return [f"같은 사용자 동시 추가가 묶이지 않음: 요청 {items}건 → {batches}번 flush"]
+    if len(storage.load_data("groupcommit")) != items:
+        return ["같은 사용자 동시 추가: 기록 수가 요청 수와 다름"]
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--procs", type=int, default=4, help="프로세스 수")
+    parser.add_argument("--threads", type=int, default=4, help="프로세스당 세션(스레드) 수")
+    parser.add_argument("--records", type=int, default=50, help="세션당 기록 수 (공유 계정, 자기 계정 각각)")
+    args = parser.parse_args(argv)
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as path:
+        import storage
+        _make_backend(storage, args.backend, path) # 스키마를 미리 만들어 둠
+        start_event, results = ctx.Event(), ctx.Queue()
+        procs = [ctx.Process(target=_worker, args=(args.backend, path, n, args.threads, args.records, start_event, results))
+                 for n in range(args.procs)]
+        for p in procs:
+            p.start()
+        time.sleep(1.0) # 모든 프로세스가 준비될 때까지
+        t0 = time.perf_counter()
+        start_event.set()
+        outputs = [results.get() for _ in procs]
+        elapsed = time.perf_counter() - t0
+        for p in procs:
+            p.join()
+
+        written = [w for _, ws, _, _ in outputs for w in ws]
+        batches = sum(b for _, _, b, _ in outputs)
+        items = sum(n for _, _, _, n in outputs)
+        print(f"{args.backend}: 프로세스 {args.procs}개 × 세션 {args.threads}개, 기록 {len(written)}건, "
+              f"{elapsed:.1f}초 ({len(written) / elapsed:.0f}건/s), 그룹 커밋 {items}건 → {batches}번 flush")
+        problems = _check(args.backend, path, written)
+        problems += _check_same_user_group_commit(args.backend, path, args.threads * args.procs, args.records)
+
+    for problem in problems:
+        print("  ✗", problem)
+    print("잃어버린 쓰기 없음" if not problems else f"문제 {len(problems)}건")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""재현 가능한 가상 지출 기록 생성기.
+
+seed가 같으면 항상 같은 기록을 만듭니다. 카테고리 비율, 카테고리별 금액 분포
+(로그 정규분포, 100원 단위), 시간대(점심, 하교 후, 늦은 밤), 계획/과시/모방 소비
+비율, 감정 입력 비율을 청소년 지출 패턴에 맞춰 흉내 냅니다.
+
+    from benchmarks.synthetic import generate_records, populate
+    df = generate_records(10000, seed=1)
+    populate(n_users=50, n_records=2000, seed=1) # 현재 저장소에 저장
+
+    python benchmarks/synthetic.py --users 50 --records 2000 --seed 1
+"""
+import argparse
+import os
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+# 카테고리: (비율, 금액 로그 평균(원), 로그 표준편차, 계획 비율, 과시 비율, 모방 비율, 세부항목 예시)
+CATEGORY_PROFILES = {
+    "식비(간식/외식 포함)": (0.42, 3500, 0.6, 0.35, 0.05, 0.30, ["편의점", "음료수", "아이스크림", "카페", "배달", "떡볶이"]),
+    "교통": (0.20, 1500, 0.5, 0.80, 0.00, 0.02, ["버스비", "지하철", "택시비"]),
+    "의류/패션/잡화": (0.07, 15000, 0.8, 0.45, 0.25, 0.35, ["장갑", "양말", "티셔츠", "가방"]),
+    "미용(화장품 등)": (0.06, 9000, 0.7, 0.40, 0.20, 0.40, ["선크림", "립밤", "올리브영"]),
+    "학습 자료": (0.07, 8000, 0.7, 0.85, 0.02, 0.10, ["노트", "볼펜", "문제집", "인강"]),
+    "문화 생활(친구모임/영화 등)": (0.08, 7000, 0.6, 0.55, 0.10, 0.25, ["영화", "노래방", "웹툰", "방탈출"]),
+    "취미용품/굿즈": (0.05, 12000, 0.9, 0.30, 0.30, 0.45, ["포토카드", "앨범", "키링"]),
+    "기타": (0.04, 5000, 1.0, 0.60, 0.05, 0.10, ["병원", "애플 클라우드", "선물"]),
+    "기부": (0.01, 5000, 0.5, 0.90, 0.00, 0.00, ["기부"]),
+}
+# 시간대별 소비 비중 (0~23시)
+HOUR_WEIGHTS = np.array([1, 0.5, 0.2, 0.1, 0.1, 0.2, 0.5, 2, 3, 1, 1, 2,
+                         5, 4, 2, 2, 4, 6, 6, 5, 4, 4, 3, 2], dtype=float)
+EMOTION_RATE = 0.7 # 감정이 입력된 기록 비율
+EMOTION_WEIGHTS = {"좋음": 0.45, "보통": 0.35, "나쁨": 0.20}
+REASONS = ["맛있어서", "필요해서", "친구 따라", "충동적으로", "스트레스", "할인해서"]
+
+
+def generate_records(n, seed=0, start="2024-01-01", days=365):
+    """기록 n건을 만들어 시간 순 DataFrame으로 반환합니다."""
+    rng = np.random.default_rng(seed)
+    names = list(CATEGORY_PROFILES)
+    profiles = list(CATEGORY_PROFILES.values())
+    weights = np.array([p[0] for p in profiles])
+    cat_idx = rng.choice(len(names), size=n, p=weights / weights.sum())
+
+    day = rng.integers(0, days, n)
+    hour = rng.choice(24, size=n, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    seconds = day * 86400 + hour * 3600 + rng.integers(0, 3600, n)
+    dts = pd.Timestamp(start) + pd.to_timedelta(np.sort(seconds), unit="s")
+
+    mean = np.log([profiles[i][1] for i in cat_idx])
+    sigma = np.array([profiles[i][2] for i in cat_idx])
+    amounts = np.maximum(100, np.round(np.exp(rng.normal(mean, sigma)) / 100) * 100)
+
+    def flag(col):
+        p = np.array([profiles[i][col] for i in cat_idx])
+        return np.where(rng.random(n) < p, "예", "아니오")
+
+    details = np.array([profiles[i][6][rng.integers(len(profiles[i][6]))] for i in cat_idx], dtype=object)
+    emotions = rng.choice(list(EMOTION_WEIGHTS), size=n, p=list(EMOTION_WEIGHTS.values()))
+    emotions = np.where(rng.random(n) < EMOTION_RATE, emotions, "")
+    reasons = np.where((emotions != "") & (rng.random(n) < 0.3), rng.choice(REASONS, size=n), "")
+
+    return pd.DataFrame({
+        "id": [str(uuid.UUID(int=int(x))) for x in rng.integers(0, 2**63, n)], # seed가 같으면 id도 같음
+        "날짜": dts.strftime("%Y-%m-%d"),
+        "시간": dts.strftime("%H:%M:%S"),
+        "datetime_iso": dts,
+        "대분류": np.array(names, dtype=object)[cat_idx],
+        "세부항목": details,
+        "금액": amounts,
+        "계획됨": flag(3),
+        "과시소비": flag(4),
+        "모방소비": flag(5),
+        "감정": emotions,
+        "감정 이유": reasons,
+    })
+
+
+def generate_users(n_users, n_records, seed=0, **kwargs):
+    """사용자 n_users명 × 기록 n_records건을 {사용자: DataFrame}으로 반환합니다."""
+    return {f"user{i:04d}": generate_records(n_records, seed=seed * 100003 + i, **kwargs) for i in range(n_users)}
+
+
+def populate(n_users, n_records, seed=0, **kwargs):
+    """가상 사용자의 기록을 현재 저장소(storage.get_backend())에 저장하고 사용자 이름 목록을 반환합니다."""
+    import storage
+    users = generate_users(n_users, n_records, seed, **kwargs)
+    for username, df in users.items():
+        storage.save_data(df, username)
+    return list(users)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--records", type=int, default=1000, help="사용자당 기록 수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    names = populate(args.users, args.records, args.seed)
+    print(f"{len(names)}명 × {args.records}건을 저장했습니다.")
+
+
+if __name__ == "__main__":
+    main()
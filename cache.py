@@ -0,0 +1,129 @@
+"""버전 키 기반 인메모리 캐시.
+
+Streamlit은 세션마다 스크립트를 다시 실행하지만 모듈은 프로세스에 한 번만
+로드되므로, 이 캐시는 모든 재실행과 세션이 함께 사용합니다.
+
+항목은 (key, version)으로 구분합니다. version은 파일의 (mtime, size)나 쓰기
+카운터처럼 데이터가 바뀌면 함께 바뀌는 값이어야 하며, 저장된 version과 다르면
+다시 로드합니다. 전체 크기가 max_bytes를 넘으면 가장 오래 쓰지 않은 항목부터
+내보냅니다(LRU).
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def estimate_size(value):
+    """캐시 항목의 메모리 크기(바이트)를 추정합니다."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    # 호출한 쪽이 DataFrame을 수정해도 캐시 원본은 바뀌지 않도록 복사본을 돌려줌
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    return value
+
+
+class VersionedCache:
+    """(key, version)으로 항목을 구분하는 LRU 캐시. 메모리 상한을 지킵니다."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # key -> (version, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, key, version, loader, copy=True):
+        """캐시에 같은 version의 값이 있으면 돌려주고, 없으면 loader()로 읽어 저장합니다.
+
+        copy=False면 캐시 원본을 그대로 돌려주므로 호출한 쪽에서 수정하면 안 됩니다.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(entry[1]) if copy else entry[1]
+            self.misses += 1
+
+        value = loader()
+        self.put(key, version, value)
+        return _copy(value) if copy else value
+
+    def get(self, key, version):
+        """같은 version의 캐시 원본(수정 금지)을 돌려줍니다. 없으면 None이며 읽지 않습니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def patch(self, key, old_version, new_version, fn):
+        """old_version 항목이 있으면 fn(value)로 제자리 수정하고 new_version으로 바꿉니다.
+
+        수정하지 못했으면(항목이 없거나 버전이 다르면) 항목을 지우고 False를 반환합니다.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != old_version:
+                self._discard(key)
+                return False
+            fn(entry[1])
+            self._entries[key] = (new_version, entry[1], entry[2])
+            return True
+
+    def put(self, key, version, value):
+        size = estimate_size(value)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return # 상한보다 큰 항목은 캐시하지 않음
+            self._entries[key] = (version, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key = next(iter(self._entries))
+                self._discard(old_key)
+                self.evictions += 1
+
+    def invalidate(self, key=None):
+        """key 항목을 지웁니다. key가 없으면 전부 지웁니다."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._discard(key)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def stats(self):
+        """적중/실패 횟수와 현재 사용량을 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
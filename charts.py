@@ -0,0 +1,163 @@
+"""장기 소비 차트: 일 × 대분류 표, 달력 히트맵, 대분류별 지출 추이.
+
+대시보드의 롤업(rollup.to_frame, 일 × 대분류 합계)을 한 번의 groupby/unstack으로
+기록이 없는 날이 0인 일 × 대분류 표(pivot)로 바꾸고, 주간 현황과 장기 차트 모두
+이 표를 잘라서 씁니다. 기간이 길면 추이 차트는 주/월 단위로 묶어(downsample) 점 수를
+일정하게 유지하고, 달력 히트맵은 1년이 넘으면 연도별로 한 줄씩 그립니다.
+
+표와 그림(PNG)은 (사용자, 기록 버전[, 기간, 날짜])별로 캐시하므로, 주차나 기간을
+바꿔도 기록이 바뀌지 않았으면 다시 계산하거나 그리지 않습니다. 그림은 pyplot 대신
+Figure 객체로 그려 여러 세션이 동시에 그려도 전역 상태를 공유하지 않습니다.
+"""
+import io
+import os
+import warnings
+from datetime import datetime, timedelta
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib import font_manager
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+from cache import VersionedCache
+
+CHART_CACHE_MAX_BYTES = int(os.environ.get("MONEYMONI_CHART_CACHE_MB", "64")) * 1024 * 1024 # 표/그림 캐시 메모리 상한
+DAILY_MAX_DAYS = 92 # 추이 차트: 이보다 긴 기간은 주 단위로 묶음
+WEEKLY_MAX_DAYS = 731 # 추이 차트: 이보다 긴 기간은 월 단위로 묶음
+HEATMAP_ROW_DAYS = 371 # 달력 히트맵: 이보다 긴 기간은 연도별로 한 줄씩
+CHART_DPI = 100
+FONT_CANDIDATES = ["Malgun Gothic", "AppleGothic", "NanumGothic", "Noto Sans CJK KR", "Noto Sans KR"] # 한글 글꼴 (설치된 것만 사용)
+WEEKDAY_LABELS = ["월", "화", "수", "목", "금", "토", "일"]
+
+_installed = {font.name for font in font_manager.fontManager.ttflist}
+matplotlib.rcParams["font.family"] = [name for name in FONT_CANDIDATES if name in _installed] + ["sans-serif"]
+matplotlib.rcParams["axes.unicode_minus"] = False # 한글 글꼴에 없는 유니코드 마이너스 대신 '-'
+warnings.filterwarnings("ignore", message="Glyph .* missing from", category=UserWarning) # 한글 글꼴이 없는 서버
+
+_cache = VersionedCache(CHART_CACHE_MAX_BYTES)
+
+
+# ---------- 일 × 대분류 표 ----------
+def day_category_pivot(df_rollup):
+    """롤업을 일 × 대분류 지출 표로 바꿉니다.
+
+    index는 첫 기록일부터 마지막 기록일까지 빠짐없는 날짜, 컬럼은 지출이 많은
+    대분류 순서이며, 기록이 없는 칸은 0입니다.
+    """
+    if df_rollup.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="날짜"), dtype="int64")
+    pivot = df_rollup.groupby(["날짜", "대분류"], observed=True)["금액"].sum().unstack(fill_value=0)
+    pivot = pivot.reindex(pd.date_range(pivot.index.min(), pivot.index.max(), freq="D", name="날짜"), fill_value=0)
+    pivot = pivot[pivot.sum().sort_values(ascending=False).index]
+    pivot.columns = pivot.columns.astype(str)
+    return pivot.astype("int64")
+
+
+def select_range(pivot, months, today=None):
+    """오늘까지 최근 months개월(0이면 첫 기록일부터)의 표를 반환합니다. 기록이 없는 날은 0."""
+    end = pd.Timestamp((today or datetime.now()).date())
+    start = pivot.index.min() if months == 0 else end - pd.DateOffset(months=months) + timedelta(days=1)
+    return pivot.reindex(pd.date_range(start, end, freq="D", name="날짜"), fill_value=0)
+
+
+def downsample(frame):
+    """기간 길이에 맞춰 일/주/월 단위로 묶은 표와 단위 이름을 반환합니다."""
+    if len(frame) <= DAILY_MAX_DAYS:
+        return frame, "일"
+    if len(frame) <= WEEKLY_MAX_DAYS:
+        return frame.resample("W-MON", label="left", closed="left").sum(), "주"
+    return frame.resample("MS").sum(), "월"
+
+
+# ---------- 그림 ----------
+def _png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=CHART_DPI)
+    return buf.getvalue()
+
+
+def _won(value, _pos=None):
+    return f"{value:,.0f}"
+
+
+def _calendar_grid(daily):
+    """일별 합계를 (7 × 주 수) 배열로 놓습니다. 행은 요일(월~일), 열은 주이며 기간 밖 칸은 NaN."""
+    grid_start = daily.index[0] - timedelta(days=daily.index[0].weekday())
+    offsets = (daily.index - grid_start).days.to_numpy()
+    grid = np.full((7, offsets[-1] // 7 + 1), np.nan)
+    grid[offsets % 7, offsets // 7] = daily.to_numpy()
+    return grid, grid_start
+
+
+def calendar_heatmap(daily):
+    """일별 지출 합계(Series)의 달력 히트맵 PNG.
+
+    기간이 HEATMAP_ROW_DAYS보다 길면 연도별로 한 줄씩(1월 1일 ~ 12월 31일, 기간 밖은 빈칸) 그립니다.
+    """
+    if len(daily) > HEATMAP_ROW_DAYS:
+        rows = [part.reindex(pd.date_range(f"{year}-01-01", f"{year}-12-31", freq="D"))
+                for year, part in daily.groupby(daily.index.year)]
+    else:
+        rows = [daily]
+    spent = daily[daily > 0]
+    vmax = float(np.percentile(spent, 95)) if len(spent) else 1.0 # 큰 지출 몇 건이 색을 다 차지하지 않도록
+
+    fig = Figure(figsize=(10, 1.6 * len(rows) + 0.6), layout="constrained")
+    axes = fig.subplots(len(rows), 1, squeeze=False)[:, 0]
+    cmap = matplotlib.colormaps["YlOrRd"].copy()
+    cmap.set_bad("white")
+    for ax, part in zip(axes, rows):
+        grid, grid_start = _calendar_grid(part)
+        image = ax.imshow(np.ma.masked_invalid(grid), cmap=cmap, vmin=0, vmax=vmax, aspect="equal", interpolation="nearest")
+        first = part.index[0]
+        months = [max(m, first) for m in pd.date_range(first.to_period("M").to_timestamp(), part.index[-1], freq="MS")]
+        ax.set_xticks([(m - grid_start).days // 7 for m in months], [f"{m.month}월" for m in months], fontsize=8)
+        ax.set_yticks(range(7), WEEKDAY_LABELS, fontsize=7)
+        ax.set_ylabel(str(part.index[0].year), fontsize=9)
+        ax.tick_params(length=0)
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+    fig.colorbar(image, ax=list(axes), shrink=0.8, pad=0.01, format=FuncFormatter(_won), label="원")
+    return _png(fig)
+
+
+def category_trend(frame, unit):
+    """대분류별 지출을 쌓은 영역 차트 PNG. frame은 downsample 결과입니다."""
+    fig = Figure(figsize=(10, 3.8), layout="constrained")
+    ax = fig.subplots()
+    ax.stackplot(frame.index, frame.T.to_numpy(), labels=list(frame.columns), alpha=0.85)
+    ax.set_ylabel(f"{unit}별 지출 (원)")
+    ax.yaxis.set_major_formatter(FuncFormatter(_won))
+    ax.set_xlim(frame.index[0], frame.index[-1])
+    ax.margins(y=0.05)
+    ax.grid(axis="y", alpha=0.3)
+    ax.legend(loc="upper left", bbox_to_anchor=(1.0, 1.0), fontsize=8, frameon=False)
+    return _png(fig)
+
+
+# ---------- 캐시 ----------
+def cached_pivot(username, version, load_rollup):
+    """(사용자, 기록 버전)별로 캐시한 일 × 대분류 표. load_rollup()은 롤업 DataFrame을 반환합니다.
+
+    캐시 원본을 그대로 돌려주므로 고치지 말고 쓰세요.
+    """
+    return _cache.get_or_load(("pivot", username), version, lambda: day_category_pivot(load_rollup()), copy=False)
+
+
+def cached_charts(username, version, months, load_rollup, today=None):
+    """최근 months개월(0이면 전체)의 (달력 히트맵 PNG, 추이 PNG, 추이 단위)를 반환합니다.
+
+    (사용자, 기록 버전, 기간, 오늘 날짜)별로 캐시합니다. 기록이 없으면 None입니다.
+    """
+    today = today or datetime.now()
+
+    def draw():
+        pivot = cached_pivot(username, version, load_rollup)
+        if pivot.empty:
+            return None
+        frame = select_range(pivot, months, today)
+        trend, unit = downsample(frame)
+        return calendar_heatmap(frame.sum(axis=1)), category_trend(trend, unit), unit
+    return _cache.get_or_load(("charts", username, months, today.date()), version, draw, copy=False)
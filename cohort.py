@@ -0,0 +1,184 @@
+"""학급(여러 사용자) 소비 통계.
+
+선생님이 학급 전체의 주간 평균 지출, 충동 구매 비율, 카테고리별 감정 분포를 볼 수
+있도록 모든 사용자의 기록을 프로세스 풀에서 나눠 읽고 사용자별 요약을 합칩니다.
+
+- 사용자별 요약은 주차별, 대분류별 지표(analytics.METRIC_COLUMNS)입니다. 주차별 지표는
+  대시보드의 주간 진단(summarize_weeks / week_stats)과 같은 값을 냅니다.
+- 요약은 그 사용자의 기록 버전(storage의 data_version)과 함께 사용자별 상태로 저장하므로,
+  다시 실행하면 기록이 바뀐 사용자만 다시 읽고 계산합니다.
+
+    python cohort.py --workers 4 --weeks 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import analytics
+import storage
+
+STATE_NAME = "cohort_summary"
+COHORT_WORKERS = int(os.environ.get("MONEYMONI_COHORT_WORKERS", str(os.cpu_count() or 2))) # 요약 계산 프로세스 수
+MIN_PARALLEL_USERS = 4 # 다시 계산할 사용자가 이보다 적으면 프로세스를 띄우지 않고 바로 계산
+
+
+# ---------- 사용자별 요약 ----------
+def summarize_records(df):
+    """기록 DataFrame의 요약을 만듭니다. 날짜가 없는 기록은 제외합니다.
+
+    {"weeks": {주차 키: 지표}, "categories": {대분류: 지표}} 형태이며, 지표는
+    analytics.METRIC_COLUMNS 순서의 리스트입니다. (JSON으로 저장할 수 있음)
+    """
+    ind = analytics.record_indicators(df)
+    weeks = ind.groupby("year_week")[analytics.METRIC_COLUMNS].sum()
+    categories = ind.groupby("대분류", observed=True)[analytics.METRIC_COLUMNS].sum()
+    return {
+        "weeks": {str(w): values for w, values in zip(weeks.index, weeks.values.tolist())},
+        "categories": {str(c): values for c, values in zip(categories.index, categories.values.tolist())},
+    }
+
+
+def weeks_frame(summary):
+    """요약의 주차별 지표를 DataFrame(year_week, 지표 컬럼)으로 반환합니다.
+
+    analytics.summarize_weeks에 그대로 넘기면 대시보드와 같은 주간 통계 표가 됩니다.
+    """
+    frame = pd.DataFrame(list(summary["weeks"].values()), columns=analytics.METRIC_COLUMNS)
+    frame.insert(0, "year_week", [int(w) for w in summary["weeks"]])
+    return frame
+
+
+_worker_backend = None
+
+def _backend_spec(backend):
+    if isinstance(backend, storage.SqliteBackend):
+        return ("sqlite", os.path.abspath(backend.path))
+    return ("csv", os.path.abspath(backend.base_dir))
+
+def _init_worker(spec):
+    global _worker_backend
+    name, path = spec
+    _worker_backend = storage.make_backend(name, base_dir=path, db_path=path)
+
+def _summarize_user(username):
+    return username, summarize_records(_worker_backend.load_records(username))
+
+
+def _compute(backend, usernames, workers):
+    if workers <= 1 or len(usernames) < MIN_PARALLEL_USERS:
+        return [(username, summarize_records(backend.load_records(username))) for username in usernames]
+    workers = min(workers, len(usernames))
+    # fork가 훨씬 빠르지만, 다른 스레드가 도는 프로세스(Streamlit 서버 등)에서는 잠금 상태까지
+    # 복사되어 멈출 수 있으므로 spawn을 사용
+    fork_safe = threading.active_count() == 1 and "fork" in multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if fork_safe else "spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(_backend_spec(backend),)) as pool:
+        return list(pool.map(_summarize_user, usernames, chunksize=max(1, len(usernames) // (workers * 4))))
+
+
+def _refresh(usernames, workers):
+    backend = storage.get_backend()
+    summaries, stale = {}, {}
+    for username in usernames:
+        version = json.loads(json.dumps(backend.data_version("records", username))) # 저장된 값과 같은 형태로
+        cached = backend.load_state(username, STATE_NAME)
+        if cached is not None and cached.get("version") == version:
+            summaries[username] = cached["summary"]
+        else:
+            stale[username] = version
+    # 버전은 읽기 전에 확인했으므로, 계산 중에 바뀐 사용자는 다음 실행 때 다시 계산됨
+    for username, summary in _compute(backend, list(stale), workers):
+        backend.save_state(username, STATE_NAME, {"version": stale[username], "summary": summary})
+        summaries[username] = summary
+    return summaries, sorted(stale)
+
+
+def user_summaries(usernames=None, workers=COHORT_WORKERS):
+    """사용자별 요약 {username: summary}를 반환합니다. 기록이 바뀐 사용자만 다시 계산합니다."""
+    if usernames is None:
+        usernames = storage.get_backend().list_usernames()
+    return _refresh(usernames, workers)[0]
+
+
+# ---------- 학급 통계 ----------
+def _ratio(part, whole):
+    return (part / whole.where(whole > 0)).fillna(0).round(3)
+
+
+def cohort_report(summaries, weeks=None):
+    """사용자별 요약을 합쳐 학급 통계 표를 만듭니다.
+
+    {"users": 사용자별, "weeks": 주차별, "categories": 대분류별} DataFrame dict를 반환합니다.
+    weeks를 주면 주차별 표는 최근 weeks개 주차만 남깁니다.
+    """
+    count_cols = analytics.COUNT_METRICS
+    emotions = analytics.EMOTIONS
+
+    user_rows = {}
+    for username, summary in summaries.items():
+        if not summary["weeks"]:
+            continue
+        table = analytics.summarize_weeks(weeks_frame(summary)) # 대시보드 주간 진단과 같은 표
+        totals = pd.DataFrame(list(summary["weeks"].values()), columns=analytics.METRIC_COLUMNS).sum()
+        rated = totals[emotions]
+        user_rows[username] = {
+            "기록 주 수": len(table),
+            "주 평균 지출": int(table["총 지출"].mean()),
+            "기록 수": int(totals["건수"]),
+            "충동 구매 비율": round(totals["충동 구매 횟수"] / totals["건수"], 3) if totals["건수"] else 0.0,
+            "가장 많은 소비 감정": rated.idxmax() if rated.sum() > 0 else "기록 부족",
+        }
+    users = pd.DataFrame.from_dict(user_rows, orient="index")
+
+    week_rows = [[username, int(w), *values] for username, summary in summaries.items()
+                 for w, values in summary["weeks"].items()]
+    long = pd.DataFrame(week_rows, columns=["username", "year_week"] + analytics.METRIC_COLUMNS)
+    sums = long.groupby("year_week")[analytics.METRIC_COLUMNS].sum()
+    students = long.groupby("year_week").size() # 사용자-주차 행은 하나씩이므로 그 주에 기록한 학생 수
+    by_week = pd.DataFrame({"학생 수": students, "평균 지출": (sums["금액"] / students).round().astype("int64")})
+    for name in count_cols:
+        by_week[name.replace("횟수", "비율")] = _ratio(sums[name], sums["건수"])
+    by_week = by_week.sort_index()
+    if weeks is not None:
+        by_week = by_week.iloc[-weeks:]
+    by_week.index = [analytics.format_week(w) for w in by_week.index]
+
+    cat_rows = [[category, *values] for summary in summaries.values()
+                for category, values in summary["categories"].items()]
+    cats = pd.DataFrame(cat_rows, columns=["대분류"] + analytics.METRIC_COLUMNS).groupby("대분류")[analytics.METRIC_COLUMNS].sum()
+    by_category = pd.DataFrame({"지출 합계": cats["금액"].astype("int64"), "기록 수": cats["건수"],
+                                "충동 구매 비율": _ratio(cats["충동 구매 횟수"], cats["건수"])})
+    rated = cats[emotions].sum(axis=1)
+    for emo in emotions: # 감정을 입력한 기록 중 비율
+        by_category[f"{emo} 비율"] = _ratio(cats[emo], rated)
+    by_category = by_category.sort_values("지출 합계", ascending=False)
+
+    return {"users": users, "weeks": by_week, "categories": by_category}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="학급 전체의 소비 통계를 계산합니다.")
+    parser.add_argument("--users", nargs="+", help="대상 사용자 (기본: 전체)")
+    parser.add_argument("--workers", type=int, default=COHORT_WORKERS, help="요약 계산 프로세스 수")
+    parser.add_argument("--weeks", type=int, default=8, help="주차별 표에 보여 줄 최근 주 수")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    usernames = args.users or storage.get_backend().list_usernames()
+    summaries, recomputed = _refresh(usernames, args.workers)
+    report = cohort_report(summaries, weeks=args.weeks)
+    print(f"사용자 {len(summaries)}명 (다시 계산 {len(recomputed)}명), {time.perf_counter() - t0:.2f}초\n")
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        for title, key in [("주차별", "weeks"), ("대분류별", "categories"), ("사용자별", "users")]:
+            print(f"[{title}]\n{report[key].to_string() if not report[key].empty else '기록 없음'}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""중복 기록 판별 키.
+
+같은 지출을 두 번 가져오지 않도록 (시각, 금액, 세부항목)으로 중복 키를 만듭니다.
+키는 "YYYY-MM-DD HH:MM:SS|금액|세부항목" 문자열의 64비트 해시이며, 여러 기록은
+문자열 연산과 해시를 벡터 연산으로(dedupe_keys), 한 건은 같은 함수로(dedupe_key)
+계산하므로 두 경로의 키가 같습니다. 날짜가 없는(NaT) 기록은 키가 없습니다.
+
+키는 가져오기(importer.py)에서만 쓰므로 기록을 추가할 때마다 갱신하는 파생 상태로 두지
+않습니다. SQLite는 기록마다 키 컬럼을 인덱스와 함께 저장하고, CSV는 가져올 기록의 시각
+범위만 읽어 비교합니다. (storage.existing_dedupe_keys)
+"""
+import numpy as np
+import pandas as pd
+
+
+def _hash(strings):
+    return pd.util.hash_array(np.asarray(strings, dtype=object)).view(np.int64)
+
+
+def dedupe_keys(df):
+    """기록 DataFrame의 중복 키를 Series(int64)로 반환합니다. 날짜가 없는 기록은 제외됩니다."""
+    dts = pd.to_datetime(df["datetime_iso"], errors='coerce', format="ISO8601")
+    valid = dts.notna()
+    text = (dts[valid].dt.strftime("%Y-%m-%d %H:%M:%S")
+            + "|" + df.loc[valid, "금액"].fillna(0).astype("int64").astype(str)
+            + "|" + df.loc[valid, "세부항목"].astype(str))
+    return pd.Series(_hash(text.to_numpy()), index=text.index, dtype="int64")
+
+
+def dedupe_key(rec):
+    """기록 한 건(dict)의 중복 키를 반환합니다. 날짜가 없으면 None."""
+    dt = pd.to_datetime(rec.get("datetime_iso"), errors='coerce')
+    if pd.isnull(dt):
+        return None
+    amount = rec.get("금액")
+    amount = 0 if amount is None or pd.isnull(amount) else int(amount)
+    return int(_hash([f"{dt.strftime('%Y-%m-%d %H:%M:%S')}|{amount}|{rec.get('세부항목')}"])[0])
+
@@ -0,0 +1,98 @@
+"""데모 계정(kim, oh, choi)과 그 지출 기록.
+
+Streamlit 없이 쓰는 모듈이며, 등록과 저장은 engine.seed_demo_users가 합니다.
+기록은 START_DATE(월요일)부터 일주일 동안의 실제 청소년 지출을 옮긴 것입니다.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from importer import CATEGORY_MAP
+
+DEMO_PASSWORD = "test1234"
+DEMO_BUDGETS = {"kim": 70000, "oh": 100000, "choi": 120000} # 월 예산
+
+# 고정된 시작 날짜 (2025년 11월 17일 월요일)
+START_DATE = datetime(2025, 11, 17)
+
+# 사용자별 기록: (START_DATE부터 며칠째, 시각, 금액, 대분류, 세부항목, 계획 여부, 과시소비, 모방소비, 감정, 감정 이유)
+DEMO_RECORDS = {
+    "kim": [
+        (0, '18:40:00', 3500, '식비', '음료수', False, '아니오', '아니오', '좋음', '맛있어서'),
+        (0, '19:00:00', 1350, '교통', '버스비', True, '아니오', '아니오', '보통', ''),
+        (1, '23:35:00', 900, '식비', '아이스크림', False, '아니오', '예', '', ''),
+        (1, '19:30:00', 1350, '교통', '버스비', True, '아니오', '예', '', ''),
+        (2, '18:28:00', 2500, '식비', '음료수', False, '아니오', '아니오', '좋음', '결명자차기 맛있었다!!'),
+        (2, '21:50:00', 4150, '교통', '택시비', False, '아니오', '아니오', '나쁨', '안 나가도 될 돈 나감'),
+        (3, '19:35:00', 3000, '기타', '교회 준비물', True, '아니오', '아니오', '', ''),
+        (3, '21:00:00', 2000, '기타', '노트', False, '아니오', '아니오', '보통', ''),
+        (3, '21:01:00', 5900, '의류/패션/잡화', '장갑', False, '아니오', '아니오', '좋음', '장갑 귀여움'),
+        (4, '17:37:00', 6000, '학습 자료', '학술제 논문', True, '아니오', '예', '나쁨', '너무 오래됨'),
+        (4, '19:43:00', 1800, '기타', '볼펜', False, '예', '아니오', '보통', ''),
+        (5, '09:40:00', 4700, '교통', '택시비', False, '아니오', '예', '', ''),
+        (5, '13:03:00', 15000, '의류/패션/잡화', '선크림', False, '아니오', '아니오', '', ''),
+        (5, '15:40:00', 1350, '교통', '버스비', True, '아니오', '아니오', '보통', ''),
+        (6, '07:40:00', 4700, '교통', '택시비', True, '아니오', '아니오', '', ''),
+        (6, '12:31:00', 1500, '식비', '삼김', False, '아니오', '예', '', ''),
+        (6, '17:32:00', 3500, '식비', '음료수', True, '아니오', '예', '보통', ''),
+    ],
+
+    "oh": [
+        (0, '21:40:00', 2300, '식비', '아이스크림', False, '아니오', '예', '나쁨', '추워짐'),
+        (0, '23:40:00', 36000, '학습 자료', '인강 정기결제', True, '아니오', '아니오', '나쁨', '취소 깜빡'),
+        (1, '23:35:00', 1500, '식비', '카페 디저트', False, '아니오', '예', '좋음', '맛있음'),
+        (1, '21:30:00', 6500, '교통', '택시비', True, '아니오', '아니오', '보통', ''),
+        (2, '18:28:00', 900, '식비', '멘토스', False, '아니오', '아니오', '나쁨', '개노맛'),
+        (2, '18:35:00', 4500, '식비', '카페 음료', True, '아니오', '아니오', '나쁨', '배부른데 먹음'),
+        (3, '21:35:00', 4500, '교통', '택시비', True, '아니오', '아니오', '보통', ''),
+        (3, '23:00:00', 12400, '식비', '아이스크림', False, '예', '아니오', '좋음', '쟁여둠'),
+        (4, '17:37:00', 6000, '학습 자료', '학술제 논문', True, '아니오', '예', '나쁨', ''),
+        (4, '19:20:00', 4400, '기타', '애플 클라우드', True, '예', '예', '나쁨', ''),
+        (5, '13:20:00', 10000, '식비', '에너지음료', False, '아니오', '예', '좋음', '배송 기다림'),
+        (5, '13:20:00', 24400, '의류/패션/잡화', '수딩젤', False, '아니오', '예', '좋음', ''),
+        (5, '18:00:00', 1500, '식비', '토스트', False, '아니오', '아니오', '나쁨', '잘못 고름'),
+        (6, '15:31:00', 1500, '식비', '젤리', False, '아니오', '예', '나쁨', ''),
+        (6, '17:32:00', 3700, '식비', '음료수', True, '아니오', '예', '보통', ''),
+    ],
+
+    "choi": [
+        (0, '08:42:00', 4000, '교통', '택시비', True, '아니오', '아니오', '보통', ''),
+        (0, '11:46:00', 57700, '기타', '병원', True, '아니오', '아니오', '나쁨', '몸 관리 부족'),
+        (0, '11:49:00', 4600, '기타', '병원', True, '아니오', '아니오', '나쁨', ''),
+        (1, '23:05:00', 1000, '문화 생활', '웹툰', False, '아니오', '아니오', '나쁨', ''),
+        (1, '23:35:00', 2000, '식비', '편의점', False, '아니오', '아니오', '좋음', ''),
+        (2, '18:28:00', 12500, '식비', '배달', False, '아니오', '예', '보통', ''),
+        (2, '19:32:00', 2700, '의류/패션/잡화', '올리브영', False, '예', '예', '좋음', ''),
+        (3, '17:00:00', 3000, '식비', '편의점', False, '아니오', '아니오', '좋음', ''),
+        (3, '17:42:00', 6700, '식비', '카페', False, '아니오', '예', '보통', ''),
+        (4, '08:04:00', 3750, '식비', '마트', False, '아니오', '아니오', '나쁨', ''),
+        (4, '23:35:00', 2000, '식비', '편의점', False, '아니오', '아니오', '좋음', ''),
+        (5, '11:02:00', 1100, '기타', '애플 클라우드', True, '아니오', '아니오', '나쁨', ''),
+        (5, '19:03:00', 3000, '문화 생활', '노래방', False, '아니오', '아니오', '좋음', ''),
+        (6, '14:37:00', 3600, '식비', '카페', False, '예', '예', '좋음', ''),
+        (6, '14:53:00', 2500, '식비', '마트', False, '아니오', '아니오', '보통', ''),
+    ]
+}
+
+
+def demo_frame(username):
+    """사용자의 데모 기록을 앱의 기록 형식(id 제외) DataFrame으로 반환합니다. 없는 사용자면 빈 DataFrame."""
+    rows = DEMO_RECORDS.get(username, [])
+    columns = ["day_offset", "time_str", "금액", "대분류", "세부항목", "is_planned", "과시소비", "모방소비", "감정", "감정 이유"]
+    raw = pd.DataFrame(rows, columns=columns)
+    if raw.empty:
+        return raw
+    dts = pd.to_datetime(raw["time_str"].map(lambda t: f"{START_DATE:%Y-%m-%d} {t}")) + pd.to_timedelta(raw["day_offset"], unit="D")
+    return pd.DataFrame({
+        "날짜": dts.dt.strftime("%Y-%m-%d"),
+        "시간": dts.dt.strftime("%H:%M:%S"),
+        "datetime_iso": dts,
+        "대분류": raw["대분류"].map(lambda c: CATEGORY_MAP.get(c, c)),
+        "세부항목": raw["세부항목"],
+        "금액": raw["금액"].astype(float),
+        "계획됨": raw["is_planned"].map({True: "예", False: "아니오"}),
+        "과시소비": raw["과시소비"],
+        "모방소비": raw["모방소비"],
+        "감정": raw["감정"],
+        "감정 이유": raw["감정 이유"],
+    })
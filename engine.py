@@ -0,0 +1,365 @@
+"""머니모니 엔진: 화면 없이 쓰는 데이터/분석 API.
+
+app.py가 쓰는 기록 추가, 감정 저장, 최근 기록, 감정 대기열, 주간 분석, 뱃지,
+가입/로그인, 데모 데이터 생성과 학급 통계를 Streamlit 없이 호출할 수 있게 모았습니다.
+이 모듈의 함수는 화면에 아무것도 그리지 않고(st 호출, print 없음) 결과 값만
+반환하므로 배치 작업, 노트북, 벤치마크에서 그대로 씁니다.
+
+    import engine
+    alerts, flags = engine.add_record("kim", engine.new_record("교통", "버스비", 1350), weekly_budget=17500)
+    badge_list, missions = engine.badge_report("kim")
+
+pandas와 저장소(storage, analytics 등)는 무겁기 때문에 모듈을 불러올 때가 아니라
+각 함수가 처음 필요할 때 불러옵니다. 그래서 로그인 화면은 이 모듈과 auth만
+불러온 상태로 그려지고, pandas는 로그인하거나 데모 데이터를 만들 때 처음 로드됩니다.
+
+앱이 쓰는 함수는 timing.timed로 감싸 두어, 디버그 패널에서 측정을 켜면 함수별
+시간이 재실행 단위로 모입니다. (끄면 비용이 거의 없음)
+
+파생 상태를 읽는 함수는 workspace(Workspace)를 받을 수 있습니다. 주면 저장소 대신
+세션이 들고 있는 사본을 쓰고, 기록을 추가/수정할 때 사본도 제자리에서 고칩니다.
+"""
+import uuid
+from datetime import datetime
+
+from timing import timed
+
+
+# ---------- 세션 작업 사본 ----------
+class Workspace:
+    """한 세션이 화면에 쓰는 파생 상태(롤업, 최근 기록, 감정 대기열, 뱃지, 지출 누계, 소비 통계)의 사본.
+
+    상태는 처음 쓸 때 한 번 읽습니다. 이 세션이 workspace를 넘겨 기록을 추가/수정하면
+    storage가 같은 잠금 안에서 저장소와 같은 변경(apply_insert / apply_update)을 사본에도
+    적용하므로(commit), 저장 뒤 화면을 다시 그릴 때 상태 파일이나 DB를 다시 읽지 않습니다.
+    다른 세션/기기가 기록을 바꾸면 기록 버전이 달라지므로 sync()나 다음 commit에서 사본을
+    버리고 다시 읽습니다.
+    """
+
+    def __init__(self, username):
+        import storage
+        self.username = username
+        self.version = storage.records_version(username)
+        self._states = {}
+        self._frames = {} # 상태에서 만든 DataFrame (상태가 바뀌면 지움)
+
+    def _reset(self, version):
+        self.version = version
+        self._states.clear()
+        self._frames.clear()
+
+    def sync(self):
+        """다른 곳에서 기록이 바뀌었으면 사본을 버립니다. 버렸으면 True를 반환합니다."""
+        import storage
+        version = storage.records_version(self.username)
+        if version == self.version:
+            return False
+        self._reset(version)
+        return True
+
+    def state(self, name):
+        """파생 상태 사본을 반환합니다. (호출한 쪽에서 고치면 안 됨)"""
+        if name not in self._states:
+            import storage
+            self._states[name] = storage.load_derived(self.username, name)
+        return self._states[name]
+
+    def frame(self, name, to_frame):
+        """상태 name을 to_frame으로 바꾼 DataFrame을 상태가 바뀔 때까지 재사용합니다."""
+        if name not in self._frames:
+            self._frames[name] = to_frame(self.state(name))
+        return self._frames[name]
+
+    def commit(self, old_version, new_version, apply):
+        """storage가 기록을 쓴 뒤 같은 잠금 안에서 부릅니다.
+
+        쓰기 전 버전이 사본의 버전과 같으면 들고 있는 상태에 apply(module, state)를 적용하고,
+        다르면(그 사이 다른 곳에서 바뀜) 사본을 버립니다.
+        """
+        if old_version != self.version:
+            self._reset(new_version)
+            return
+        import storage
+        for name, state in self._states.items():
+            apply(storage.DERIVED_STATES[name], state)
+        self._frames.clear()
+        self.version = new_version
+
+
+def _state(username, name, workspace=None):
+    if workspace is not None:
+        return workspace.state(name)
+    import storage
+    return storage.load_derived(username, name)
+
+def _records_version(username, workspace=None):
+    if workspace is not None:
+        return workspace.version
+    import storage
+    return storage.records_version(username)
+
+
+# ---------- 가입 / 로그인 ----------
+def user_exists(username):
+    """해당 아이디가 등록되어 있는지 확인합니다."""
+    from user_directory import get_user_directory
+    return get_user_directory().exists(username)
+
+def register_user(username, password):
+    """새 사용자를 등록합니다. 이미 있는 아이디면 False를 반환합니다."""
+    from auth import hash_password
+    from user_directory import get_user_directory
+    return get_user_directory().register(username, hash_password(password))
+
+def start_login(username, password, ip):
+    """시도 제한을 적용해 로그인 검증을 시작하고 기다리지 않고 돌아옵니다.
+
+    (검증 Future, 차단 시 남은 초, 등록된 아이디인지) 튜플을 반환합니다. 차단 중이면 Future는
+    None입니다. Future가 끝나면(done) finish_login에 넘기세요.
+    """
+    from auth import start_login as start
+    from user_directory import get_user_directory
+    hashed = get_user_directory().get_hash(username)
+    future, retry_after = start(username, password, hashed, ip)
+    return future, retry_after, hashed is not None
+
+def finish_login(username, ip, future):
+    """start_login의 끝난 Future 결과를 시도 제한에 반영하고 성공 여부를 반환합니다."""
+    from auth import finish_login as finish
+    return finish(username, ip, future)
+
+def check_login(username, password, ip):
+    """start_login과 같되 bcrypt 검증이 끝날 때까지 기다립니다. (CLI와 벤치마크용)
+
+    (성공 여부, 차단 시 남은 초, 등록된 아이디인지) 튜플을 반환합니다.
+    """
+    from auth import verify_login
+    from user_directory import get_user_directory
+    hashed = get_user_directory().get_hash(username)
+    ok, retry_after = verify_login(username, password, hashed, ip)
+    return ok, retry_after, hashed is not None
+
+
+# ---------- 지출 / 감정 기록 ----------
+def new_record(category, detail, amount, planned="예", flashy="아니오", imitation="아니오", now=None):
+    """입력값으로 새 기록(dict)을 만듭니다. 세부 항목이 없으면 대분류로 대체합니다."""
+    now = now or datetime.now()
+    return {
+        "id": str(uuid.uuid4()),
+        "날짜": now.strftime("%Y-%m-%d"),
+        "시간": now.strftime("%H:%M:%S"),
+        "datetime_iso": now,
+        "대분류": category,
+        "세부항목": detail if detail else category,
+        "금액": int(amount), # 원 단위 정수
+        "계획됨": planned,
+        "과시소비": flashy,
+        "모방소비": imitation,
+        "감정": "",
+        "감정 이유": "", # 감정은 30분 뒤부터 입력
+    }
+
+@timed
+def add_record(username, rec, weekly_budget=0, now=None, workspace=None):
+    """기록 한 건을 추가하고 (초과된 지출 한도 규칙 목록, 이상 지출 목록)을 반환합니다.
+
+    한도 규칙은 spending.evaluate, 이상 지출은 anomaly.evaluate 결과입니다. 이상 지출은
+    이 기록을 반영하기 전의 평소 통계와 비교합니다. weekly_budget이 0이면 한도는 확인하지 않습니다.
+    """
+    import anomaly
+    import spending
+    import storage
+    flags = anomaly.evaluate(_state(username, anomaly.STATE_NAME, workspace), rec)
+    storage.append_record(username, rec, workspace=workspace)
+    if weekly_budget <= 0:
+        return [], flags
+    state = _state(username, spending.STATE_NAME, workspace)
+    return [alert for alert in spending.evaluate(state, weekly_budget, now=now or rec["datetime_iso"])
+            if alert["exceeded"]], flags
+
+@timed
+def rate_emotions(username, updates, workspace=None):
+    """감정 입력을 한 번의 쓰기로 저장합니다. updates는 (id, 바꿀 값, 수정 전 기록) 목록입니다."""
+    import storage
+    storage.update_records(username, updates, workspace=workspace)
+
+@timed
+def recent_records(username, n, workspace=None):
+    """최근 기록 n건을 최신순 DataFrame으로 반환합니다."""
+    import recent
+    return recent.to_frame(_state(username, recent.STATE_NAME, workspace), n=n)
+
+@timed
+def pending_ids(username, now=None, workspace=None):
+    """감정 입력이 가능한(소비 후 30분이 지난) 기록 id를 시각 순으로 반환합니다."""
+    import pending
+    return pending.eligible(_state(username, pending.STATE_NAME, workspace), now=now)
+
+@timed
+def pending_entries(username, now=None, workspace=None):
+    """pending_ids와 같되 (시각, id) 목록을 반환합니다. 시각은 get_records의 times로 넘깁니다."""
+    import pending
+    return [tuple(entry) for entry in pending.eligible_entries(_state(username, pending.STATE_NAME, workspace), now=now)]
+
+def hidden_pending_count(username, workspace=None):
+    """감정이 비어 있지만 아직 대기열에 없는 오래된 기록 수. (대기열이 줄면 다시 채워짐)"""
+    import pending
+    return pending.hidden_count(_state(username, pending.STATE_NAME, workspace))
+
+@timed
+def get_records(username, ids, times=None):
+    """id 목록의 기록을 같은 순서의 DataFrame으로 반환합니다. (times는 storage.get_records 참고)"""
+    import storage
+    return storage.get_records(username, ids, times)
+
+
+# ---------- 분석 ----------
+@timed
+def has_records(username, workspace=None):
+    """날짜가 있는 기록이 한 건이라도 있는지 확인합니다. (전체 기록 대신 최근 기록 목록만 읽음)"""
+    import recent
+    return bool(_state(username, recent.STATE_NAME, workspace)["records"])
+
+@timed
+def rollup_frame(username, workspace=None):
+    """일 × 카테고리 롤업을 DataFrame으로 반환합니다. (날짜가 없는 기록은 제외)
+
+    workspace를 주면 사본이 바뀔 때까지 같은 DataFrame을 돌려주므로 고치지 말고 쓰세요.
+    """
+    import rollup
+    import storage
+
+    def to_frame(state): # 상태에는 최근 몇 달의 칸만 있으므로 이전 기간(캐시)을 앞에 붙임
+        return rollup.to_frame(state, storage.load_rollup_archive(username, state))
+    if workspace is not None:
+        return workspace.frame(rollup.STATE_NAME, to_frame)
+    return to_frame(_state(username, rollup.STATE_NAME))
+
+@timed
+def spending_pivot(username, workspace=None):
+    """일 × 대분류 지출 표(기록이 없는 날은 0)를 반환합니다. (charts.day_category_pivot 참고)
+
+    (사용자, 기록 버전)별로 캐시하므로 주차를 바꿔도 다시 계산하지 않습니다. 고치지 말고 쓰세요.
+    """
+    import charts
+    return charts.cached_pivot(username, _records_version(username, workspace),
+                               lambda: rollup_frame(username, workspace))
+
+@timed
+def long_range_charts(username, months, workspace=None, today=None):
+    """최근 months개월(0이면 전체)의 (달력 히트맵 PNG, 대분류별 추이 PNG, 추이 단위)를 반환합니다.
+
+    기록이 없으면 None입니다. (사용자, 기록 버전, 기간)별로 캐시합니다.
+    """
+    import charts
+    return charts.cached_charts(username, _records_version(username, workspace), months,
+                                lambda: rollup_frame(username, workspace), today)
+
+@timed
+def record_weeks(username):
+    """기록이 있는 주차 키 목록(오름차순)을 반환합니다. 기록 대신 파티션 정보/인덱스만 읽습니다."""
+    import storage
+    return storage.load_weeks(username)
+
+@timed
+def week_records(username, yw):
+    """한 주(주차 키)의 기록을 시각 순 DataFrame으로 반환합니다. 그 주와 겹치는 달의 기록만 읽고,
+    기록이 바뀔 때까지 캐시합니다. (storage.load_week)
+    """
+    import storage
+    return storage.load_week(username, yw)
+
+@timed
+def weekly_report(username, weekly_budget, now=None, df_rollup=None):
+    """이번 주와 지난주의 진단 지표를 계산합니다.
+
+    {"cur_week", "prev_week", "stats_table", "current", "previous"} dict를 반환합니다.
+    stats_table은 추세 계산(analytics.weekly_trend, window_deltas)에 그대로 씁니다.
+    이미 읽은 롤업(rollup_frame 결과)을 df_rollup으로 넘기면 다시 읽지 않습니다.
+    """
+    from datetime import timedelta
+    from analytics import summarize_weeks, week_key, week_stats
+    now = now or datetime.now()
+    cur_week, prev_week = week_key(now), week_key(now - timedelta(days=7))
+    table = summarize_weeks(rollup_frame(username) if df_rollup is None else df_rollup)
+    return {
+        "cur_week": cur_week,
+        "prev_week": prev_week,
+        "stats_table": table,
+        "current": week_stats(table, cur_week, weekly_budget),
+        "previous": week_stats(table, prev_week, weekly_budget),
+    }
+
+@timed
+def impulse_patterns(username, workspace=None):
+    """되풀이되는 충동 소비 시간대 [(대분류, 시, 건수), ...]를 반환합니다. (anomaly.impulse_patterns)"""
+    import anomaly
+    return anomaly.impulse_patterns(_state(username, anomaly.STATE_NAME, workspace))
+
+@timed
+def badge_report(username, workspace=None):
+    """(뱃지 목록, 기간 미션 목록)을 badges.evaluate 형식으로 반환합니다."""
+    import badges
+    state = _state(username, badges.STATE_NAME, workspace)
+    return badges.evaluate(state, badges.BADGES), badges.evaluate(state, badges.MISSIONS)
+
+
+def cohort_report(usernames=None, weeks=None):
+    """학급(여러 사용자) 통계 표 dict를 반환합니다. (cohort.cohort_report 참고)
+
+    사용자별 요약은 기록이 바뀐 사용자만 프로세스 풀에서 다시 계산합니다.
+    """
+    import cohort
+    return cohort.cohort_report(cohort.user_summaries(usernames), weeks=weeks)
+
+
+# ---------- 예산 / 계획 ----------
+@timed
+def load_budget(username):
+    """월 예산을 읽습니다. 저장된 값이 없으면 기본 예산."""
+    import storage
+    return storage.load_user_budget(username)
+
+@timed
+def save_budget(username, budget):
+    import storage
+    storage.save_user_budget(username, budget)
+
+@timed
+def load_plan(username, week=None):
+    """week 주차(기본값은 이번 주)의 (성찰, 계획) 문자열 튜플을 읽습니다."""
+    import storage
+    return storage.load_plan(username, week)
+
+@timed
+def save_plan(username, reflection, plan, week=None):
+    import storage
+    storage.save_plan(username, reflection, plan, week)
+
+def plan_weeks(username):
+    """성찰/계획을 저장한 주차 키 목록 (최근 주차부터)."""
+    import storage
+    return storage.plan_weeks(username)
+
+
+# ---------- 데모 데이터 ----------
+def seed_demo_users():
+    """데모 계정(demo.DEMO_BUDGETS)을 처음부터 다시 만들고 기록과 예산을 저장합니다.
+
+    사용자별 (아이디, 새로 등록되었는지, 저장한 기록 수) 목록을 반환합니다.
+    """
+    import demo
+    import storage
+    from auth import hash_password
+    from importer import import_frame
+    from user_directory import get_user_directory
+    hashed = hash_password(demo.DEMO_PASSWORD)
+    users = get_user_directory()
+    results = []
+    for username, budget in demo.DEMO_BUDGETS.items():
+        storage.delete_user_files(username) # 기존 기록과 파생 상태를 지우고 완전히 초기화
+        registered = users.register(username, hashed)
+        added, _ = import_frame(username, demo.demo_frame(username))
+        storage.save_user_budget(username, budget)
+        results.append((username, registered, added))
+    return results
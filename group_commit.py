@@ -0,0 +1,61 @@
+"""그룹 커밋 쓰기.
+
+점심시간이 끝난 뒤 반 전체가 한꺼번에 지출을 기록하면 기록마다 fsync(또는
+SQLite 커밋)가 한 번씩 일어나 처리량이 떨어집니다. GroupCommitWriter는 같은
+대상(사용자, DB 경로 등)에 대한 동시 쓰기 요청을 모아, 먼저 온 요청의 스레드가
+(리더) 쌓인 요청 전체를 한 번의 flush로 처리합니다. 리더가 flush하는 동안 들어온
+요청은 다음 리더가 한꺼번에 처리하므로, 혼자 쓸 때는 기다리는 시간이 없고
+동시에 쓸수록 한 번의 flush가 더 많은 요청을 처리합니다. 리더는 대상마다 하나이며,
+다른 대상의 요청은 동시에 flush됩니다.
+
+호출한 스레드는 자기 요청이 디스크에 기록된 뒤에 반환됩니다. 요청을 넣는 쪽이 대상의
+잠금을 잡은 채로 기다리면 요청이 모이지 않으므로, 잠금은 flush 안에서 잡아야 합니다.
+"""
+import threading
+from collections import defaultdict
+
+
+class GroupCommitWriter:
+    """flush(target, items)로 같은 target의 요청을 한 번에 처리하는 쓰기 큐."""
+
+    def __init__(self, flush):
+        self._flush = flush
+        self._cond = threading.Condition()
+        self._pending = defaultdict(list) # target -> 기다리는 요청
+        self._flushing = set() # 지금 flush 중인 target
+        self.batches = 0 # 지금까지 flush한 횟수 (통계용)
+        self.items = 0 # 지금까지 처리한 요청 수
+
+    def submit(self, target, item):
+        """요청 하나를 넣고 디스크에 기록될 때까지 기다립니다."""
+        entry = {"item": item, "done": False, "error": None}
+        with self._cond:
+            self._pending[target].append(entry)
+            while not entry["done"] and target in self._flushing:
+                self._cond.wait()
+            if not entry["done"]:
+                self._flushing.add(target) # 이 스레드가 target의 리더
+                batch = self._pending.pop(target)
+            else:
+                batch = None
+
+        if batch is not None:
+            self._run(target, batch)
+
+        if entry["error"] is not None:
+            raise entry["error"]
+
+    def _run(self, target, batch):
+        try:
+            self._flush(target, [entry["item"] for entry in batch])
+        except Exception as e: # 이 배치의 요청에만 실패를 알림
+            for entry in batch:
+                entry["error"] = e
+        finally:
+            with self._cond:
+                for entry in batch:
+                    entry["done"] = True
+                self.batches += 1
+                self.items += len(batch)
+                self._flushing.discard(target)
+                self._cond.notify_all()
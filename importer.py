@@ -0,0 +1,144 @@
+"""지출 내역 일괄 가져오기 (CSV / 은행·카드 내역 파일).
+
+파일을 IMPORT_CHUNK_ROWS행씩 나눠 읽으므로 1년치 내역도 메모리를 일정하게 쓰며
+처리합니다. 조각마다
+1. 열 이름(COLUMN_ALIASES)과 카테고리(CATEGORY_MAP)를 앱 형식으로 바꾸고
+2. 중복 키(dedupe.py)를 벡터 연산으로 계산해 이미 저장된 기록의 키와 비교한 뒤
+   (SQLite는 키 인덱스 조회, CSV는 그 조각의 시각 범위에 해당하는 월 파티션만 읽어 비교)
+3. 새 기록만 저장소 끝에 추가합니다. (기존 기록은 다시 쓰지 않음)
+
+    python importer.py kim 카드내역.csv --encoding cp949
+"""
+import argparse
+import uuid
+
+import pandas as pd
+
+import dedupe
+import storage
+
+IMPORT_CHUNK_ROWS = 5000 # 한 번에 읽고 저장하는 행 수
+
+# 카테고리 매핑 (사용자 입력 단순화 반영, 은행/카드 내역의 업종 이름 포함)
+CATEGORY_MAP = {
+    "식비": "식비(간식/외식 포함)",
+    "교통": "교통",
+    "기타": "기타",
+    "의류": "의류/패션/잡화",
+    "학습 자료": "학습 자료",
+    "문화 생활": "문화 생활(친구모임/영화 등)",
+    "미용": "미용(화장품 등)",
+    "의류/패션/잡화": "의류/패션/잡화",
+    "외식": "식비(간식/외식 포함)",
+    "카페": "식비(간식/외식 포함)",
+    "편의점": "식비(간식/외식 포함)",
+    "대중교통": "교통",
+    "택시": "교통",
+    "쇼핑": "의류/패션/잡화",
+    "뷰티": "미용(화장품 등)",
+    "교육": "학습 자료",
+    "서적": "학습 자료",
+    "문화": "문화 생활(친구모임/영화 등)",
+    "취미": "취미용품/굿즈",
+    "기부": "기부",
+}
+
+# 앱 필드 -> 내역 파일에서 쓰일 수 있는 열 이름 (앞에 있는 것을 우선 사용)
+COLUMN_ALIASES = {
+    "datetime_iso": ["datetime_iso", "거래일시", "이용일시", "일시"],
+    "날짜": ["날짜", "거래일자", "거래일", "이용일자", "이용일"],
+    "시간": ["시간", "거래시간", "이용시간"],
+    "금액": ["금액", "출금액", "이용금액", "결제금액", "거래금액"],
+    "세부항목": ["세부항목", "내용", "적요", "가맹점", "가맹점명", "사용처"],
+    "대분류": ["대분류", "카테고리", "분류", "업종"],
+}
+
+# 내역 파일에 없는 필드의 기본값. 계획 여부는 알 수 없으므로 None(저장하면 빈 값, "예"/"아니오"
+# 어느 쪽으로도 세지 않음). 감정은 앱에서 입력한 기록처럼 비워 두어 감정 대기열에 들어감
+DEFAULT_VALUES = {"계획됨": None, "과시소비": "아니오", "모방소비": "아니오", "감정": "", "감정 이유": ""}
+
+
+def _pick(raw, field):
+    for name in COLUMN_ALIASES[field]:
+        if name in raw.columns:
+            return raw[name]
+    return None
+
+
+def normalize_transactions(raw):
+    """내역 DataFrame을 앱의 기록 형식(id 제외)으로 바꿉니다. 날짜나 금액이 없는 행은 버립니다."""
+    dt = _pick(raw, "datetime_iso")
+    if dt is None:
+        day, time = _pick(raw, "날짜"), _pick(raw, "시간")
+        if day is None:
+            raise ValueError("내역 파일에 날짜 열이 없습니다.")
+        dt = day.astype(str) + (" " + time.astype(str) if time is not None else "")
+    dts = pd.to_datetime(dt, errors='coerce', format="mixed")
+
+    amount = _pick(raw, "금액")
+    if amount is None:
+        raise ValueError("내역 파일에 금액 열이 없습니다.")
+    # "12,300" 같은 문자열과 출금이 음수로 표시된 내역을 모두 양수 금액으로
+    amounts = pd.to_numeric(amount.astype(str).str.replace(",", "", regex=False), errors='coerce').abs()
+
+    detail = _pick(raw, "세부항목")
+    category = _pick(raw, "대분류")
+    category = category.map(lambda c: CATEGORY_MAP.get(c, c)) if category is not None else "기타"
+
+    df = pd.DataFrame({
+        "날짜": dts.dt.strftime("%Y-%m-%d"),
+        "시간": dts.dt.strftime("%H:%M:%S"),
+        "datetime_iso": dts,
+        "대분류": category,
+        "세부항목": detail.astype(str) if detail is not None else "",
+        "금액": amounts,
+    }, index=raw.index)
+    for field, default in DEFAULT_VALUES.items():
+        if field not in raw.columns:
+            df[field] = default
+        else:
+            df[field] = raw[field] if default is None else raw[field].fillna(default)
+    df["대분류"] = df["대분류"].fillna("기타")
+    return df[dts.notna() & (amounts > 0)]
+
+
+def import_frame(username, df):
+    """정리된 기록 DataFrame에서 새 기록만 추가하고 (추가 수, 중복으로 건너뛴 수)를 반환합니다.
+
+    앞 조각에서 추가한 기록도 저장소에 있으므로 조각 사이의 중복도 건너뜁니다.
+    """
+    if df.empty:
+        return 0, 0
+    keys = dedupe.dedupe_keys(df) # 날짜가 없는 기록은 키가 없으므로 가져오지 않음
+    is_new = ~keys.isin(storage.existing_dedupe_keys(username, df, keys)) & ~keys.duplicated()
+    new = df.loc[keys.index[is_new]].copy()
+    if not new.empty:
+        new.insert(0, "id", [str(uuid.uuid4()) for _ in range(len(new))])
+        storage.append_records(username, new)
+    return len(new), len(df) - len(new)
+
+
+def import_file(username, source, chunksize=IMPORT_CHUNK_ROWS, encoding="utf-8-sig"):
+    """CSV 내역 파일을 조각 단위로 가져오고 (추가 수, 건너뛴 수)를 반환합니다."""
+    added = skipped = 0
+    for chunk in pd.read_csv(source, chunksize=chunksize, dtype=str, encoding=encoding):
+        rows = normalize_transactions(chunk)
+        n_added, n_skipped = import_frame(username, rows)
+        added += n_added
+        skipped += n_skipped + len(chunk) - len(rows) # 날짜/금액이 잘못된 행 포함
+    return added, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="지출 내역 CSV 파일을 가져옵니다.")
+    parser.add_argument("username")
+    parser.add_argument("file")
+    parser.add_argument("--chunk-rows", type=int, default=IMPORT_CHUNK_ROWS, help="한 번에 처리할 행 수")
+    parser.add_argument("--encoding", default="utf-8-sig", help="파일 인코딩 (은행 내역은 보통 cp949)")
+    args = parser.parse_args(argv)
+    added, skipped = import_file(args.username, args.file, args.chunk_rows, args.encoding)
+    print(f"{added}건을 추가했습니다. (중복/잘못된 행 {skipped}건 건너뜀)")
+
+
+if __name__ == "__main__":
+    main()
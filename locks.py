@@ -0,0 +1,124 @@
+"""파일 잠금과 원자적 파일 쓰기.
+
+같은 사용자의 파일을 여러 세션(브라우저 탭)이나 여러 프로세스가 동시에 읽고
+고쳐 쓰면 마지막에 쓴 쪽만 남습니다. storage는 읽고-고치고-쓰는 작업을
+사용자별 잠금(file_lock) 안에서 하고, 파일 전체를 다시 쓸 때는 임시 파일에 쓴
+뒤 이름을 바꿔(atomic_write) 쓰는 도중에 중단되어도 이전 내용이 남게 합니다.
+
+잠금은 잠금 파일에 거는 OS 잠금(fcntl / msvcrt)이라 다른 프로세스와도
+배타적이고, 같은 스레드 안에서는 다시 잡을 수 있습니다.
+"""
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_TIMEOUT_SECONDS = float(os.environ.get("MONEYMONI_LOCK_TIMEOUT", "30")) # 잠금을 기다리는 최대 시간
+_POLL_SECONDS = 0.005
+
+
+def _try_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """잠금 파일 하나에 대한 프로세스 간 배타 잠금. 같은 스레드에서는 중첩해서 잡을 수 있습니다."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, timeout=None):
+        timeout = LOCK_TIMEOUT_SECONDS if timeout is None else timeout
+        if not self._thread_lock.acquire(timeout=timeout):
+            raise TimeoutError(f"잠금을 얻지 못했습니다: {self.path}")
+        if self._depth == 0:
+            deadline = time.monotonic() + timeout
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            while not _try_lock(fd):
+                if time.monotonic() > deadline:
+                    os.close(fd)
+                    self._thread_lock.release()
+                    raise TimeoutError(f"잠금을 얻지 못했습니다: {self.path}")
+                time.sleep(_POLL_SECONDS)
+            self._fd = fd
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock(fd)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def file_lock(path):
+    """path 잠금 파일의 FileLock을 반환합니다. 같은 경로에는 프로세스 안에서 같은 객체를 씁니다."""
+    path = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            lock = _locks[path] = FileLock(path)
+        return lock
+
+
+def fsync_file(f):
+    """버퍼를 비우고 디스크에 기록될 때까지 기다립니다."""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+@contextmanager
+def atomic_write(path, mode="w", encoding="utf-8", newline=None):
+    """같은 폴더의 임시 파일에 쓴 뒤 path로 이름을 바꿉니다. 실패하면 path는 그대로입니다."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding,
+                       newline=None if "b" in mode else newline) as f:
+            yield f
+            fsync_file(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
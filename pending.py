@@ -0,0 +1,136 @@
+"""감정 기록 대기열.
+
+감정이 아직 비어 있는 기록의 (시각, id)를 시각 순으로 보관합니다. 소비 후
+EMOTION_DELAY가 지난 항목만 입력할 수 있으므로, 입력 가능한 항목은 대기열
+앞부분이고 이진 탐색으로 경계를 찾습니다. 화면은 전체 기록을 필터링하지 않고
+이 목록에서 한 페이지만큼의 id를 꺼내 씁니다.
+
+기록을 추가할 때마다 상태 전체를 읽고 다시 쓰므로 대기열은 최근 PENDING_KEEP건만
+보관하고, 그보다 오래된 미입력 기록은 건수(count)로만 셉니다. 감정을 입력해 대기열이
+PENDING_REFILL건보다 짧아지면(needs_refill) storage가 대기열 첫 항목보다 오래된 미입력
+기록만 최근 것부터 필요한 만큼(refill_range) 찾아 앞에 채우므로(refill), 빠졌던 오래된
+기록도 차례로 다시 나타납니다. 채운 대기열은 build로 새로 만든 것과 같습니다.
+
+상태: {"queue": [["YYYY-MM-DD HH:MM:SS", id], ...] (시각 오름차순, 최근 PENDING_KEEP건),
+       "count": 감정이 비어 있는 기록 수 (queue에서 빠진 기록 포함)}
+"""
+import bisect
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+STATE_NAME = "pending_emotions"
+EMOTION_DELAY = timedelta(minutes=30) # 소비 후 감정 기록까지 기다리는 시간
+PENDING_KEEP = 500 # 대기열에 보관하는 최근 항목 수 (상태 크기 상한)
+PENDING_REFILL = 100 # 대기열이 이보다 짧아지고 빠진 기록이 있으면 저장된 기록에서 다시 채움
+
+
+def _is_pending(rec):
+    emotion = rec.get("감정")
+    return emotion is None or pd.isnull(emotion) or emotion == ""
+
+def _entry(rec):
+    dt = pd.to_datetime(rec.get("datetime_iso"), errors='coerce')
+    if pd.isnull(dt):
+        return None # NaT 값은 비교가 불가능하므로 제외
+    return [dt.strftime("%Y-%m-%d %H:%M:%S"), rec["id"]]
+
+
+def _entries(df):
+    """df에서 감정이 비어 있는 기록의 [시각, id] 목록 (시각 오름차순)."""
+    if df.empty:
+        return []
+    dts = pd.to_datetime(df["datetime_iso"], errors='coerce')
+    mask = dts.notna() & (df["감정"].isnull() | (df["감정"] == ""))
+    queue = pd.DataFrame({"at": dts[mask].dt.strftime("%Y-%m-%d %H:%M:%S"), "id": df.loc[mask, "id"]})
+    return queue.sort_values(["at", "id"]).values.tolist()
+
+def build(df):
+    """전체 기록에서 대기열을 만듭니다."""
+    entries = _entries(df)
+    return {"queue": entries[-PENDING_KEEP:], "count": len(entries)}
+
+
+def _count(state):
+    # count가 없는 이전 형식의 상태는 대기열 전체를 보관하고 있었음
+    return state.get("count", len(state.get("queue", [])))
+
+
+def _remove(state, rec):
+    entry = _entry(rec)
+    if entry is None:
+        return # 날짜가 없는 기록은 대기열에 들어가지 않음
+    state["count"] = max(0, _count(state) - 1)
+    queue = state.get("queue", [])
+    pos = bisect.bisect_left(queue, entry)
+    if pos < len(queue) and queue[pos] == entry:
+        del queue[pos]
+        return
+    # 대기열에 없으면(시각이 바뀐 기록 등) 전체에서 찾음
+    state["queue"] = [item for item in queue if item[1] != rec["id"]]
+
+def apply_insert(state, rec):
+    """감정이 비어 있는 새 기록을 시각 순서에 맞춰 넣고, 최근 PENDING_KEEP건만 남깁니다."""
+    entry = _entry(rec)
+    if entry is not None and _is_pending(rec):
+        state["count"] = _count(state) + 1
+        queue = state.setdefault("queue", [])
+        bisect.insort(queue, entry)
+        del queue[:max(0, len(queue) - PENDING_KEEP)]
+    return state
+
+def apply_update(state, before, after):
+    """감정이 입력되면 대기열에서 빼고, 지워지면 다시 넣습니다."""
+    was_pending, is_pending = _is_pending(before), _is_pending(after)
+    if was_pending and not is_pending:
+        _remove(state, before)
+    elif is_pending and not was_pending:
+        apply_insert(state, after)
+    return state
+
+
+def eligible_entries(state, now=None):
+    """지금 감정을 입력할 수 있는(EMOTION_DELAY가 지난) 항목 [시각, id]를 오래된 순으로 반환합니다."""
+    now = now or datetime.now()
+    limit = (now - EMOTION_DELAY).strftime("%Y-%m-%d %H:%M:%S")
+    queue = state.get("queue", [])
+    end = bisect.bisect_right(queue, [limit, "\uffff"])
+    return queue[:end]
+
+
+def eligible(state, now=None):
+    """지금 감정을 입력할 수 있는 기록 id를 오래된 순으로 반환합니다."""
+    return [record_id for _, record_id in eligible_entries(state, now)]
+
+
+def hidden_count(state):
+    """감정이 비어 있지만 대기열에서 빠진(PENDING_KEEP건보다 오래된) 기록 수."""
+    return max(0, _count(state) - len(state.get("queue", [])))
+
+def needs_refill(state):
+    """대기열에서 빠진 기록이 있는데 대기열이 PENDING_REFILL건보다 짧아졌으면 True."""
+    return hidden_count(state) > 0 and len(state.get("queue", [])) < PENDING_REFILL
+
+def refill_range(state):
+    """대기열을 다시 채울 때 읽을 범위 (end, limit).
+
+    end 이전(None이면 제한 없음)의 감정이 비어 있는 기록을 최근 것부터 limit건 읽으면 됩니다.
+    대기열 첫 항목과 같은 초의 기록도 id 순으로 그보다 앞설 수 있으므로 end는 그 다음 초이고,
+    limit에는 대기열에서 그 초에 있는 항목 수를 더합니다.
+    """
+    queue = state.get("queue", [])
+    need = min(PENDING_KEEP - len(queue), hidden_count(state))
+    if not queue:
+        return None, need
+    first = queue[0][0]
+    same_second = bisect.bisect_right(queue, [first, "\uffff"])
+    return pd.Timestamp(first) + pd.Timedelta(seconds=1), need + same_second
+
+def refill(state, df):
+    """df(refill_range 범위의 감정이 비어 있는 기록)에서 대기열 첫 항목보다 오래된 기록을 앞에 채웁니다."""
+    queue = state.get("queue", [])
+    entries = _entries(df)
+    if queue:
+        entries = entries[:bisect.bisect_left(entries, queue[0])]
+    state["queue"] = (entries + queue)[-PENDING_KEEP:]
+    return state
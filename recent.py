@@ -0,0 +1,75 @@
+"""최근 기록 목록.
+
+"최근 기록" 화면은 가장 최근 RECENT_KEEP건만 보여 주므로, 전체 기록을 정렬하지
+않고 최근 기록 몇 건만 시각 순으로 따로 보관합니다. 새 기록은 정렬된 목록에
+이진 탐색으로 끼워 넣고 오래된 것은 잘라 내므로, 화면을 그리는 비용이 전체
+기록 수와 관계없이 일정합니다. 전체에서 새로 만들 때도 전체 정렬 대신
+nlargest(상위 k개 선택)를 씁니다.
+
+상태: {"records": [{기록}, ...]} (datetime_iso 오름차순, 최대 RECENT_KEEP건)
+"""
+import bisect
+
+import pandas as pd
+
+STATE_NAME = "recent"
+RECENT_KEEP = 50 # 보관할 최근 기록 수 (화면에 보여 주는 수보다 넉넉하게)
+
+
+def _sort_key(rec):
+    dt = pd.to_datetime(rec.get("datetime_iso"), errors='coerce')
+    return None if pd.isnull(dt) else (dt.strftime("%Y-%m-%d %H:%M:%S"), rec["id"])
+
+def _jsonable(rec):
+    # NaN/NaT는 JSON에 넣을 수 없으므로 None으로, numpy 값은 파이썬 값으로 저장
+    out = {}
+    for key, value in rec.items():
+        if pd.isnull(value):
+            value = None
+        elif hasattr(value, "item"):
+            value = value.item()
+        out[key] = value
+    return out
+
+
+def build(df):
+    """전체 기록에서 최근 RECENT_KEEP건을 고릅니다. (전체 정렬 없이 상위 k개 선택)"""
+    if df.empty:
+        return {"records": []}
+    dts = pd.to_datetime(df["datetime_iso"], errors='coerce', format="ISO8601")
+    top = dts[dts.notna()].nlargest(RECENT_KEEP).index # NaT 기록은 시각 순서를 알 수 없으므로 제외
+    latest = df.loc[top].assign(datetime_iso=dts[top].dt.strftime("%Y-%m-%d %H:%M:%S"))
+    latest = latest.sort_values(["datetime_iso", "id"])
+    return {"records": [_jsonable(rec) for rec in latest.to_dict("records")]}
+
+
+def apply_insert(state, rec):
+    """새 기록을 시각 순서에 맞춰 넣고 RECENT_KEEP건을 넘으면 가장 오래된 것을 버립니다."""
+    key = _sort_key(rec)
+    if key is None:
+        return state
+    records = state.setdefault("records", [])
+    keys = [(r["datetime_iso"], r["id"]) for r in records] # 보관 중인 기록의 시각은 이미 같은 형식의 문자열
+    if len(records) >= RECENT_KEEP and key < keys[0]:
+        return state # 보관 중인 기록보다 오래된 기록
+    record = _jsonable({**rec, "datetime_iso": key[0]})
+    records.insert(bisect.bisect_right(keys, key), record)
+    del records[:max(0, len(records) - RECENT_KEEP)]
+    return state
+
+
+def apply_update(state, before, after):
+    """보관 중인 기록이 수정되면(예: 감정 입력) 같은 칸을 고칩니다."""
+    for i, rec in enumerate(state.get("records", [])):
+        if rec["id"] == after["id"]:
+            state["records"][i] = _jsonable({**rec, **{k: v for k, v in after.items() if k != "datetime_iso"}})
+            break
+    return state
+
+
+def to_frame(state, n=None):
+    """최근 기록을 최신 순 DataFrame으로 반환합니다. n을 주면 n건만 반환합니다."""
+    records = state.get("records", [])[::-1]
+    if n is not None:
+        records = records[:n]
+    return pd.DataFrame(records)
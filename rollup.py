@@ -0,0 +1,125 @@
+"""사용자별 일 × 카테고리 롤업(미리 합산한 표).
+
+대시보드는 원본 기록 대신 이 표를 읽으므로, 화면을 그리는 비용이 기록 수가
+아니라 (기록이 있는 날 수 × 카테고리 수)에 비례합니다.
+
+상태는 JSON으로 저장할 수 있는 dict입니다.
+    {"rows": {"2025-11-17|교통": [금액, 건수, 충동, 과시, 모방, 나쁨, 보통, 좋음], ...},
+     "since": 일별 칸을 두는 첫날 "YYYY-MM-DD", "archived": since 이전 기록 수,
+     "archived_changes": since 이전 기록이 바뀐 횟수}
+값의 순서는 analytics.METRIC_COLUMNS와 같습니다. 기록이 추가/수정될 때마다
+storage가 apply_insert / apply_update로 해당 칸만 고칩니다.
+
+기록을 추가할 때마다 상태 전체를 읽고 다시 쓰므로, 상태에는 가장 최근 기록의 달을
+포함한 최근 HOT_MONTHS개월의 칸만 둡니다. 그 이전 기간은 storage.load_rollup_archive가
+그 기간의 기록만 읽어 만들고, since나 archived/archived_changes가 바뀔 때까지
+캐시합니다. (지난 기간의 기록이 추가/수정되는 일은 드뭄)
+"""
+import pandas as pd
+
+from analytics import METRIC_COLUMNS, record_indicator, record_indicators, week_keys
+
+STATE_NAME = "rollup"
+HOT_MONTHS = 3 # 상태에 일별 칸을 두는 최근 달 수 (가장 최근 기록의 달 포함)
+
+
+def _row_key(rec):
+    dt = pd.to_datetime(rec.get("datetime_iso"), errors='coerce')
+    if pd.isnull(dt):
+        return None # 날짜가 없는 기록은 대시보드 분석에서 제외
+    return f"{dt.strftime('%Y-%m-%d')}|{rec.get('대분류')}"
+
+
+def _hot_since(day):
+    """가장 최근 날짜가 day일 때 일별 칸을 두는 첫날."""
+    return (pd.Period(day, freq="M") - (HOT_MONTHS - 1)).start_time.strftime("%Y-%m-%d")
+
+
+def _advance(state, day):
+    """day까지의 기록이 들어왔을 때 since를 옮기고, 그 이전 칸을 상태에서 뺍니다."""
+    since = _hot_since(day)
+    if state.get("since") is not None and since <= state["since"]:
+        return
+    rows = state.setdefault("rows", {})
+    old = [key for key in rows if key[:10] < since]
+    state["archived"] = state.get("archived", 0) + sum(rows[key][1] for key in old)
+    for key in old:
+        del rows[key]
+    state["since"] = since
+
+
+def _add(state, rec, sign):
+    key = _row_key(rec)
+    if key is None:
+        return
+    rows = state.setdefault("rows", {})
+    if "since" not in state and rows: # since가 없는 이전 형식의 상태는 전체 기간의 칸을 들고 있음
+        _advance(state, max(row_key[:10] for row_key in rows))
+    if sign > 0:
+        _advance(state, key[:10])
+    if state.get("since") is not None and key[:10] < state["since"]: # 지난 기간: 칸 대신 기록 수와 변경 횟수만 셈
+        state["archived"] = state.get("archived", 0) + sign
+        state["archived_changes"] = state.get("archived_changes", 0) + 1
+        return
+    current = rows.get(key, [0] * len(METRIC_COLUMNS))
+    updated = [a + sign * b for a, b in zip(current, record_indicator(rec))]
+    if updated[1] <= 0: # 건수가 0이면 칸을 지움
+        rows.pop(key, None)
+    else:
+        rows[key] = updated
+
+
+def build(df, hot_months=HOT_MONTHS):
+    """전체 기록에서 롤업을 새로 만듭니다. (벡터 연산 groupby 한 번)
+
+    hot_months가 None이면 since 없이 모든 날짜의 칸을 만듭니다. (지난 기간 롤업용)
+    """
+    ind = record_indicators(df)
+    if ind.empty:
+        return {"rows": {}}
+    days = ind["날짜"].dt.strftime("%Y-%m-%d")
+    state = {}
+    if hot_months is not None:
+        since = _hot_since(days.max())
+        old = days < since
+        state = {"since": since, "archived": int(old.sum()), "archived_changes": 0}
+        ind, days = ind[~old], days[~old]
+    grouped = ind.groupby([days, "대분류"], observed=True)[METRIC_COLUMNS].sum()
+    rows = {f"{day}|{category}": [float(v) if i == 0 else int(v) for i, v in enumerate(values)]
+            for (day, category), values in zip(grouped.index, grouped.values.tolist())}
+    return {"rows": rows, **state}
+
+
+def apply_insert(state, rec):
+    """기록 한 건이 추가될 때 롤업을 갱신합니다."""
+    _add(state, rec, 1)
+    return state
+
+
+def apply_update(state, before, after):
+    """기록 한 건이 수정될 때(예: 감정 입력) 이전 값을 빼고 새 값을 더합니다."""
+    _add(state, before, -1)
+    _add(state, after, 1)
+    return state
+
+
+def to_frame(state, archive=None):
+    """롤업을 DataFrame(날짜, year_week, 대분류, 지표 컬럼)으로 반환합니다.
+
+    archive(since 이전 기간의 to_frame 결과)를 주면 앞에 이어 붙입니다.
+    """
+    rows = state.get("rows", {})
+    if not rows:
+        frame = pd.DataFrame(columns=["날짜", "year_week", "대분류"] + METRIC_COLUMNS)
+    else:
+        keys = [key.split("|", 1) for key in rows]
+        frame = pd.DataFrame(list(rows.values()), columns=METRIC_COLUMNS)
+        frame.insert(0, "대분류", [category for _, category in keys])
+        frame.insert(0, "날짜", pd.to_datetime([day for day, _ in keys]))
+        frame.insert(1, "year_week", week_keys(frame["날짜"]))
+        frame = frame.sort_values(["날짜", "대분류"], ignore_index=True)
+    if archive is None or archive.empty:
+        return frame
+    if frame.empty:
+        return archive
+    return pd.concat([archive, frame], ignore_index=True)
@@ -0,0 +1,126 @@
+"""오늘 / 이번 주 / 이번 달 지출 누계와 지출 한도 규칙.
+
+기록을 저장할 때마다 과소비 여부를 보려고 전체 기록을 다시 합산하지 않도록,
+기간별 누계(전체 합계와 대분류별 합계)를 사용자별 상태로 보관합니다. 새
+기간의 기록이 들어오면 그 기간으로 넘어가며(0부터 다시 셈), 조회할 때 저장된
+기간이 지금과 다르면 0으로 봅니다.
+
+한도 규칙은 LIMIT_RULES에 선언적으로 정의합니다. 한도는 주간 예산에 대한
+비율(ratio)이고, category가 None이면 전체 지출, 아니면 해당 대분류만 봅니다.
+하루 지출이 평소보다 많은지는 고정 비율 대신 anomaly.py가 사용자의 대분류별
+평소 씀씀이와 비교해 판단합니다.
+
+상태: {"day": {"key": "YYYY-MM-DD", "total": 금액, "by_category": {대분류: 금액}},
+       "week": {"key": 주차 키, ...}, "month": {"key": "YYYY-MM", ...}}
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from analytics import week_key, week_start
+
+STATE_NAME = "spend_totals"
+
+PERIOD_LABELS = {"day": "오늘", "week": "이번 주", "month": "이번 달"}
+
+LIMIT_RULES = [
+    {"name": "주간 예산 초과", "period": "week", "category": None, "ratio": 1.0, "desc": "주간 예산"},
+    {"name": "간식/외식 과다", "period": "week", "category": "식비(간식/외식 포함)", "ratio": 0.5, "desc": "주간 예산의 50%"},
+    {"name": "굿즈 과다", "period": "week", "category": "취미용품/굿즈", "ratio": 0.3, "desc": "주간 예산의 30%"},
+]
+
+
+def _period_key(period, dt):
+    if period == "day":
+        return dt.strftime("%Y-%m-%d")
+    if period == "week":
+        return week_key(dt)
+    return dt.strftime("%Y-%m")
+
+def _period_bounds(period, now):
+    """지금이 속한 기간의 [시작, 끝) 시각을 반환합니다."""
+    day = pd.Timestamp(now).normalize()
+    if period == "day":
+        return day, day + pd.Timedelta(days=1)
+    if period == "week":
+        start = pd.Timestamp(week_start(week_key(now)))
+        return start, start + pd.Timedelta(weeks=1)
+    start = day.replace(day=1)
+    return start, start + pd.offsets.MonthBegin(1)
+
+def _empty(key):
+    return {"key": key, "total": 0.0, "by_category": {}}
+
+def _amount(rec):
+    amount = rec.get("금액")
+    return 0.0 if amount is None or pd.isnull(amount) else float(amount)
+
+
+def build(df, now=None):
+    """전체 기록에서 지금 기간(오늘, 이번 주, 이번 달)의 누계를 계산합니다."""
+    now = now or datetime.now()
+    state = {period: _empty(_period_key(period, now)) for period in PERIOD_LABELS}
+    if df.empty:
+        return state
+    dts = pd.to_datetime(df["datetime_iso"], errors='coerce', format="ISO8601")
+    for period in PERIOD_LABELS:
+        start, end = _period_bounds(period, now)
+        in_period = df[(dts >= start) & (dts < end)]
+        amounts = in_period["금액"].fillna(0)
+        state[period]["total"] = float(amounts.sum())
+        state[period]["by_category"] = {c: float(v) for c, v in amounts.groupby(in_period["대분류"], observed=True).sum().items()}
+    return state
+
+
+def _add(state, rec, sign):
+    dt = pd.to_datetime(rec.get("datetime_iso"), errors='coerce')
+    if pd.isnull(dt):
+        return
+    amount, category = sign * _amount(rec), rec.get("대분류")
+    for period in PERIOD_LABELS:
+        key = _period_key(period, dt)
+        counter = state.get(period)
+        if counter is None or (sign > 0 and key > counter["key"]):
+            counter = state[period] = _empty(key) # 새 기간으로 넘어감
+        if key != counter["key"]:
+            continue # 지난 기간의 기록
+        counter["total"] += amount
+        by_category = counter["by_category"]
+        by_category[category] = by_category.get(category, 0.0) + amount
+        if abs(by_category[category]) < 1e-9:
+            del by_category[category]
+
+
+def apply_insert(state, rec):
+    """기록 한 건이 추가될 때 해당 기간의 누계에 더합니다."""
+    _add(state, rec, 1)
+    return state
+
+def apply_update(state, before, after):
+    """기록 한 건이 수정될 때 이전 값을 빼고 새 값을 더합니다."""
+    _add(state, before, -1)
+    _add(state, after, 1)
+    return state
+
+
+def totals(state, period, now=None):
+    """지금 기간의 (전체 합계, 대분류별 합계)를 반환합니다. 저장된 기간이 지났으면 0입니다."""
+    now = now or datetime.now()
+    counter = state.get(period)
+    if counter is None or counter["key"] != _period_key(period, now):
+        return 0.0, {}
+    return counter["total"], counter["by_category"]
+
+
+def evaluate(state, weekly_budget, rules=LIMIT_RULES, now=None):
+    """한도 규칙을 누계에 대해 평가합니다. 전체 기록을 다시 보지 않습니다.
+
+    각 규칙에 spent(지출), limit(한도 금액), exceeded(초과 여부)를 더한 dict 목록을 반환합니다.
+    """
+    results = []
+    for rule in rules:
+        total, by_category = totals(state, rule["period"], now)
+        spent = total if rule["category"] is None else by_category.get(rule["category"], 0.0)
+        limit = weekly_budget * rule["ratio"]
+        results.append({**rule, "spent": spent, "limit": limit, "exceeded": limit > 0 and spent > limit})
+    return results
@@ -0,0 +1,1581 @@
+"""머니모니 데이터 저장소.
+
+지출 기록, 사용자, 사용자 프로필(월 예산, 주차별 성찰/계획)을 읽고 쓰는 저장소
+인터페이스와 두 가지 구현을 제공합니다.
+
+- "csv": 기존 방식. 작업 폴더에 사용자별 CSV/JSON 파일을 둡니다. 지출 기록은 월별 파일로 나눕니다.
+- "sqlite": 하나의 SQLite 파일. 지출 기록은 (username, datetime_iso) 인덱스로 조회합니다.
+
+사용할 저장소는 환경 변수 MONEYMONI_STORAGE ("csv" 또는 "sqlite")로 고르고,
+SQLite 파일 경로는 MONEYMONI_DB로 지정합니다.
+
+여러 세션/프로세스가 같은 사용자의 데이터를 동시에 고칠 수 있으므로, 읽고-고치고-쓰는
+작업은 사용자별 파일 잠금(locks.py) 안에서 하고, 파일 전체를 다시 쓸 때는 임시 파일에 쓴 뒤
+이름을 바꿉니다. 같은 사용자에게 동시에 들어온 기록 추가는 그룹 커밋(group_commit.py)으로
+묶어, 잠금 한 번 안에서 한 번에 쓰고 파생 상태도 한 번만 갱신합니다.
+
+기존 파일을 SQLite로 한 번에 옮기려면:
+    python storage.py migrate --to sqlite
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import shutil
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import anomaly
+import badges
+import dedupe
+import pending
+import recent
+import rollup
+import spending
+import user_profile
+from analytics import week_key, week_keys, week_start
+from cache import VersionedCache
+from group_commit import GroupCommitWriter
+from locks import atomic_write, file_lock, fsync_file
+from timing import timed
+
+# ---------- 설정 ----------
+USERS_FILE = "users.csv"
+DEFAULT_MONTHLY_BUDGET = 200000 # 기본 예산 설정
+PROFILE_FILE_SUFFIX = "_profile.json" # 사용자 프로필(예산, 주차별 성찰/계획) 파일 접미사
+PLAN_FILE_PREFIX = "_plan.txt" # 이전 형식의 소비 계획 파일 접미사 (처음 읽을 때 프로필로 옮김)
+BUDGET_FILE_SUFFIX = "_budget.txt" # 이전 형식의 월 예산 파일 접미사 (처음 읽을 때 프로필로 옮김)
+RECORDS_FILE_SUFFIX = "_records.csv" # 지출 기록 기본 파일 접미사
+RECORDS_LOG_SUFFIX = "_records.log" # 지출 기록 추가/수정 로그 파일 접미사 (JSON Lines)
+RECORDS_PARTITION_SUFFIX = "_records" # 월별 지출 기록 파일을 두는 폴더 접미사 ({username}_records/YYYY-MM.csv)
+PARTITION_MANIFEST = "manifest.json" # 파티션별 기록 수와 주차 목록
+UNDATED_PARTITION = "undated" # 날짜가 없는(NaT) 기록의 파티션
+RECORDS_LOG_COMPACT_BYTES = 64 * 1024 # 로그가 이 크기를 넘으면 기본 파일로 병합
+STATE_FILE_SUFFIX = ".json" # 파생 상태 파일 접미사 ({username}_{name}.json)
+EXTRA_STATE_NAMES = ["cohort_summary"] # 파생 상태 외에 사용자별로 저장하는 상태 (cohort.py의 요약 캐시)
+RETIRED_STATE_NAMES = ["dedupe_keys"] # 더 이상 만들지 않는 상태 (사용자를 지울 때 남은 파일만 지움)
+LOCK_DIR = ".locks" # 사용자별 잠금 파일을 두는 폴더 (데이터 폴더 안)
+FSYNC_WRITES = os.environ.get("MONEYMONI_FSYNC", "1") != "0" # 기록 추가 때마다 디스크 기록까지 기다림
+
+STORAGE_BACKEND = os.environ.get("MONEYMONI_STORAGE", "csv") # "csv" 또는 "sqlite"
+SQLITE_FILE = os.environ.get("MONEYMONI_DB", "moneymoni.db")
+CACHE_MAX_BYTES = int(os.environ.get("MONEYMONI_CACHE_MB", "256")) * 1024 * 1024 # 로드 캐시 메모리 상한
+
+RECORD_COLUMNS = ["id","날짜","시간","datetime_iso","대분류","세부항목","금액","계획됨","과시소비", "모방소비", "감정", "감정 이유", "year_week"]
+USER_COLUMNS = ["username", "password_hash"]
+
+# 메모리에서의 기록 컬럼 타입. 저장 형식("예"/"아니오" 문자열, 원 단위 금액)은 그대로이며
+# 읽을 때 이 타입으로 바꾸므로 이전에 저장된 CSV/DB도 그대로 읽힘
+DATETIME_DTYPE = "datetime64[ns]"
+CATEGORY_COLUMNS = ["대분류", "감정"] # 값의 종류가 적은 문자열 -> category
+FLAG_COLUMNS = ["계획됨", "과시소비", "모방소비"] # 예/아니오 -> 두 값 category (int8 코드, 모르면 NaN)
+FLAG_VALUES = ["예", "아니오"]
+DEDUPE_FIELDS = {"datetime_iso", "금액", "세부항목"} # 중복 키(dedupe.py)를 이루는 필드
+SQL_IN_CHUNK = 500 # IN (...) 조회 한 번에 넣는 값 수
+
+
+def _won(values):
+    """금액을 정수 원 단위(int64)로 바꿉니다. 비어 있거나 잘못된 값은 0."""
+    return pd.to_numeric(values, errors='coerce').fillna(0).round().astype("int64")
+
+
+def _normalize_records(df):
+    """저장소에서 읽은 기록의 타입과 누락 컬럼을 맞춥니다."""
+    if "datetime_iso" in df.columns:
+        # 🚨 수정 2: errors='coerce'를 사용하여 잘못된 값은 NaT로 변환
+        # 초 단위/마이크로초 단위 문자열이 섞여 있으므로 ISO8601로 각각 해석
+        df["datetime_iso"] = pd.to_datetime(df["datetime_iso"], errors='coerce', format="ISO8601").astype(DATETIME_DTYPE)
+
+    if '모방소비' not in df.columns: df['모방소비'] = '아니오'
+    if '감정 이유' not in df.columns: df['감정 이유'] = ''
+
+    if "금액" in df.columns:
+        df["금액"] = _won(df["금액"])
+    if "감정" in df.columns:
+        df["감정"] = df["감정"].fillna("") # CSV는 빈 칸을 NaN으로, SQLite는 ""로 읽으므로 하나로 맞춤
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in FLAG_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.Categorical(df[col].where(df[col].isin(FLAG_VALUES)), categories=FLAG_VALUES)
+
+    # 주차 키는 저장 시 함께 기록됨. 이전 형식의 기록만 여기서 계산
+    if "year_week" not in df.columns:
+        df["year_week"] = week_keys(df["datetime_iso"])
+    else:
+        missing = df["year_week"].isna()
+        if missing.any():
+            df.loc[missing, "year_week"] = week_keys(df.loc[missing, "datetime_iso"])
+        df["year_week"] = df["year_week"].astype("int64")
+
+    return df
+
+
+def _set_cell(df, pos, col, value):
+    """기록 DataFrame의 한 칸을 고칩니다. 컬럼 타입(category, 정수 금액 등)이 값을 받을 수 있게 맞춥니다."""
+    if col not in df.columns:
+        df[col] = ''
+    column = df[col]
+    missing = value is None or pd.isnull(value)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        if not missing and value not in column.cat.categories:
+            df[col] = column.cat.add_categories([value])
+    elif pd.api.types.is_integer_dtype(column) and not missing:
+        value = int(round(float(value)))
+    elif pd.api.types.is_float_dtype(column) and column.isna().all():
+        df[col] = column.astype(object) # 빈 칸만 있던 열은 문자열을 받을 수 있게 변환
+    df.iat[pos, df.columns.get_loc(col)] = value
+
+
+def _filter_range(df, start=None, end=None):
+    """datetime_iso가 [start, end) 구간에 있는 기록만 남깁니다."""
+    if start is not None:
+        df = df[df["datetime_iso"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["datetime_iso"] < pd.Timestamp(end)]
+    return df.reset_index(drop=True)
+
+
+def _unrated(df, start=None, end=None):
+    """날짜가 [start, end) 구간에 있고 감정이 비어 있는 기록만 남깁니다. (정규화된 기록)"""
+    df = _filter_range(df, start, end)
+    return df[df["datetime_iso"].notna() & (df["감정"] == "")]
+
+
+def _newest(df, limit=None):
+    """기록을 최근 시각부터 정렬해 limit건(None이면 전부) 남깁니다."""
+    df = df.sort_values("datetime_iso", ascending=False, kind="stable")
+    return (df if limit is None else df.head(limit)).reset_index(drop=True)
+
+
+def _partition_keys(dts):
+    """기록 시각의 월 파티션 이름("YYYY-MM") Series. 날짜가 없으면 UNDATED_PARTITION."""
+    return dts.dt.strftime("%Y-%m").fillna(UNDATED_PARTITION)
+
+
+def _partition_meta(part):
+    """파티션 정보: 기록 수와 기록이 있는 주차 키 목록."""
+    weeks = pd.to_numeric(part["year_week"], errors='coerce').dropna().astype("int64")
+    return {"rows": len(part), "weeks": sorted(int(w) for w in weeks.unique() if w != 0)}
+
+
+def _overlaps(name, start=None, end=None):
+    """파티션이 [start, end) 구간과 겹치는지 확인합니다. 날짜 없는 파티션은 구간이 없을 때만 읽습니다."""
+    if name == UNDATED_PARTITION:
+        return start is None and end is None
+    first = pd.Timestamp(f"{name}-01")
+    return ((start is None or first + pd.offsets.MonthBegin(1) > pd.Timestamp(start))
+            and (end is None or first < pd.Timestamp(end)))
+
+
+def _stat_key(path):
+    """파일 변경 여부를 판단하는 (mtime, size). 파일이 없으면 None."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _iso(value):
+    """datetime 값을 저장용 문자열로 바꿉니다. 비어 있으면 None."""
+    if value is None or pd.isnull(value):
+        return None
+    if isinstance(value, str):
+        return value
+    return pd.Timestamp(value).isoformat(sep=" ")
+
+
+# ---------- 저장소 인터페이스 ----------
+class StorageBackend:
+    """저장소 인터페이스. 각 구현은 아래 메서드를 모두 제공합니다.
+
+    load_profile / load_state는 저장된 값이 없으면 None을 반환합니다.
+    """
+    name = ""
+    lock_dir = LOCK_DIR
+
+    def lock(self, username=None):
+        """한 사용자(None이면 사용자 목록)의 데이터를 다른 세션/프로세스와 배타적으로 고치기 위한 잠금."""
+        return file_lock(os.path.join(self.lock_dir, f"{USERS_FILE if username is None else username}.lock"))
+
+    def load_records(self, username, start=None, end=None):
+        raise NotImplementedError
+
+    def load_records_by_id(self, username, record_ids, months=None):
+        """id 목록의 기록 DataFrame(순서 무관, 없는 id는 빠짐)을 읽습니다.
+
+        months는 기록이 있을 것으로 보이는 월 파티션 이름("YYYY-MM") 집합으로, 읽을 범위를
+        줄이는 데만 씁니다. 기본 구현은 전체 기록을 읽어 거릅니다.
+        """
+        df = self.load_records(username)
+        return df[df["id"].isin(set(record_ids))].reset_index(drop=True)
+
+    def load_unrated_records(self, username, start=None, end=None, limit=None):
+        """[start, end) 구간에서 감정이 비어 있는(날짜 있는) 기록을 최근 시각부터 limit건 읽습니다.
+
+        감정 대기열(pending.py)을 다시 채울 때 씁니다. 기본 구현은 구간의 기록을 모두 읽어 거릅니다.
+        """
+        return _newest(_unrated(self.load_records(username, start, end)), limit)
+
+    def save_records(self, df, username):
+        raise NotImplementedError
+
+    def append_record(self, username, rec):
+        raise NotImplementedError
+
+    def append_record_batch(self, username, recs):
+        """새 기록 dict 여러 건을 한 번의 쓰기로 추가합니다. (storage의 그룹 커밋 한 번 분량)"""
+        for rec in recs:
+            self.append_record(username, rec)
+
+    def append_records(self, username, df):
+        """여러 기록을 기존 기록을 다시 쓰지 않고 한 번에 추가합니다. (일괄 가져오기용)"""
+        for rec in df.to_dict("records"):
+            self.append_record(username, rec)
+
+    def update_record(self, username, record_id, fields):
+        raise NotImplementedError
+
+    def update_records(self, username, updates):
+        """여러 기록을 한 번에 수정합니다. updates는 (record_id, fields) 목록입니다."""
+        for record_id, fields in updates:
+            self.update_record(username, record_id, fields)
+
+    def compact_records(self, username):
+        """쌓인 변경분을 정리합니다. 필요 없는 저장소는 아무것도 하지 않습니다."""
+
+    def load_users(self):
+        raise NotImplementedError
+
+    def save_users(self, df):
+        raise NotImplementedError
+
+    def append_user(self, username, password_hash):
+        """사용자 한 명을 기존 목록을 다시 쓰지 않고 추가합니다."""
+        raise NotImplementedError
+
+    def load_profile(self, username):
+        """사용자 프로필(user_profile.py의 dict)을 읽습니다.
+
+        프로필이 없고 이전 형식의 예산/계획만 있으면 프로필로 옮겨 저장하고 이전 값을 지웁니다.
+        """
+        raise NotImplementedError
+
+    def save_profile(self, username, profile):
+        raise NotImplementedError
+
+    def load_state(self, username, name):
+        """사용자의 파생 상태(JSON으로 저장 가능한 dict)를 읽습니다. 없으면 None."""
+        raise NotImplementedError
+
+    def save_state(self, username, name, state):
+        raise NotImplementedError
+
+    def delete_user_data(self, username):
+        raise NotImplementedError
+
+    def list_usernames(self):
+        """기록이나 설정 파일이 있는 모든 사용자 이름을 반환합니다."""
+        raise NotImplementedError
+
+    def record_weeks(self, username):
+        """기록이 있는 주차 키 목록(오름차순, 날짜 없는 기록 제외). 기록 전체를 읽지 않습니다."""
+        raise NotImplementedError
+
+    def find_dedupe_keys(self, username, keys):
+        """keys(중복 키 목록) 중 저장된 기록에 있는 키의 집합.
+
+        중복 키 인덱스가 없는 저장소는 None을 반환하고, storage.existing_dedupe_keys가
+        해당 시각 범위의 기록만 읽어 비교합니다.
+        """
+        return None
+
+    def data_version(self, kind, username=None):
+        """kind("records"/"users") 데이터가 바뀌면 함께 바뀌는 값을 반환합니다. (캐시 키용)"""
+        raise NotImplementedError
+
+
+# ---------- CSV 저장소 (기존 파일 방식) ----------
+class CsvBackend(StorageBackend):
+    """사용자별 CSV/JSON 파일 저장소. 새 기록과 수정은 로그 파일에 덧붙입니다.
+
+    지출 기록은 월별 파일({username}_records/YYYY-MM.csv)로 나눠 두고, 파티션별 기록 수와
+    주차 목록을 manifest.json에 적어 둡니다. 기간을 주고 읽으면 겹치는 달의 파일만 읽습니다.
+    """
+    name = "csv"
+
+    def __init__(self, base_dir="."):
+        self.base_dir = base_dir
+        self.lock_dir = os.path.join(base_dir, LOCK_DIR)
+
+    def _path(self, name):
+        return os.path.join(self.base_dir, name)
+
+    def _records_file(self, username):
+        # 파티션 이전 형식의 단일 기록 파일. 있으면 파티션과 함께 읽고, 다음 병합 때 파티션으로 옮김
+        return self._path(f"{username}{RECORDS_FILE_SUFFIX}")
+
+    def _records_log_file(self, username):
+        return self._path(f"{username}{RECORDS_LOG_SUFFIX}")
+
+    def _partition_dir(self, username):
+        return self._path(f"{username}{RECORDS_PARTITION_SUFFIX}")
+
+    def _manifest_file(self, username):
+        return os.path.join(self._partition_dir(username), PARTITION_MANIFEST)
+
+    def _partitions(self, username):
+        """파티션 이름("YYYY-MM" 또는 UNDATED_PARTITION) -> 파일 경로."""
+        folder = self._partition_dir(username)
+        if not os.path.isdir(folder):
+            return {}
+        return {name[:-len(".csv")]: os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".csv")}
+
+    def _read_manifest(self, username):
+        """파티션별 {"rows": 기록 수, "weeks": [주차 키, ...]}. 없거나 손상되었으면 파티션에서 다시 만듭니다."""
+        try:
+            with open(self._manifest_file(username), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {name: _partition_meta(pd.read_csv(path, usecols=["year_week"]))
+                    for name, path in self._partitions(username).items()}
+
+    def _write_manifest(self, username, manifest):
+        with atomic_write(self._manifest_file(username)) as f:
+            f.write(json.dumps(manifest, ensure_ascii=False, sort_keys=True))
+
+    @timed
+    def load_records(self, username, start=None, end=None):
+        """[start, end) 구간과 겹치는 월 파티션만 읽고 추가/수정 로그를 재생합니다."""
+        paths = [path for name, path in sorted(self._partitions(username).items()) if _overlaps(name, start, end)]
+        legacy = self._records_file(username)
+        if os.path.exists(legacy):
+            paths.append(legacy)
+        log_file = self._records_log_file(username)
+
+        frames = [pd.read_csv(path, dtype={"id": str}) for path in paths]
+        if len(frames) == 1:
+            df = frames[0]
+        elif frames:
+            df = pd.concat(frames, ignore_index=True)
+        else:
+            df = pd.DataFrame(columns=RECORD_COLUMNS)
+
+        if os.path.exists(log_file):
+            df = self._replay_log(df, log_file)
+
+        df = _normalize_records(df)
+        if start is not None or end is not None:
+            df = _filter_range(df, start, end) # 로그로 추가된 기록과 경계 달의 나머지 기록을 걸러냄
+        return df
+
+    @timed
+    def load_records_by_id(self, username, record_ids, months=None):
+        """months의 월 파티션과 로그만 읽어 id 목록의 기록을 찾습니다.
+
+        거기서 찾지 못한 id가 있으면(months가 없거나 틀린 경우) 나머지 파티션을 최근 달부터
+        id 열만 읽어 찾습니다.
+        """
+        if os.path.exists(self._records_file(username)): # 이전 형식 파일은 통째로 읽음
+            return super().load_records_by_id(username, record_ids)
+        wanted = set(record_ids)
+        log_file = self._records_log_file(username)
+        inserts, patches = self._read_log(log_file) if os.path.exists(log_file) else ([], [])
+        inserts = [rec for rec in inserts if rec["id"] in wanted]
+        patches = [(record_id, fields) for record_id, fields in patches if record_id in wanted]
+
+        partitions = self._partitions(username)
+        first = set(partitions) if months is None else set(months) & set(partitions)
+        frames = [pd.read_csv(partitions[name], dtype={"id": str}) for name in sorted(first)]
+        frames = [frame[frame["id"].isin(wanted)] for frame in frames]
+        missing = wanted - {rec["id"] for rec in inserts} - {record_id for frame in frames for record_id in frame["id"]}
+        for name, path in sorted(partitions.items(), reverse=True):
+            if not missing:
+                break
+            if name in first:
+                continue
+            ids = pd.read_csv(path, usecols=["id"], dtype={"id": str})["id"]
+            if ids.isin(missing).any():
+                frame = pd.read_csv(path, dtype={"id": str})
+                frames.append(frame[frame["id"].isin(wanted)])
+                missing -= set(ids)
+
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RECORD_COLUMNS)
+        return _normalize_records(self._apply_log(df, inserts, patches))
+
+    @timed
+    def load_unrated_records(self, username, start=None, end=None, limit=None):
+        """월 파티션을 최근 달부터 하나씩 읽고, 다음 달보다 최근인 후보가 limit건 모이면 그 달부터는 읽지 않습니다."""
+        if os.path.exists(self._records_file(username)): # 이전 형식 파일은 통째로 읽음
+            return super().load_unrated_records(username, start, end, limit)
+        log_file = self._records_log_file(username)
+        inserts, patches = self._read_log(log_file) if os.path.exists(log_file) else ([], [])
+        # 로그로 추가된 기록은 어느 달에든 있을 수 있으므로 먼저 모두 후보로 둠
+        logged = self._apply_log(pd.DataFrame(columns=RECORD_COLUMNS), inserts, patches)
+        frames = [_unrated(_normalize_records(logged), start, end)]
+        for name, path in sorted(self._partitions(username).items(), reverse=True):
+            if name == UNDATED_PARTITION or not _overlaps(name, start, end):
+                continue
+            if limit is not None:
+                after = pd.Timestamp(f"{name}-01") + pd.offsets.MonthBegin(1)
+                if sum(int((frame["datetime_iso"] >= after).sum()) for frame in frames) >= limit:
+                    break
+            part = self._apply_log(pd.read_csv(path, dtype={"id": str}), [], patches)
+            frames.append(_unrated(_normalize_records(part), start, end))
+        found = [frame for frame in frames if not frame.empty]
+        df = pd.concat(found, ignore_index=True) if found else frames[0]
+        return _newest(df.drop_duplicates("id", keep="last"), limit)
+
+    @classmethod
+    def _replay_log(cls, df, log_file):
+        """추가/수정 로그를 순서대로 읽어 기본 기록 DataFrame에 반영합니다."""
+        return cls._apply_log(df, *cls._read_log(log_file))
+
+    @staticmethod
+    def _read_log(log_file):
+        """로그의 (추가된 기록 목록, (id, 수정 필드) 목록)을 순서대로 반환합니다."""
+        inserts, patches = [], []
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # 쓰는 도중 중단된 마지막 줄은 무시
+                if entry.get("op") == "insert":
+                    inserts.append(entry["record"])
+                elif entry.get("op") == "update":
+                    patches.append((entry["id"], entry["fields"]))
+        return inserts, patches
+
+    @staticmethod
+    def _apply_log(df, inserts, patches):
+        if inserts:
+            # 병합 도중 중단된 경우 기본 파일에 이미 반영된 기록은 건너뜀
+            known_ids = set(df["id"])
+            new_rows = [rec for rec in inserts if rec["id"] not in known_ids]
+            if new_rows:
+                df = pd.concat([df, pd.DataFrame(new_rows)], ignore_index=True)
+
+        if patches:
+            positions = {record_id: i for i, record_id in enumerate(df["id"])}
+            for record_id, fields in patches:
+                pos = positions.get(record_id)
+                if pos is None:
+                    continue
+                for col, value in fields.items():
+                    _set_cell(df, pos, col, value)
+        return df
+
+    @timed
+    def save_records(self, df, username):
+        """기록 전체를 월 파티션 파일로 나눠 저장하고 로그(와 이전 형식 파일)를 비웁니다."""
+        self._save_partitions(df, username)
+
+    def _save_partitions(self, df, username, only=None):
+        """save_records와 같되, only(파티션 이름 집합)를 주면 df는 그 파티션들의 기록이며
+        그 파티션만 다시 쓰고 나머지 파티션은 그대로 둡니다. (로그 병합용)
+        """
+        df2 = df.reindex(columns=RECORD_COLUMNS + [c for c in df.columns if c not in RECORD_COLUMNS]) # 모든 파티션이 같은 컬럼을 갖도록
+        dts = pd.to_datetime(df2["datetime_iso"], errors='coerce', format="ISO8601")
+        df2["year_week"] = week_keys(dts)
+        df2["datetime_iso"] = df2["datetime_iso"].astype(str)
+        if "금액" in df2.columns:
+            df2["금액"] = _won(df2["금액"]) # "3500.0"이 아니라 "3500"으로 저장
+        keys = _partition_keys(dts)
+        with self.lock(username):
+            os.makedirs(self._partition_dir(username), exist_ok=True)
+            old = self._partitions(username)
+            manifest = {}
+            if only is not None:
+                manifest = {name: meta for name, meta in self._read_manifest(username).items() if name not in only}
+            for name, part in df2.groupby(keys.to_numpy(), sort=True):
+                with atomic_write(os.path.join(self._partition_dir(username), f"{name}.csv"), newline='') as f:
+                    part.to_csv(f, index=False)
+                manifest[name] = _partition_meta(part)
+            for name in (set(old) if only is None else set(old) & set(only)) - set(manifest):
+                os.remove(old[name])
+            self._write_manifest(username, manifest)
+            for file in (self._records_file(username), self._records_log_file(username)):
+                if os.path.exists(file):
+                    os.remove(file)
+
+    def _append_log(self, username, *entries):
+        """로그 파일 끝에 항목들을 한 번의 write + fsync로 추가하고, 로그가 커지면 기본 파일로 병합합니다.
+
+        같은 사용자의 동시 추가는 storage.append_record가 그룹 커밋으로 묶어 한 번에 넘깁니다.
+        """
+        log_file = self._records_log_file(username)
+        text = "".join(json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in entries)
+        with self.lock(username): # 병합(기본 파일 다시 쓰기 + 로그 삭제)과 겹치지 않도록
+            with open(log_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+                if FSYNC_WRITES:
+                    fsync_file(f)
+            if os.path.getsize(log_file) > RECORDS_LOG_COMPACT_BYTES:
+                self.compact_records(username)
+
+    def append_record(self, username, rec):
+        self.append_record_batch(username, [rec])
+
+    def append_record_batch(self, username, recs):
+        entries = []
+        for rec in recs:
+            record = dict(rec)
+            if isinstance(record.get("datetime_iso"), datetime):
+                record["datetime_iso"] = _iso(record["datetime_iso"])
+            entries.append({"op": "insert", "record": record})
+        self._append_log(username, *entries)
+
+    def append_records(self, username, df):
+        """기록들을 해당 월 파티션 파일 끝에 바로 덧붙입니다. (로그와 병합을 거치지 않음)"""
+        rows = df.copy()
+        dts = pd.to_datetime(rows["datetime_iso"], errors='coerce', format="ISO8601")
+        rows["datetime_iso"] = rows["datetime_iso"].map(_iso)
+        rows["year_week"] = week_keys(dts)
+        rows["금액"] = _won(rows["금액"])
+        keys = _partition_keys(dts)
+        with self.lock(username):
+            os.makedirs(self._partition_dir(username), exist_ok=True)
+            manifest = self._read_manifest(username)
+            for name, part in rows.groupby(keys.to_numpy(), sort=True):
+                file = os.path.join(self._partition_dir(username), f"{name}.csv")
+                header = None
+                if os.path.exists(file):
+                    with open(file, 'r', encoding='utf-8') as f:
+                        header = next(csv.reader(f), None)
+                with open(file, 'a', encoding='utf-8', newline='') as f:
+                    part.reindex(columns=header or RECORD_COLUMNS).to_csv(f, header=header is None, index=False)
+                    fsync_file(f)
+                meta = manifest.get(name, {"rows": 0, "weeks": []})
+                added = _partition_meta(part)
+                manifest[name] = {"rows": meta["rows"] + added["rows"], "weeks": sorted(set(meta["weeks"]) | set(added["weeks"]))}
+            self._write_manifest(username, manifest)
+
+    def update_record(self, username, record_id, fields):
+        self.update_records(username, [(record_id, fields)])
+
+    def update_records(self, username, updates):
+        self._append_log(username, *({"op": "update", "id": record_id, "fields": dict(fields)}
+                                     for record_id, fields in updates))
+
+    @timed
+    def compact_records(self, username):
+        """로그를 기본 파일에 합치고 로그를 비웁니다.
+
+        로그에 나온 기록이 있는 월 파티션만 다시 쓰므로, 병합 비용이 전체 기록 수가 아니라
+        로그 크기(RECORDS_LOG_COMPACT_BYTES)에 비례합니다. 수정만 있는 기록은 최근 파티션부터
+        id 열만 읽어 찾습니다.
+        """
+        with self.lock(username):
+            log_file = self._records_log_file(username)
+            if os.path.exists(self._records_file(username)) or not os.path.exists(log_file):
+                self.save_records(self.load_records(username), username) # 이전 형식 파일은 전체를 파티션으로 옮김
+                return
+            inserts, patches = self._read_log(log_file)
+            partitions = self._partitions(username)
+            dts = pd.to_datetime(pd.Series([rec.get("datetime_iso") for rec in inserts], dtype=object),
+                                 errors='coerce', format="ISO8601")
+            names = set(_partition_keys(dts))
+            frames = [pd.read_csv(partitions[name], dtype={"id": str}) for name in sorted(names) if name in partitions]
+            missing = {record_id for record_id, _ in patches} - {rec["id"] for rec in inserts}
+            missing -= {record_id for frame in frames for record_id in frame["id"]}
+            for name, path in sorted(partitions.items(), reverse=True):
+                if not missing:
+                    break
+                if name in names:
+                    continue
+                ids = pd.read_csv(path, usecols=["id"], dtype={"id": str})["id"]
+                if ids.isin(missing).any():
+                    names.add(name)
+                    frames.append(pd.read_csv(path, dtype={"id": str}))
+                    missing -= set(ids)
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RECORD_COLUMNS)
+            df = _normalize_records(self._apply_log(df, inserts, patches))
+            if not set(_partition_keys(df["datetime_iso"])) <= names:
+                # 수정으로 기록의 달이 바뀌면 다른 파티션도 바뀌므로 전체를 다시 씀
+                self.save_records(self.load_records(username), username)
+                return
+            self._save_partitions(df, username, only=names)
+
+    def load_users(self):
+        file = self._path(USERS_FILE)
+        if os.path.exists(file):
+            return pd.read_csv(file, dtype=str)
+        return pd.DataFrame(columns=USER_COLUMNS)
+
+    def save_users(self, df):
+        with self.lock(), atomic_write(self._path(USERS_FILE), newline='') as f:
+            df.to_csv(f, index=False)
+
+    def append_user(self, username, password_hash):
+        file = self._path(USERS_FILE)
+        with self.lock():
+            is_new = not os.path.exists(file) or os.path.getsize(file) == 0
+            with open(file, 'a', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f, lineterminator="\n")
+                if is_new:
+                    writer.writerow(USER_COLUMNS)
+                writer.writerow([username, password_hash])
+                fsync_file(f)
+
+    def _profile_file(self, username):
+        return self._path(f"{username}{PROFILE_FILE_SUFFIX}")
+
+    def load_profile(self, username):
+        try:
+            with open(self._profile_file(username), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return self._migrate_profile(username)
+        except json.JSONDecodeError:
+            return None
+
+    def save_profile(self, username, profile):
+        with atomic_write(self._profile_file(username)) as f:
+            f.write(json.dumps(profile, ensure_ascii=False))
+
+    def _migrate_profile(self, username):
+        """이전 형식의 {username}_budget.txt / _plan.txt를 프로필 파일로 옮기고 지웁니다. 없으면 None."""
+        plan_file = self._path(f"{username}{PLAN_FILE_PREFIX}")
+        budget_file = self._path(f"{username}{BUDGET_FILE_SUFFIX}")
+        if not (os.path.exists(plan_file) or os.path.exists(budget_file)):
+            return None
+        with self.lock(username):
+            if os.path.exists(self._profile_file(username)): # 다른 세션/프로세스가 먼저 옮김
+                return self.load_profile(username)
+            plan = plan_week = budget = None
+            if os.path.exists(plan_file):
+                with open(plan_file, 'r', encoding='utf-8') as f:
+                    lines = f.read().splitlines()
+                plan = (lines[0].strip() if len(lines) > 0 else "", lines[1].strip() if len(lines) > 1 else "")
+                plan_week = week_key(datetime.fromtimestamp(os.path.getmtime(plan_file))) # 마지막으로 저장한 주
+            if os.path.exists(budget_file):
+                try:
+                    with open(budget_file, 'r', encoding='utf-8') as f:
+                        budget = int(f.read().strip())
+                except ValueError:
+                    pass
+            profile = user_profile.from_legacy(budget, plan, plan_week)
+            self.save_profile(username, profile)
+            for file in (plan_file, budget_file):
+                if os.path.exists(file):
+                    os.remove(file)
+        return profile
+
+    def _state_file(self, username, name):
+        return self._path(f"{username}_{name}{STATE_FILE_SUFFIX}")
+
+    def load_state(self, username, name):
+        file = self._state_file(username, name)
+        if not os.path.exists(file):
+            return None
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            return None # 손상된 상태는 전체 기록에서 다시 만듦
+
+    def save_state(self, username, name, state):
+        with atomic_write(self._state_file(username, name)) as f:
+            f.write(json.dumps(state, ensure_ascii=False)) # json.dump는 C 인코더를 쓰지 않아 큰 상태에서 느림
+
+    def delete_user_data(self, username):
+        suffixes = [RECORDS_FILE_SUFFIX, RECORDS_LOG_SUFFIX, PROFILE_FILE_SUFFIX, PLAN_FILE_PREFIX, BUDGET_FILE_SUFFIX]
+        suffixes += [f"_{name}{STATE_FILE_SUFFIX}" for name in [*DERIVED_STATES, *EXTRA_STATE_NAMES, *RETIRED_STATE_NAMES]]
+        with self.lock(username):
+            for suffix in suffixes:
+                file = self._path(f"{username}{suffix}")
+                if os.path.exists(file):
+                    os.remove(file)
+            if os.path.isdir(self._partition_dir(username)):
+                shutil.rmtree(self._partition_dir(username))
+
+    def list_usernames(self):
+        names = set(self.load_users()["username"].dropna())
+        for suffix in (RECORDS_FILE_SUFFIX, RECORDS_LOG_SUFFIX, PROFILE_FILE_SUFFIX, PLAN_FILE_PREFIX, BUDGET_FILE_SUFFIX):
+            for file in glob.glob(self._path(f"*{suffix}")):
+                names.add(os.path.basename(file)[:-len(suffix)])
+        for folder in glob.glob(self._path(f"*{RECORDS_PARTITION_SUFFIX}")):
+            if os.path.isdir(folder):
+                names.add(os.path.basename(folder)[:-len(RECORDS_PARTITION_SUFFIX)])
+        return sorted(names)
+
+    def record_weeks(self, username):
+        weeks = set()
+        for meta in self._read_manifest(username).values():
+            weeks.update(meta["weeks"])
+        legacy = self._records_file(username)
+        if os.path.exists(legacy):
+            weeks.update(week_keys(pd.read_csv(legacy, usecols=["datetime_iso"])["datetime_iso"]))
+        log_file = self._records_log_file(username)
+        if os.path.exists(log_file): # 아직 병합되지 않은 추가 기록 (로그는 작음)
+            with open(log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("op") == "insert":
+                        weeks.add(week_key(entry["record"].get("datetime_iso")))
+        weeks.discard(0)
+        return sorted(int(w) for w in weeks)
+
+    def data_version(self, kind, username=None):
+        if kind == "users":
+            return _stat_key(self._path(USERS_FILE))
+        if kind == "profile":
+            return _stat_key(self._profile_file(username))
+        # 파티션 파일을 쓸 때마다 목록 파일도 다시 쓰므로 목록 파일 상태로 파티션 변경을 감지
+        return (_stat_key(self._manifest_file(username)), _stat_key(self._records_file(username)),
+                _stat_key(self._records_log_file(username)))
+
+
+# ---------- SQLite 저장소 ----------
+def _quote(col):
+    return '"' + col.replace('"', '""') + '"'
+
+
+class SqliteBackend(StorageBackend):
+    """하나의 SQLite 파일에 모든 사용자의 데이터를 저장합니다.
+
+    지출 기록은 (username, datetime_iso) 인덱스가 있어 기간 조회가 전체 기록을
+    읽지 않습니다. datetime_iso는 "YYYY-MM-DD HH:MM:SS[.ffffff]" 문자열로 저장하므로
+    문자열 비교가 시간 순서와 같습니다. 기록을 쓰는 트랜잭션은 record_versions의
+    사용자별 카운터도 함께 올리므로, 다른 사용자의 쓰기는 캐시를 무효화하지 않습니다.
+    각 기록에는 중복 키(dedupe.py)를 함께 저장하고 (username, dedupe_key) 인덱스로
+    가져오기 중복 확인을 합니다. 감정이 비어 있는 기록만 담은 (username, datetime_iso) 부분
+    인덱스로 감정 대기열을 다시 채울 기록을 찾습니다.
+    """
+    name = "sqlite"
+    _COLUMN_TYPES = {"금액": "REAL", "year_week": "INTEGER"}
+    _UNRATED = '("감정" IS NULL OR "감정" = \'\')' # 감정 미입력 조건 (부분 인덱스와 조회에서 똑같이 써야 인덱스를 씀)
+
+    def __init__(self, path=SQLITE_FILE):
+        self.path = path
+        self.lock_dir = os.path.join(os.path.dirname(os.path.abspath(path)), LOCK_DIR)
+        conn = self._connect()
+        try:
+            record_cols = ", ".join(
+                f"{_quote(c)} {self._COLUMN_TYPES.get(c, 'TEXT')}" for c in RECORD_COLUMNS if c != "id"
+            )
+            conn.executescript(f"""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS records (
+                    id TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    {record_cols},
+                    dedupe_key INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_records_user_dt ON records(username, datetime_iso);
+                CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password_hash TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS profiles (
+                    username TEXT PRIMARY KEY, payload TEXT NOT NULL, version INTEGER NOT NULL
+                );
+                -- 이전 형식의 계획/예산. 프로필로 옮기기 전의 사용자 값만 남아 있음
+                CREATE TABLE IF NOT EXISTS plans (username TEXT PRIMARY KEY, reflection TEXT, plan TEXT);
+                CREATE TABLE IF NOT EXISTS budgets (username TEXT PRIMARY KEY, budget INTEGER);
+                CREATE TABLE IF NOT EXISTS user_state (
+                    username TEXT NOT NULL, name TEXT NOT NULL, payload TEXT NOT NULL,
+                    PRIMARY KEY (username, name)
+                );
+                CREATE TABLE IF NOT EXISTS record_versions (username TEXT PRIMARY KEY, version INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS users_version (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL);
+            """)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(records)")}
+            if "year_week" not in existing:
+                # year_week 컬럼이 없던 DB: 컬럼을 추가하고 기존 기록의 주차 키를 채움
+                conn.execute("ALTER TABLE records ADD COLUMN year_week INTEGER")
+                rows = conn.execute("SELECT id, datetime_iso FROM records").fetchall()
+                conn.executemany("UPDATE records SET year_week = ? WHERE id = ?",
+                                 [(week_key(dt), rid) for rid, dt in rows])
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_records_user_week ON records(username, year_week)")
+            if "dedupe_key" not in existing:
+                # 중복 키 컬럼이 없던 DB: 컬럼을 추가하고 기존 기록의 키를 벡터 연산으로 채움
+                conn.execute("ALTER TABLE records ADD COLUMN dedupe_key INTEGER")
+                old = pd.read_sql_query('SELECT id, datetime_iso, "금액", "세부항목" FROM records', conn)
+                keys = dedupe.dedupe_keys(old)
+                conn.executemany("UPDATE records SET dedupe_key = ? WHERE id = ?",
+                                 zip(map(int, keys), old.loc[keys.index, "id"]))
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_records_user_key ON records(username, dedupe_key)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_records_user_unrated ON records(username, datetime_iso) "
+                         f"WHERE {self._UNRATED}")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _record_row(username, rec, key=None):
+        """insert 문의 값 목록. key는 중복 키이며, 없으면 rec에서 계산합니다."""
+        row = [rec.get("id"), username]
+        for col in RECORD_COLUMNS[1:]:
+            value = rec.get(col)
+            if col == "datetime_iso":
+                value = _iso(value)
+            elif col == "year_week" and (value is None or pd.isnull(value)):
+                value = week_key(rec.get("datetime_iso"))
+            elif value is not None and pd.isnull(value):
+                value = None
+            elif col == "금액" and value is not None:
+                value = float(value)
+            elif col == "year_week":
+                value = int(value)
+            row.append(value)
+        row.append(dedupe.dedupe_key(rec) if key is None else key)
+        return row
+
+    @classmethod
+    def _record_rows(cls, username, df):
+        """여러 기록의 insert 값 목록. 중복 키는 벡터 연산으로 한 번에 계산합니다."""
+        keys = dedupe.dedupe_keys(df).astype(object).reindex(df.index) # object: 64비트 키가 float로 바뀌지 않도록
+        return [cls._record_row(username, rec, None if pd.isnull(key) else int(key)) # 날짜 없는 기록은 키 없음
+                for rec, key in zip(df.to_dict("records"), keys)]
+
+    @staticmethod
+    def _bump_versions(conn, usernames):
+        """사용자별 기록 버전을 올립니다. 기록을 쓰는 트랜잭션 안에서 호출합니다."""
+        conn.executemany(
+            "INSERT INTO record_versions (username, version) VALUES (?, 1) "
+            "ON CONFLICT(username) DO UPDATE SET version = version + 1",
+            [(username,) for username in sorted(set(usernames))],
+        )
+
+    @staticmethod
+    def _bump_users_version(conn):
+        """사용자 목록 버전을 올립니다. 사용자 목록을 쓰는 트랜잭션 안에서 호출합니다."""
+        conn.execute("INSERT INTO users_version (id, version) VALUES (0, 1) "
+                     "ON CONFLICT(id) DO UPDATE SET version = version + 1")
+
+    @staticmethod
+    def _insert_sql():
+        cols = ", ".join(_quote(c) for c in ["id", "username"] + RECORD_COLUMNS[1:] + ["dedupe_key"])
+        marks = ", ".join("?" for _ in range(len(RECORD_COLUMNS) + 2))
+        return f"INSERT OR REPLACE INTO records ({cols}) VALUES ({marks})"
+
+    @timed
+    def load_records(self, username, start=None, end=None):
+        sql = f"SELECT {', '.join(_quote(c) for c in RECORD_COLUMNS)} FROM records WHERE username = ?"
+        params = [username]
+        if start is not None:
+            sql += " AND datetime_iso >= ?"
+            params.append(_iso(start))
+        if end is not None:
+            sql += " AND datetime_iso < ?"
+            params.append(_iso(end))
+        sql += " ORDER BY datetime_iso"
+        conn = self._connect()
+        try:
+            df = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+        return self._to_records(df)
+
+    @staticmethod
+    def _to_records(df):
+        df["감정"] = df["감정"].fillna("")
+        df["감정 이유"] = df["감정 이유"].fillna("")
+        return _normalize_records(df)
+
+    @timed
+    def load_records_by_id(self, username, record_ids, months=None):
+        """기본 키(id)로 해당 기록만 조회합니다. (months는 쓰지 않음)
+
+        username 쪽 인덱스를 고르지 않도록 +username으로 씀 (사용자 기록 전체를 훑게 됨)
+        """
+        record_ids = list(record_ids)
+        columns = ', '.join(_quote(c) for c in RECORD_COLUMNS)
+        frames = []
+        conn = self._connect()
+        try:
+            for i in range(0, len(record_ids), SQL_IN_CHUNK): # SQLite 변수 개수 제한
+                chunk = record_ids[i:i + SQL_IN_CHUNK]
+                frames.append(pd.read_sql_query(
+                    f"SELECT {columns} FROM records WHERE id IN ({', '.join('?' * len(chunk))}) AND +username = ?",
+                    conn, params=[*chunk, username]))
+        finally:
+            conn.close()
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RECORD_COLUMNS)
+        return self._to_records(df)
+
+    @timed
+    def load_unrated_records(self, username, start=None, end=None, limit=None):
+        """감정이 비어 있는 기록만 담은 부분 인덱스를 최근 시각부터 limit건 읽습니다."""
+        sql = (f"SELECT {', '.join(_quote(c) for c in RECORD_COLUMNS)} FROM records "
+               f"WHERE username = ? AND {self._UNRATED} AND datetime_iso IS NOT NULL")
+        params = [username]
+        if start is not None:
+            sql += " AND datetime_iso >= ?"
+            params.append(_iso(start))
+        if end is not None:
+            sql += " AND datetime_iso < ?"
+            params.append(_iso(end))
+        sql += " ORDER BY datetime_iso DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        conn = self._connect()
+        try:
+            df = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+        return self._to_records(df)
+
+    @timed
+    def save_records(self, df, username):
+        rows = self._record_rows(username, df)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM records WHERE username = ?", (username,))
+                conn.executemany(self._insert_sql(), rows)
+                self._bump_versions(conn, [username])
+        finally:
+            conn.close()
+
+    def append_record(self, username, rec):
+        self.append_record_batch(username, [rec])
+
+    def append_record_batch(self, username, recs):
+        # 여러 사용자에게 동시에 들어온 추가 요청은 한 트랜잭션(커밋 한 번)으로 묶음
+        _insert_writer.submit(self.path, [self._record_row(username, rec) for rec in recs])
+
+    def append_records(self, username, df):
+        rows = self._record_rows(username, df)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(self._insert_sql(), rows)
+                self._bump_versions(conn, [username])
+        finally:
+            conn.close()
+
+    def update_record(self, username, record_id, fields):
+        self.update_records(username, [(record_id, fields)])
+
+    def update_records(self, username, updates):
+        conn = self._connect()
+        try:
+            with conn: # 한 트랜잭션으로 커밋
+                for record_id, fields in updates:
+                    if not fields:
+                        continue
+                    assignments = ", ".join(f"{_quote(col)} = ?" for col in fields)
+                    conn.execute(
+                        f"UPDATE records SET {assignments} WHERE id = ? AND username = ?",
+                        list(fields.values()) + [record_id, username],
+                    )
+                    if DEDUPE_FIELDS & set(fields): # 중복 키가 바뀌는 수정 (감정 수정은 해당 없음)
+                        dt, amount, detail = conn.execute(
+                            'SELECT datetime_iso, "금액", "세부항목" FROM records WHERE id = ?', (record_id,)).fetchone()
+                        key = dedupe.dedupe_key({"datetime_iso": dt, "금액": amount, "세부항목": detail})
+                        conn.execute("UPDATE records SET dedupe_key = ? WHERE id = ?", (key, record_id))
+                self._bump_versions(conn, [username])
+        finally:
+            conn.close()
+
+    def load_users(self):
+        conn = self._connect()
+        try:
+            df = pd.read_sql_query("SELECT username, password_hash FROM users", conn)
+        finally:
+            conn.close()
+        return df.astype(str)
+
+    def save_users(self, df):
+        rows = df[USER_COLUMNS].astype(str).values.tolist()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM users")
+                conn.executemany("INSERT INTO users (username, password_hash) VALUES (?, ?)", rows)
+                self._bump_users_version(conn)
+        finally:
+            conn.close()
+
+    def append_user(self, username, password_hash):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                             (username, password_hash))
+                self._bump_users_version(conn)
+        finally:
+            conn.close()
+
+    def _fetchone(self, sql, params):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchone()
+        finally:
+            conn.close()
+
+    def _execute(self, sql, params):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(sql, params)
+        finally:
+            conn.close()
+
+    def load_profile(self, username):
+        row = self._fetchone("SELECT payload FROM profiles WHERE username = ?", (username,))
+        return json.loads(row[0]) if row else self._migrate_profile(username)
+
+    def save_profile(self, username, profile):
+        # version은 data_version용 카운터 (프로필 전체를 읽지 않고 바뀌었는지 확인)
+        self._execute("INSERT INTO profiles (username, payload, version) VALUES (?, ?, 1) "
+                      "ON CONFLICT(username) DO UPDATE SET payload = excluded.payload, version = version + 1",
+                      (username, json.dumps(profile, ensure_ascii=False)))
+
+    def _migrate_profile(self, username):
+        """이전 형식의 plans / budgets 행을 프로필로 옮기고 지웁니다. 없으면 None."""
+        conn = self._connect()
+        try:
+            with conn: # 옮기기와 지우기를 한 트랜잭션으로
+                plan = conn.execute("SELECT reflection, plan FROM plans WHERE username = ?", (username,)).fetchone()
+                budget = conn.execute("SELECT budget FROM budgets WHERE username = ?", (username,)).fetchone()
+                if plan is None and budget is None:
+                    return None
+                # 저장 시각이 없으므로 계획은 옮기는 주의 것으로 봄
+                profile = user_profile.from_legacy(
+                    budget[0] if budget and budget[0] is not None else None,
+                    (plan[0] or "", plan[1] or "") if plan else None, week_key(datetime.now()))
+                conn.execute("INSERT OR IGNORE INTO profiles (username, payload, version) VALUES (?, ?, 1)",
+                             (username, json.dumps(profile, ensure_ascii=False)))
+                conn.execute("DELETE FROM plans WHERE username = ?", (username,))
+                conn.execute("DELETE FROM budgets WHERE username = ?", (username,))
+        finally:
+            conn.close()
+        return self.load_profile(username) # 다른 세션/프로세스가 먼저 옮겼으면 그 프로필
+
+    def load_state(self, username, name):
+        row = self._fetchone("SELECT payload FROM user_state WHERE username = ? AND name = ?", (username, name))
+        return json.loads(row[0]) if row else None
+
+    def save_state(self, username, name, state):
+        self._execute("INSERT OR REPLACE INTO user_state (username, name, payload) VALUES (?, ?, ?)",
+                      (username, name, json.dumps(state, ensure_ascii=False)))
+
+    def delete_user_data(self, username):
+        conn = self._connect()
+        try:
+            with conn:
+                for table in ("records", "profiles", "plans", "budgets", "user_state"):
+                    conn.execute(f"DELETE FROM {table} WHERE username = ?", (username,))
+                self._bump_versions(conn, [username])
+        finally:
+            conn.close()
+
+    def list_usernames(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT username FROM users UNION SELECT username FROM records "
+                "UNION SELECT username FROM profiles UNION SELECT username FROM plans UNION SELECT username FROM budgets"
+            ).fetchall()
+        finally:
+            conn.close()
+        return sorted(r[0] for r in rows)
+
+    def find_dedupe_keys(self, username, keys):
+        found = set()
+        conn = self._connect()
+        try:
+            for i in range(0, len(keys), SQL_IN_CHUNK): # SQLite 변수 개수 제한
+                chunk = [int(key) for key in keys[i:i + SQL_IN_CHUNK]]
+                rows = conn.execute(f"SELECT dedupe_key FROM records WHERE username = ? AND dedupe_key IN "
+                                    f"({', '.join('?' * len(chunk))})", [username, *chunk])
+                found.update(row[0] for row in rows)
+        finally:
+            conn.close()
+        return found
+
+    def record_weeks(self, username):
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT DISTINCT year_week FROM records WHERE username = ? AND year_week != 0 "
+                                "ORDER BY year_week", (username,)).fetchall()
+        finally:
+            conn.close()
+        return [int(r[0]) for r in rows]
+
+    def data_version(self, kind, username=None):
+        if kind == "records":
+            # 사용자별 카운터 (다른 프로세스의 쓰기도 같은 DB에 기록되므로 함께 감지)
+            row = self._fetchone("SELECT version FROM record_versions WHERE username = ?", (username,))
+            return row[0] if row else 0
+        if kind == "profile":
+            row = self._fetchone("SELECT version FROM profiles WHERE username = ?", (username,))
+            return row[0] if row else 0
+        if kind == "users":
+            # 기록을 쓸 때도 바뀌는 DB 파일 상태 대신 사용자 목록 전용 카운터를 사용
+            row = self._fetchone("SELECT version FROM users_version WHERE id = 0", ())
+            return row[0] if row else 0
+        # 다른 프로세스의 쓰기도 감지하도록 DB/WAL 파일 상태를 사용
+        return (_stat_key(self.path), _stat_key(self.path + "-wal"))
+
+
+# ---------- 그룹 커밋 ----------
+def _flush_inserts(path, batches):
+    """같은 SQLite 파일에 대한 기록 추가 요청(요청마다 행 목록)을 한 트랜잭션으로 커밋합니다."""
+    rows = [row for batch in batches for row in batch]
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        if not FSYNC_WRITES:
+            conn.execute("PRAGMA synchronous=OFF")
+        with conn:
+            conn.executemany(SqliteBackend._insert_sql(), rows)
+            SqliteBackend._bump_versions(conn, [row[1] for row in rows])
+    finally:
+        conn.close()
+
+_insert_writer = GroupCommitWriter(_flush_inserts)
+
+
+# ---------- 저장소 선택 ----------
+def make_backend(name, base_dir=".", db_path=SQLITE_FILE):
+    """이름("csv"/"sqlite")으로 저장소를 만듭니다."""
+    if name == "csv":
+        return CsvBackend(base_dir)
+    if name == "sqlite":
+        return SqliteBackend(db_path)
+    raise ValueError(f"알 수 없는 저장소입니다: {name}")
+
+_backend = None
+
+def get_backend():
+    """설정(MONEYMONI_STORAGE)에 따른 저장소를 반환합니다."""
+    global _backend
+    if _backend is None:
+        _backend = make_backend(STORAGE_BACKEND)
+    return _backend
+
+def set_backend(backend):
+    """사용할 저장소를 직접 지정합니다. (마이그레이션, 배치 작업용)"""
+    global _backend
+    _backend = backend
+    _cache.invalidate()
+
+
+# ---------- 로드 캐시 ----------
+# 모든 세션이 공유합니다. 키는 (저장소, 종류, 사용자), 버전은 (쓰기 카운터, 파일 상태)이며
+# save_*/append_*/update_* 호출 시 카운터를 올리고 항목을 지웁니다.
+_cache = VersionedCache(CACHE_MAX_BYTES)
+_write_versions = {}
+
+def _version(kind, username):
+    backend = get_backend()
+    key = (backend.name, kind, username)
+    return key, (_write_versions.get(key, 0), backend.data_version(kind, username))
+
+def _cached_load(kind, username, loader, copy=True):
+    key, version = _version(kind, username)
+    return _cache.get_or_load(key, version, loader, copy=copy)
+
+def _invalidate(kind, username=None):
+    key = (get_backend().name, kind, username)
+    _write_versions[key] = _write_versions.get(key, 0) + 1
+    _cache.invalidate(key)
+
+def cache_stats():
+    """로드 캐시의 적중/실패 횟수와 사용량을 반환합니다."""
+    return _cache.stats()
+
+def records_version(username):
+    """사용자의 기록 버전. 이 프로세스나 다른 프로세스가 기록을 바꾸면 달라집니다."""
+    return _version("records", username)[1]
+
+
+# ---------- 파생 상태 ----------
+# 기록이 추가/수정될 때 함께 갱신하는 사용자별 상태 (이름 -> 모듈).
+# 각 모듈은 build(df), apply_insert(state, rec), apply_update(state, before, after)를 제공합니다.
+# 기록을 쓸 때마다 모든 상태를 읽고 다시 저장하므로, 상태의 크기는 기록 수와 무관하게
+# 상한이 있어야 합니다. (대분류별 통계, 최근 N건, 최근 몇 달의 칸 등. 전체 기록에 비례하는
+# 목록은 넣지 말고 필요할 때 인덱스로 조회할 것) benchmarks/bench_insert_scaling.py가
+# 기록 1천 건과 10만 건에서 기록 추가 시간이 비슷한지 확인합니다.
+DERIVED_STATES = {
+    rollup.STATE_NAME: rollup,
+    badges.STATE_NAME: badges,
+    pending.STATE_NAME: pending,
+    recent.STATE_NAME: recent,
+    spending.STATE_NAME: spending,
+    anomaly.STATE_NAME: anomaly,
+}
+
+def _apply_derived(username, apply):
+    backend = get_backend()
+    for name, module in DERIVED_STATES.items():
+        state = backend.load_state(username, name)
+        if state is None:
+            continue # 아직 없는 상태는 처음 읽을 때 전체 기록(이번 변경 포함)에서 만들어짐
+        backend.save_state(username, name, apply(module, state))
+
+def _rebuild_derived(username, df):
+    backend = get_backend()
+    for name, module in DERIVED_STATES.items():
+        backend.save_state(username, name, module.build(df))
+
+@timed
+def load_derived(username, name):
+    """파생 상태를 읽습니다. 아직 없으면 전체 기록에서 만들어 저장합니다."""
+    backend = get_backend()
+    state = backend.load_state(username, name)
+    if state is None:
+        with backend.lock(username): # 만드는 동안 추가된 기록이 빠지거나 두 번 더해지지 않도록
+            state = backend.load_state(username, name)
+            if state is None:
+                state = DERIVED_STATES[name].build(load_data(username))
+                backend.save_state(username, name, state)
+    return state
+
+@timed
+def load_rollup_archive(username, state):
+    """롤업 상태(rollup.py)가 칸을 두지 않는 since 이전 기간의 롤업 DataFrame. 없으면 None.
+
+    그 기간의 기록만 읽어 만들고, 상태의 since/archived/archived_changes가 바뀔 때까지
+    캐시하므로 최근 기록이 추가될 때는 다시 읽지 않습니다. 고치지 말고 쓰세요.
+    """
+    since = state.get("since")
+    if since is None or not state.get("archived"):
+        return None
+    key = (get_backend().name, "rollup_archive", username)
+    version = (_write_versions.get(key, 0), since, state["archived"], state.get("archived_changes", 0))
+    return _cache.get_or_load(
+        key, version, lambda: rollup.to_frame(rollup.build(load_data(username, None, pd.Timestamp(since)), hot_months=None)),
+        copy=False)
+
+# ---------- id 인덱스 ----------
+# 사용자별 id -> 캐시된 기록 DataFrame의 행 위치. 기록 버전마다 한 번만 만들고,
+# 감정 수정처럼 행이 추가/삭제되지 않는 변경은 인덱스를 그대로 새 버전으로 옮깁니다.
+_id_indexes = {}
+
+def _cached_frame(username):
+    """캐시된 최신 기록 원본(수정 금지)과 그 id 인덱스. 캐시에 없으면 None이며 읽지 않습니다."""
+    key, version = _version("records", username)
+    df = _cache.get(key, version)
+    if df is None:
+        return None
+    cached = _id_indexes.get(key)
+    if cached is None or cached[0] != version or cached[1] is not df:
+        index = {record_id: pos for pos, record_id in enumerate(df["id"])}
+        cached = (version, df, index)
+        _id_indexes[key] = cached
+    return df, cached[2]
+
+@timed
+def get_records(username, record_ids, times=None):
+    """id 목록에 해당하는 기록을 id 순서대로 반환합니다. (전체 기록을 읽지 않음)
+
+    전체 기록이 캐시되어 있으면 id 인덱스로 꺼내고, 아니면 저장소에서 그 id만 읽습니다.
+    times(각 기록의 시각, 예: 감정 대기열 항목의 시각)를 주면 CSV 저장소는 그 달의
+    파티션만 읽습니다.
+    """
+    cached = _cached_frame(username)
+    if cached is not None:
+        df, index = cached
+    else:
+        months = None
+        if times is not None:
+            months = set(_partition_keys(pd.to_datetime(pd.Series(list(times), dtype=object), errors='coerce')))
+        df = get_backend().load_records_by_id(username, record_ids, months)
+        index = {record_id: pos for pos, record_id in enumerate(df["id"])}
+    positions = [index[record_id] for record_id in record_ids if record_id in index]
+    return df.iloc[positions].reset_index(drop=True)
+
+def get_record(username, record_id):
+    """기록 한 건을 dict로 반환합니다. 없으면 None."""
+    found = get_records(username, [record_id])
+    return found.iloc[0].to_dict() if not found.empty else None
+
+
+# ---------- 앱에서 사용하는 함수 ----------
+def load_users():
+    """사용자 정보(ID, 해시 비밀번호)를 로드합니다."""
+    return _cached_load("users", None, lambda: get_backend().load_users())
+
+def save_users(df):
+    """사용자 정보를 저장합니다."""
+    get_backend().save_users(df)
+    _invalidate("users")
+
+def append_user(username, password_hash):
+    """사용자 한 명을 추가합니다. 중복 확인은 user_directory.UserDirectory가 맡습니다."""
+    get_backend().append_user(username, password_hash)
+    _invalidate("users")
+
+def users_lock():
+    """사용자 목록을 확인하고 추가하는 동안 다른 세션/프로세스의 가입을 막는 잠금."""
+    return get_backend().lock()
+
+@timed
+def load_data(username, start=None, end=None):
+    """특정 사용자의 지출 기록을 로드합니다. start/end를 주면 [start, end) 구간만 읽습니다."""
+    if start is not None or end is not None:
+        return get_backend().load_records(username, start, end)
+    return _cached_load("records", username, lambda: get_backend().load_records(username))
+
+@timed
+def load_weeks(username):
+    """기록이 있는 주차 키 목록(오름차순)을 반환합니다. 기록 대신 파티션 정보/인덱스만 읽습니다."""
+    key, version = _version("records", username)
+    return _cache.get_or_load(key + ("weeks",), version, lambda: get_backend().record_weeks(username))
+
+@timed
+def load_week(username, yw):
+    """한 주(주차 키)의 기록을 시각 순으로 반환합니다. 그 주와 겹치는 달의 기록만 읽고,
+    (사용자, 주차)별로 기록 버전이 바뀔 때까지 캐시하므로 대시보드를 다시 그릴 때는 읽지 않습니다.
+    """
+    key, version = _version("records", username)
+
+    def load():
+        start = week_start(yw)
+        return load_data(username, start, start + timedelta(days=7)).sort_values("datetime_iso", ignore_index=True)
+    return _cache.get_or_load(key + ("week", int(yw)), version, load)
+
+@timed
+def save_data(df, username):
+    """특정 사용자의 지출 기록 전체를 저장합니다."""
+    backend = get_backend()
+    with backend.lock(username):
+        backend.save_records(df, username)
+        _invalidate("records", username)
+        _invalidate("rollup_archive", username)
+        _rebuild_derived(username, _normalize_records(df.copy()))
+
+@timed
+def append_record(username, rec, workspace=None):
+    """새 지출 기록 한 건을 추가합니다. (기존 기록 크기와 무관)
+
+    workspace(파생 상태 사본을 들고 있는 engine.Workspace)를 주면 같은 잠금 안에서
+    사본에도 같은 변경을 적용합니다. 같은 사용자에게 동시에 들어온 추가는 그룹 커밋으로
+    묶이므로, 사용자 잠금을 잡은 채로 부르면 안 됩니다.
+    """
+    rec = dict(rec)
+    if rec.get("year_week") is None:
+        rec["year_week"] = week_key(rec.get("datetime_iso")) # 읽을 때 주차를 다시 계산하지 않도록 함께 저장
+    _append_writer.submit((get_backend(), username), (rec, workspace))
+
+def _flush_appends(target, items):
+    """같은 사용자에게 모인 기록 추가 요청 [(rec, workspace), ...]를 잠금 한 번 안에서 처리합니다.
+
+    기록은 한 번의 쓰기(CSV 로그 write + fsync, SQLite 커밋)로 요청 순서대로 추가하고,
+    파생 상태도 상태마다 한 번만 읽고 저장합니다.
+    """
+    backend, username = target
+    records = [rec for rec, _ in items]
+    workspaces = [workspace for _, workspace in items if workspace is not None]
+    with backend.lock(username): # 기록 추가와 파생 상태 갱신을 한 단위로
+        old_version = records_version(username) if workspaces else None
+        backend.append_record_batch(username, records)
+        _invalidate("records", username)
+
+        def apply(module, state):
+            for rec in records:
+                state = module.apply_insert(state, rec)
+            return state
+        _apply_derived(username, apply)
+        if workspaces:
+            new_version = records_version(username)
+            for workspace in workspaces:
+                workspace.commit(old_version, new_version, apply)
+
+_append_writer = GroupCommitWriter(_flush_appends)
+
+def append_records(username, df):
+    """여러 기록을 한 번에 추가합니다. (일괄 가져오기용, 기존 기록은 다시 쓰지 않음)"""
+    df = df.copy()
+    df["year_week"] = week_keys(df["datetime_iso"])
+    records = df.to_dict("records")
+    backend = get_backend()
+    with backend.lock(username):
+        backend.append_records(username, df)
+        _invalidate("records", username)
+
+        def apply(module, state):
+            for rec in records:
+                state = module.apply_insert(state, rec)
+            return state
+        _apply_derived(username, apply)
+
+def update_record(username, record_id, fields, before=None):
+    """기록 한 건의 일부 필드(예: 감정, 감정 이유)를 수정합니다.
+
+    before(수정 전 기록 dict)를 알고 있으면 넘겨 주세요. 파생 상태를 고칠 때 기록을 다시 읽지 않습니다.
+    """
+    update_records(username, [(record_id, fields, before)])
+
+@timed
+def update_records(username, updates, workspace=None):
+    """여러 기록을 한 번의 쓰기로 수정합니다. updates는 (record_id, fields, before) 목록입니다.
+
+    workspace는 append_record와 같습니다.
+    """
+    with get_backend().lock(username): # 수정과 파생 상태 갱신을 한 단위로
+        _update_records(username, updates, workspace)
+
+def _pending_refill_records(username, state):
+    """감정 대기열(state)을 다시 채울 미입력 기록을 찾습니다. 전체 기록을 읽지 않고 필요한 만큼만 읽습니다."""
+    end, limit = pending.refill_range(state)
+    backend = get_backend()
+    df = backend.load_unrated_records(username, end=end, limit=limit)
+    if len(df) >= limit:
+        # 대기열은 같은 초 안에서 id 순이므로, 개수 제한에 걸린 가장 오래된 초의 기록은 모두 읽음
+        oldest = df["datetime_iso"].min().floor("s")
+        rest = backend.load_unrated_records(username, start=oldest, end=oldest + pd.Timedelta(seconds=1))
+        df = pd.concat([df, rest], ignore_index=True).drop_duplicates("id")
+    return df
+
+def _update_records(username, updates, workspace=None):
+    updates = [(record_id, fields, before if before is not None else get_record(username, record_id))
+               for record_id, fields, before in updates]
+    key, old_version = _version("records", username)
+    cached = _cached_frame(username) # 쓰기 전 버전의 캐시와 id 인덱스 (있으면 제자리에서 고침)
+    get_backend().update_records(username, [(record_id, fields) for record_id, fields, _ in updates])
+    _write_versions[key] = _write_versions.get(key, 0) + 1
+    changes = [(before, {**before, **fields}) for _, fields, before in updates if before is not None]
+    refill = {}
+
+    def apply(module, state):
+        for before, after in changes:
+            state = module.apply_update(state, before, after)
+        if module is pending and pending.needs_refill(state):
+            # 감정을 입력해 대기열이 줄면 대기열에서 빠졌던 오래된 미입력 기록으로 다시 채움.
+            # workspace 사본도 같은 상태이므로 한 번 찾은 기록을 함께 씀
+            if "records" not in refill:
+                refill["records"] = _pending_refill_records(username, state)
+            pending.refill(state, refill["records"])
+        return state
+    _apply_derived(username, apply)
+
+    # 캐시된 기록이 최신이었다면 바뀐 칸만 제자리에서 고침 (전체를 다시 읽지 않음).
+    # 저장소에 따라 파생 상태 저장도 버전에 반영될 수 있으므로 새 버전은 파생 상태를 저장한 뒤에 읽음
+    _, new_version = _version("records", username)
+    def patch(df):
+        index = cached[1]
+        for record_id, fields, _ in updates:
+            pos = index.get(record_id)
+            if pos is None:
+                continue
+            for col, value in fields.items():
+                _set_cell(df, pos, col, value)
+    if cached is not None and _cache.patch(key, old_version, new_version, patch):
+        _id_indexes[key] = (new_version, cached[0], cached[1])
+    else:
+        _cache.invalidate(key)
+    if workspace is not None:
+        workspace.commit(old_version, new_version, apply)
+
+def existing_dedupe_keys(username, df, keys=None):
+    """df(가져올 기록)의 중복 키 중 이미 저장된 기록에 있는 키의 집합. keys는 미리 계산한 dedupe_keys(df).
+
+    SQLite는 (username, dedupe_key) 인덱스로 찾고, CSV는 키에 들어 있는 시각을 이용해
+    df의 시각 범위와 겹치는 월 파티션만 읽어 벡터 연산(isin)으로 비교합니다.
+    """
+    keys = dedupe.dedupe_keys(df) if keys is None else keys
+    if keys.empty:
+        return set()
+    found = get_backend().find_dedupe_keys(username, keys.unique().tolist())
+    if found is None:
+        dts = pd.to_datetime(df.loc[keys.index, "datetime_iso"], errors='coerce', format="ISO8601")
+        start, end = dts.min().floor("s"), dts.max().floor("s") + pd.Timedelta(seconds=1) # 키는 초 단위
+        stored = dedupe.dedupe_keys(load_data(username, start, end))
+        found = set(keys[keys.isin(stored)].tolist())
+    return found
+
+def compact_records(username):
+    """쌓인 기록 변경분을 정리합니다."""
+    get_backend().compact_records(username)
+    _invalidate("records", username)
+
+@timed
+def load_profile(username):
+    """사용자 프로필(예산, 예산 이력, 주차별 성찰/계획)을 로드합니다. 캐시 원본이므로 고치지 말고 쓰세요.
+
+    프로필은 한 번에 읽고, 바뀌지 않았으면 파일 상태(CSV)나 버전 카운터(SQLite)만 확인합니다.
+    """
+    return _cached_load("profile", username, lambda: get_backend().load_profile(username) or user_profile.empty(),
+                        copy=False)
+
+def _update_profile(username, change):
+    """최신 프로필을 change(profile)로 고쳐 저장합니다. 다른 세션의 변경을 덮어쓰지 않도록 잠금 안에서 읽습니다."""
+    backend = get_backend()
+    with backend.lock(username):
+        profile = backend.load_profile(username) or user_profile.empty()
+        backend.save_profile(username, change(profile))
+        _invalidate("profile", username)
+
+def load_plan(username, week=None):
+    """week 주차(기본값은 이번 주)의 (성찰, 계획)을 로드합니다. 없으면 빈 문자열 두 개."""
+    return user_profile.plan_for(load_profile(username), week or week_key(datetime.now())) or ("", "")
+
+def save_plan(username, reflection, plan, week=None):
+    """week 주차(기본값은 이번 주)의 성찰과 계획을 저장합니다."""
+    _update_profile(username, lambda profile: user_profile.set_plan(profile, reflection, plan, week))
+
+def plan_weeks(username):
+    """성찰/계획을 저장한 주차 키 목록 (최근 주차부터)."""
+    return user_profile.plan_weeks(load_profile(username))
+
+def load_user_budget(username):
+    """특정 사용자의 월 예산을 로드합니다. 저장된 값이 없으면 기본값을 반환합니다."""
+    budget = load_profile(username)["budget"]
+    return DEFAULT_MONTHLY_BUDGET if budget is None else budget
+
+def save_user_budget(username, budget):
+    """특정 사용자의 월 예산을 저장하고 예산 이력에 남깁니다."""
+    _update_profile(username, lambda profile: user_profile.set_budget(profile, budget))
+
+def delete_user_files(username):
+    """특정 사용자의 모든 관련 데이터를 삭제합니다."""
+    backend = get_backend()
+    with backend.lock(username):
+        backend.delete_user_data(username)
+        _invalidate("records", username)
+        _invalidate("profile", username)
+
+
+# ---------- 마이그레이션 ----------
+def migrate(source, target):
+    """source 저장소의 모든 사용자 데이터를 target 저장소로 복사합니다."""
+    target.save_users(source.load_users())
+    usernames = source.list_usernames()
+    for username in usernames:
+        records = source.load_records(username)
+        if not records.empty:
+            target.save_records(records, username)
+        profile = source.load_profile(username)
+        if profile is not None:
+            target.save_profile(username, profile)
+    return usernames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="머니모니 저장소 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mig = sub.add_parser("migrate", help="기존 저장소의 데이터를 다른 저장소로 옮깁니다.")
+    mig.add_argument("--from", dest="source", default="csv", choices=["csv", "sqlite"])
+    mig.add_argument("--to", dest="target", default="sqlite", choices=["csv", "sqlite"])
+    mig.add_argument("--dir", default=".", help="CSV 파일이 있는 폴더")
+    mig.add_argument("--db", default=SQLITE_FILE, help="SQLite 파일 경로")
+    args = parser.parse_args(argv)
+
+    if args.source == args.target:
+        parser.error("--from과 --to가 같습니다.")
+    source = make_backend(args.source, args.dir, args.db)
+    target = make_backend(args.target, args.dir, args.db)
+    usernames = migrate(source, target)
+    print(f"{len(usernames)}명의 데이터를 {args.source} → {args.target}로 옮겼습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""구간별 실행 시간 측정 (재실행 단위).
+
+"앱이 느리다"는 말만으로는 CSV 읽기, 저장, 주차 계산, 주간 통계, 감정 입력 위젯,
+차트 중 어디가 느린지 알 수 없으므로, 자주 쓰는 함수와 화면 구역에 측정 구간을
+두고 Streamlit 재실행 한 번 단위로 모읍니다.
+
+    run = timing.start_run("kim")      # 재실행 시작 (이 스레드에서 측정 시작)
+    with timing.span("탭1"):            # 화면 구역
+        ...
+    @timing.timed                       # 함수 (이름은 "모듈.함수")
+    def load_data(...): ...
+    timing.finish_run(run)
+    timing.summarize(run)               # 이름별 횟수, 합계, p50, p95 (ms)
+    timing.append_trace(run)            # TRACE_FILE에 한 줄(JSON) 추가
+
+측정은 start_run을 부른 스레드(Streamlit에서는 그 세션의 스크립트 스레드)에서만
+켜집니다. 측정 중이 아니면 span은 아무것도 하지 않는 공용 객체를 돌려주고, timed
+함수는 스레드 로컬 값 하나만 확인하고 원래 함수를 부르므로 비용이 거의 없습니다.
+구간이 겹치면(함수 안의 함수) 바깥 구간 시간에 안쪽 시간이 포함됩니다.
+
+저장된 추적 파일은 다음처럼 요약합니다.
+    python timing.py moneymoni_trace.jsonl --last 50
+"""
+import argparse
+import contextlib
+import functools
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+TIMING_DEFAULT = os.environ.get("MONEYMONI_TIMING", "0") == "1" # 디버그 패널에서 측정을 켜 둔 상태로 시작
+TRACE_FILE = os.environ.get("MONEYMONI_TRACE_FILE", "moneymoni_trace.jsonl") # 재실행별 측정 결과 파일 (JSON Lines)
+
+_local = threading.local()
+_NOOP = contextlib.nullcontext()
+_trace_lock = threading.Lock()
+
+
+class _Span:
+    __slots__ = ("run", "name", "t0")
+
+    def __init__(self, run, name):
+        self.run, self.name = run, name
+
+    def __enter__(self):
+        self.run._depth += 1
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        t1 = time.perf_counter()
+        run = self.run
+        run._depth -= 1
+        run.spans.append((self.name, round((self.t0 - run._t0) * 1000, 3), round((t1 - self.t0) * 1000, 3), run._depth))
+        return False
+
+
+class Run:
+    """재실행 한 번의 측정 결과.
+
+    spans는 끝난 순서대로 (이름, 시작 ms, 걸린 ms, 깊이) 튜플 목록이며, 시작 ms는
+    재실행 시작 시점 기준입니다. st.rerun / st.stop으로 끝까지 실행되지 않은
+    재실행은 interrupted가 True입니다.
+    """
+
+    def __init__(self, label=""):
+        self.label = label
+        self.started = datetime.now()
+        self.spans = []
+        self.wall_ms = None
+        self.interrupted = False
+        self._t0 = time.perf_counter()
+        self._depth = 0
+
+    def span(self, name):
+        return _Span(self, name)
+
+
+def start_run(label=""):
+    """이 스레드에서 새 재실행 측정을 시작하고 Run을 반환합니다."""
+    run = _local.run = Run(label)
+    return run
+
+
+def finish_run(run, interrupted=False):
+    """측정을 끝내고 걸린 시간을 기록합니다. (이미 끝난 Run이면 그대로 반환)
+
+    다음 재실행 시작 때 이전 Run을 끝내는 경우처럼 다른 스레드에서 불러도 됩니다.
+    """
+    if getattr(_local, "run", None) is run:
+        _local.run = None
+    if run.wall_ms is None:
+        if interrupted and run.spans: # 중단된 재실행은 마지막 구간이 끝난 시점까지
+            run.wall_ms = max(start + ms for _, start, ms, _ in run.spans)
+        else:
+            run.wall_ms = round((time.perf_counter() - run._t0) * 1000, 3)
+        run.interrupted = interrupted
+    return run
+
+
+def current_run():
+    """이 스레드에서 측정 중인 Run. 측정 중이 아니면 None."""
+    return getattr(_local, "run", None)
+
+
+def span(name):
+    """측정 중이면 이름이 name인 구간을, 아니면 아무것도 하지 않는 컨텍스트를 반환합니다."""
+    run = getattr(_local, "run", None)
+    return _NOOP if run is None else _Span(run, name)
+
+
+def timed(fn=None, name=None):
+    """함수 호출을 구간으로 측정하는 데코레이터. 이름을 주지 않으면 "모듈.함수"."""
+    def decorate(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = getattr(_local, "run", None)
+            if run is None:
+                return fn(*args, **kwargs)
+            with _Span(run, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate if fn is None else decorate(fn)
+
+
+# ---------- 집계 / 추적 파일 ----------
+def _percentile(values, q):
+    """정렬된 values의 q 분위수 (nearest-rank)."""
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def aggregate(durations):
+    """{이름: [걸린 ms, ...]}를 합계가 큰 순서의 행 목록 (이름, 횟수, 합계, p50, p95)으로 만듭니다."""
+    rows = []
+    for name, values in durations.items():
+        values = sorted(values)
+        rows.append({"구간": name, "횟수": len(values), "합계 ms": round(sum(values), 2),
+                     "p50 ms": round(_percentile(values, 0.5), 2), "p95 ms": round(_percentile(values, 0.95), 2)})
+    return sorted(rows, key=lambda row: row["합계 ms"], reverse=True)
+
+
+def summarize(run):
+    """재실행 한 번의 구간을 이름별로 모은 행 목록을 반환합니다. (aggregate 참고)"""
+    durations = {}
+    for name, _, ms, _ in run.spans:
+        durations.setdefault(name, []).append(ms)
+    return aggregate(durations)
+
+
+def append_trace(run, path=None):
+    """Run을 추적 파일에 JSON 한 줄로 덧붙입니다."""
+    line = json.dumps({
+        "time": run.started.isoformat(timespec="milliseconds"), "label": run.label,
+        "wall_ms": run.wall_ms, "interrupted": run.interrupted, "spans": run.spans,
+    }, ensure_ascii=False)
+    with _trace_lock, open(path or TRACE_FILE, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def read_trace(path=None, label=None):
+    """추적 파일의 재실행 기록(dict) 목록을 반환합니다. label을 주면 그 재실행만."""
+    with open(path or TRACE_FILE, encoding="utf-8") as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    return [run for run in runs if label is None or run["label"] == label]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추적 파일(JSON Lines)의 구간별 시간을 요약합니다.")
+    parser.add_argument("path", nargs="?", default=TRACE_FILE)
+    parser.add_argument("--label", help="이 label(사용자)의 재실행만")
+    parser.add_argument("--last", type=int, help="최근 N번의 재실행만")
+    args = parser.parse_args(argv)
+
+    runs = read_trace(args.path, args.label)
+    if args.last:
+        runs = runs[-args.last:]
+    if not runs:
+        print("기록된 재실행이 없습니다.")
+        return
+    durations = {"(재실행 전체)": [run["wall_ms"] for run in runs]}
+    for run in runs:
+        for name, _, ms, _ in run["spans"]:
+            durations.setdefault(name, []).append(ms)
+    print(f"재실행 {len(runs)}번 (중단 {sum(run['interrupted'] for run in runs)}번)\n")
+    print(f"{'구간':<36} {'횟수':>7} {'합계 ms':>11} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in aggregate(durations):
+        print(f"{row['구간']:<36} {row['횟수']:>7} {row['합계 ms']:>11.1f} {row['p50 ms']:>9.2f} {row['p95 ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""사용자 디렉터리: username -> 비밀번호 해시 인덱스.
+
+로그인/회원가입은 매 입력마다 스크립트가 다시 실행되므로, 사용자 목록을
+DataFrame으로 다시 읽어 선형 검색하는 대신 프로세스 전체가 공유하는 dict
+인덱스로 O(1) 조회합니다. 저장소의 사용자 데이터가 바뀌면(다른 프로세스의
+가입 포함) 다음 조회 때 한 번만 다시 읽습니다.
+
+가입은 저장소에 한 줄만 추가하며, 중복 확인과 추가는 하나의 잠금(스레드
+잠금 + 저장소의 사용자 목록 파일 잠금) 안에서 이루어집니다.
+"""
+import threading
+
+import storage
+
+
+class UserDirectory:
+    """해시 인덱스 기반 사용자 목록."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = {}
+        self._version = None
+
+    def _current_version(self):
+        backend = storage.get_backend()
+        return (backend.name, backend.data_version("users"))
+
+    def _refresh(self):
+        # self._lock을 잡은 상태에서 호출
+        version = self._current_version()
+        if version != self._version:
+            df = storage.load_users()
+            self._index = dict(zip(df["username"], df["password_hash"]))
+            self._version = version
+
+    def exists(self, username):
+        """해당 아이디가 등록되어 있는지 확인합니다."""
+        return self.get_hash(username) is not None
+
+    def get_hash(self, username):
+        """아이디의 비밀번호 해시를 반환합니다. 없으면 None."""
+        with self._lock:
+            self._refresh()
+            return self._index.get(username)
+
+    def register(self, username, password_hash):
+        """새 사용자를 추가합니다. 이미 있는 아이디면 False를 반환합니다."""
+        # 다른 프로세스의 가입과도 겹치지 않도록 저장소 잠금 안에서 다시 확인하고 추가
+        with self._lock, storage.users_lock():
+            self._refresh()
+            if username in self._index:
+                return False
+            storage.append_user(username, password_hash)
+            self._index[username] = password_hash
+            self._version = self._current_version() # 방금 쓴 내용은 이미 인덱스에 반영됨
+            return True
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+
+_directory = UserDirectory()
+
+def get_user_directory():
+    """모든 세션이 공유하는 사용자 디렉터리를 반환합니다."""
+    return _directory
@@ -0,0 +1,67 @@
+"""사용자 프로필: 월 예산, 예산 변경 이력, 주차별 성찰/계획.
+
+이전에는 사용자마다 {username}_budget.txt와 {username}_plan.txt를 따로 열었고,
+계획 파일에는 성찰/계획이 하나만 있어 매주 덮어썼습니다. 프로필은 이 값들을
+하나의 JSON 문서로 모아 한 번에 읽고 쓰며, 성찰/계획은 주차 키별로 보관하므로
+특정 주차의 기록을 목록을 훑지 않고 바로 찾습니다.
+
+프로필: {"budget": 월 예산 또는 None,
+         "budget_history": [[저장 시각, 예산], ...] (오래된 순, 최대 BUDGET_HISTORY_KEEP개),
+         "plans": {"주차 키": {"reflection": 성찰, "plan": 계획, "saved_at": 저장 시각}, ...}}
+
+이 모듈은 문서만 다루고, 읽기/쓰기와 이전 파일 변환은 storage.py가 맡습니다.
+"""
+from datetime import datetime
+
+from analytics import week_key
+
+BUDGET_HISTORY_KEEP = 100 # 보관할 예산 변경 이력 수
+
+
+def empty():
+    return {"budget": None, "budget_history": [], "plans": {}}
+
+
+def _now(now=None):
+    return (now or datetime.now()).isoformat(sep=" ", timespec="seconds")
+
+
+def from_legacy(budget=None, plan=None, plan_week=0):
+    """이전 형식의 예산(정수)과 계획((성찰, 계획) 튜플, plan_week 주차에 저장된 것)으로 프로필을 만듭니다."""
+    profile = empty()
+    if budget is not None:
+        profile["budget"] = int(budget)
+        profile["budget_history"].append([None, int(budget)]) # 이전 파일에는 저장 시각이 없음
+    if plan is not None:
+        reflection, text = plan
+        profile["plans"][str(plan_week)] = {"reflection": reflection, "plan": text, "saved_at": None}
+    return profile
+
+
+def set_budget(profile, budget, now=None):
+    """월 예산을 바꾸고 이력에 남깁니다. 같은 값이면 이력을 늘리지 않습니다."""
+    budget = int(budget)
+    if profile.get("budget") != budget:
+        history = profile.setdefault("budget_history", [])
+        history.append([_now(now), budget])
+        del history[:max(0, len(history) - BUDGET_HISTORY_KEEP)]
+    profile["budget"] = budget
+    return profile
+
+
+def set_plan(profile, reflection, plan, week=None, now=None):
+    """week 주차(기본값은 이번 주)의 성찰/계획을 저장합니다. 다른 주차의 기록은 그대로 둡니다."""
+    week = week or week_key(now or datetime.now())
+    profile.setdefault("plans", {})[str(week)] = {"reflection": reflection, "plan": plan, "saved_at": _now(now)}
+    return profile
+
+
+def plan_for(profile, week):
+    """week 주차의 (성찰, 계획). 없으면 None."""
+    entry = profile.get("plans", {}).get(str(week))
+    return None if entry is None else (entry["reflection"], entry["plan"])
+
+
+def plan_weeks(profile):
+    """성찰/계획이 있는 주차 키 목록 (최근 주차부터)."""
+    return sorted((int(week) for week in profile.get("plans", {})), reverse=True)